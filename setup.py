@@ -49,5 +49,10 @@ setup(
     ],
     include_package_data=True,
     install_requires=required,
-    entry_points={"console_scripts": ["talkgenerator = talkgenerator.run:main_cli"]},
+    entry_points={
+        "console_scripts": [
+            "talkgenerator = talkgenerator.run:main_cli",
+            "talkgenerator-batch = talkgenerator.run:main_batch_cli",
+        ]
+    },
 )
@@ -67,8 +67,14 @@ class SlideGeneratorData:
         logger.debug('used_elements: {}'.format(used_elements))
         logger.debug('self._allowed_repeated_elements: {}'.format(self._allowed_repeated_elements))
 
+        deadline = presentation_context.get("deadline")
+
         # Try a certain amount of times
         for i in range(self._retries):
+            # Don't start another try if the time budget is spent
+            if i > 0 and deadline is not None and deadline.is_expired():
+                logger.info("Stopped retrying {} as its deadline passed".format(self))
+                return None
             logger.debug('retry: {}'.format(i))
             logger.debug('self._generator: {}'.format(self._generator))
             slide_results = self._generator.generate_slide(
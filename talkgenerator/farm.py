@@ -0,0 +1,97 @@
+"""
+A farm of worker processes that each generate whole decks, such that batches of talks use all cores instead of the
+single interpreter that the parsing, tagging, image and pptx work would otherwise share.
+The workers share the persistent source caches and the image store on disk (and Redis, if configured), so anything
+downloaded by one worker is reused by the others.
+Workers normalise images in their own process, as the farm already uses every core, and a pool of normalising processes
+for every worker would only compete for them.
+"""
+import json
+import logging
+import os
+import time
+from collections import namedtuple
+from typing import Iterable, Iterator, List, Optional, Union
+
+from talkgenerator import settings
+from talkgenerator.util import concurrency_util
+
+logger = logging.getLogger("talkgenerator")
+
+# The outcome of generating one deck in a worker process. Presentations can not be sent between processes, so this is
+# the path of the saved deck, or its slides if it was not saved
+DeckFarmResult = namedtuple(
+    "DeckFarmResult",
+    ["topic", "presentation_file", "slides", "seconds", "worker", "error"],
+)
+
+
+def generate_presentations_in_processes(
+    topics: Iterable[Union[str, List[str]]],
+    processes: Optional[int] = None,
+    schema: str = "default",
+    slides: int = 10,
+    **generation_arguments,
+) -> Iterator[DeckFarmResult]:
+    """ Generates a deck for every topic in a pool of worker processes, yielding every result as soon as it is
+    finished. The topics are handed out as workers become free, and the other arguments are passed on to
+    generate_presentation in the worker """
+    if processes is None:
+        processes = settings.generation_settings()["farm_processes"] or os.cpu_count()
+    generation_arguments["open_ppt"] = False
+    generation_arguments["print_logs"] = False
+
+    executor = concurrency_util.get_process_executor(
+        "decks", processes, initializer=_initialise_worker
+    )
+
+    def submit(topic):
+        return executor.submit(
+            _generate_deck, topic, schema, slides, generation_arguments
+        )
+
+    # Keeping a second topic queued for every worker means no worker waits for the coordinator
+    for result in concurrency_util.imap_unordered(submit, topics, 2 * processes):
+        if result.error is None:
+            logger.info(
+                "Worker {} generated a deck about {} in {:.1f} seconds".format(
+                    result.worker, result.topic, result.seconds
+                )
+            )
+        yield result
+
+
+def _initialise_worker():
+    os.environ["IMAGE_NORMALISE_PROCESSES"] = "0"
+
+
+def _generate_deck(
+    topic: Union[str, List[str]], schema: str, slides: int, generation_arguments
+) -> DeckFarmResult:
+    from talkgenerator import generator
+
+    start = time.perf_counter()
+    try:
+        _, slide_deck, presentation_file = generator.generate_presentation(
+            schema, slides, topic=topic, **generation_arguments
+        )
+    except Exception as e:
+        logger.exception("Could not generate presentation about {}".format(topic))
+        return DeckFarmResult(
+            topic, None, None, time.perf_counter() - start, os.getpid(), str(e)
+        )
+
+    slide_dictionaries = None
+    if presentation_file is None:
+        # Slides hold images, charts and their modifiers, so they are only sent back as JSON-compatible values
+        slide_dictionaries = json.loads(
+            json.dumps(slide_deck.to_slide_deck_dictionary(), default=str)
+        )
+    return DeckFarmResult(
+        topic,
+        presentation_file,
+        slide_dictionaries,
+        time.perf_counter() - start,
+        os.getpid(),
+        None,
+    )
@@ -1,28 +1,55 @@
 import argparse
+import contextlib
+import contextvars
+import json
 import os
 import pathlib
 import random
 import subprocess
 import sys
 import logging
-from typing import List, Union, Tuple, Optional
+import uuid
+from collections import namedtuple
+from concurrent.futures import Executor
+from io import BytesIO
+from typing import (
+    TYPE_CHECKING,
+    BinaryIO,
+    Iterable,
+    Iterator,
+    List,
+    Union,
+    Tuple,
+    Optional,
+)
+
+from talkgenerator import runtime_checker, settings
+from talkgenerator.util import concurrency_util
+from talkgenerator.util import os_util
+from talkgenerator.util import profiling_util
+from talkgenerator.util import tracing_util
 
-from pptx import Presentation
+if TYPE_CHECKING:
+    # The schemas pull in every content source, so they are only imported when a talk is generated
+    from pptx import Presentation
 
-from talkgenerator.slide.slide_deck import SlideDeck
-from talkgenerator.schema.content_generators import full_name_generator
-from talkgenerator.schema.presentation_schema_types import get_schema
-from talkgenerator import runtime_checker
-from talkgenerator.sources import phrasefinder
-from talkgenerator.util import os_util
+    from talkgenerator.slide.slide_deck import SlideDeck
 
 DEFAULT_PRESENTATION_TOPIC = "cat"
-MAX_PRESENTATION_SAVE_TRIES = 100
+MAX_PRESENTATION_SAVE_TRIES = 10
 
 logger = logging.getLogger("talkgenerator")
 
+# The outcome of generating one deck of a batch: error is the exception if generating it failed
+PresentationResult = namedtuple(
+    "PresentationResult",
+    ["topic", "presentation", "slide_deck", "presentation_file", "error"],
+)
+
 
-def generate_presentation_using_cli_arguments(args) -> Tuple[Presentation, SlideDeck, str]:
+def generate_presentation_using_cli_arguments(
+    args,
+) -> Tuple["Presentation", "SlideDeck", str]:
     """Make a talk with the given topic."""
 
     runtime_checker.check_runtime_environment()
@@ -38,6 +65,10 @@ def generate_presentation_using_cli_arguments(args) -> Tuple[Presentation, Slide
         title=args.title,
         presenter=args.presenter,
         parallel=args.parallel,
+        engine=args.engine,
+        speculative_fanout=args.speculative_fanout,
+        deadline=args.deadline,
+        slide_deadline=args.slide_deadline,
         int_seed=args.int_seed,
         print_logs=args.print_logs,
         save_ppt=args.save_ppt,
@@ -54,13 +85,21 @@ def generate_presentation(
     parallel: bool = True,
     int_seed: int = None,
     save_ppt: bool = True,
+    engine: str = None,
+    executor: Executor = None,
+    speculative_fanout: int = 1,
+    deadline: float = None,
+    slide_deadline: float = None,
     output_folder: str = "../output/",
+    output_stream: BinaryIO = None,
     open_ppt: bool = False,
     print_logs=False,
-) -> Tuple[Presentation, SlideDeck, str]:
+) -> Tuple["Presentation", "SlideDeck", str]:
+    """Generates a presentation and, if save_ppt is set, writes it to the output stream if given, and otherwise to a
+    new file in the output folder, whose path is returned"""
 
-    logger.info('**************************')
-    logger.info('Generating presentation...')
+    logger.info("**************************")
+    logger.info("Generating presentation...")
     if print_logs:
         os_util.show_logs(logger)
 
@@ -68,8 +107,13 @@ def generate_presentation(
         random.seed(int_seed)
 
     # Retrieve the schema to generate the presentation with
-    presentation_schema = get_schema(schema)
-    logger.info('Presentation schema: {}'.format(presentation_schema))
+    with profiling_util.profile("schema", schema):
+        from talkgenerator.schema.content_generators import full_name_generator
+        from talkgenerator.schema.presentation_schema_types import get_schema
+        from talkgenerator.sources import phrasefinder
+
+        presentation_schema = get_schema(schema)
+    logger.info("Presentation schema: {}".format(presentation_schema))
 
     # Generate random presenter name if no presenter name given
     if not presenter:
@@ -87,28 +131,43 @@ def generate_presentation(
     else:
         topics = [topic.strip() for topic in topic.split(",")]
 
-    logger.info('Presentation topics: {}'.format(topics))
-    logger.info('Presentation num_slides: {}'.format(slides))
-    logger.info('Presentation presenter: {}'.format(presenter))
-    logger.info('Presentation title: {}'.format(title))
-    logger.info('Presentation parallel: {}'.format(parallel))
-    logger.info('Presentation int_seed: {}'.format(int_seed))
-    logger.info('Presentation save_ppt: {}'.format(save_ppt))
-
-    # Generate the presentation object
-    presentation, slide_deck = presentation_schema.generate_presentation(
-        topics=topics,
-        num_slides=slides,
-        presenter=presenter,
-        title=title,
-        parallel=parallel,
-        int_seed=int_seed,
-        save_ppt=save_ppt,
-    )
+    logger.info("Presentation topics: {}".format(topics))
+    logger.info("Presentation num_slides: {}".format(slides))
+    logger.info("Presentation presenter: {}".format(presenter))
+    logger.info("Presentation title: {}".format(title))
+    logger.info("Presentation parallel: {}".format(parallel))
+    logger.info("Presentation engine: {}".format(engine))
+    logger.info("Presentation speculative_fanout: {}".format(speculative_fanout))
+    logger.info("Presentation deadline: {}".format(deadline))
+    logger.info("Presentation slide_deadline: {}".format(slide_deadline))
+    logger.info("Presentation int_seed: {}".format(int_seed))
+    logger.info("Presentation save_ppt: {}".format(save_ppt))
+
+    # Generate the presentation object. Grammars are only loaded when their generator is first used, so they are
+    # profiled (if requested) as part of generating the slides
+    with tracing_util.span(
+        ", ".join(topics), tracing_util.DECK, schema=schema, slides=slides
+    ), profiling_util.profile("generation", "slides"):
+        presentation, slide_deck = presentation_schema.generate_presentation(
+            topics=topics,
+            num_slides=slides,
+            presenter=presenter,
+            title=title,
+            parallel=parallel,
+            int_seed=int_seed,
+            save_ppt=save_ppt,
+            engine=engine,
+            executor=executor,
+            speculative_fanout=speculative_fanout,
+            deadline=deadline,
+            slide_deadline=slide_deadline,
+        )
+
+    profiling_util.report_startup()
 
-    logger.info('**************************')
-    logger.info('Presentation generated: {}'.format(presentation))
-    logger.info('Slide deck generated: {}'.format(slide_deck))
+    logger.info("**************************")
+    logger.info("Presentation generated: {}".format(presentation))
+    logger.info("Slide deck generated: {}".format(slide_deck))
 
     cleaned_topics = ",".join(topics).replace(" ", "").replace(",", "_")
     file_name = "".join(e for e in cleaned_topics if e.isalnum() or e == "_")
@@ -120,9 +179,13 @@ def generate_presentation(
     # Save presentation
     presentation_file = None
     if save_ppt:
-        presentation_file = save_presentation_to_pptx(
-            output_folder, file_name, presentation
-        )
+        with tracing_util.span("save", tracing_util.RENDER):
+            if output_stream is not None:
+                save_presentation_to_stream(presentation, output_stream)
+            else:
+                presentation_file = save_presentation_to_pptx(
+                    output_folder, file_name, presentation
+                )
 
         # Open the presentation
         if open_ppt and presentation_file is not None:
@@ -132,27 +195,183 @@ def generate_presentation(
     return presentation, slide_deck, presentation_file
 
 
-def save_presentation_to_pptx(output_folder: str, file_name: str, prs, index=0) -> Optional[str]:
-    """Save the talk."""
-    if index > MAX_PRESENTATION_SAVE_TRIES:
-        return None
-
-    suffix = "_" + str(index) if index > 0 else ""
-    fp: str = os.path.join(output_folder, str(file_name) + str(suffix) + ".pptx")
+def generate_presentations(
+    topics: Iterable[Union[str, List[str]]],
+    schema: str = "default",
+    slides: int = 10,
+    max_concurrent_decks: int = None,
+    int_seed: int = None,
+    print_logs: bool = False,
+    **generation_arguments,
+) -> Iterator[PresentationResult]:
+    """Generates a presentation for every topic, several at once, yielding every result as soon as it is finished.
+    All decks share the schema, caches, sessions and executors of the process. The topics are only read as decks
+    finish, so they can be a long or endless stream. The other arguments are passed on to generate_presentation.
+    A failing deck doesn't stop the batch, but is yielded with its error."""
+    if max_concurrent_decks is None:
+        max_concurrent_decks = settings.generation_settings()["max_concurrent_decks"]
+    if print_logs:
+        os_util.show_logs(logger)
+    # The decks share the random generator, so the batch is only seeded once
+    if int_seed is not None:
+        random.seed(int_seed)
+    generation_arguments["open_ppt"] = False
+
+    executor = concurrency_util.get_executor("decks", max_concurrent_decks)
+
+    def submit(topic):
+        return executor.submit(
+            contextvars.copy_context().run,
+            _generate_batch_presentation,
+            topic,
+            schema,
+            slides,
+            generation_arguments,
+        )
 
-    # If file already exists, don't overwrite it:
-    if pathlib.Path(fp).is_file():
-        return save_presentation_to_pptx(output_folder, file_name, prs, index + 1)
+    yield from concurrency_util.imap_unordered(submit, topics, max_concurrent_decks)
 
-    # Create the parent folder if it doesn't exist
-    pathlib.Path(os.path.dirname(fp)).mkdir(parents=True, exist_ok=True)
 
+def _generate_batch_presentation(
+    topic: Union[str, List[str]], schema: str, slides: int, generation_arguments
+) -> PresentationResult:
     try:
-        prs.save(fp)
+        presentation, slide_deck, presentation_file = generate_presentation(
+            schema, slides, topic=topic, **generation_arguments
+        )
+        return PresentationResult(
+            topic, presentation, slide_deck, presentation_file, None
+        )
+    except Exception as e:
+        logger.exception("Could not generate presentation about {}".format(topic))
+        return PresentationResult(topic, None, None, None, e)
+
+
+def generate_presentations_using_cli_arguments(args, output=None):
+    """Makes a talk for every topic given on the command line, in a file or on standard input, and writes a JSON
+    line describing every finished talk to the output."""
+    if output is None:
+        output = sys.stdout
+
+    # The checks print their warnings, which should not end up between the JSON lines
+    with contextlib.redirect_stdout(sys.stderr):
+        runtime_checker.check_runtime_environment()
+
+    if args.topics:
+        _generate_presentations_for_topics(args, iter(args.topics), output)
+    elif args.topics_file and args.topics_file != "-":
+        # The topics are read while the talks are generated, so the file stays open until all of them are done
+        with open(args.topics_file, encoding="utf-8") as topics_file:
+            _generate_presentations_for_topics(args, _read_topics(topics_file), output)
+    else:
+        _generate_presentations_for_topics(args, _read_topics(sys.stdin), output)
+
+
+def _generate_presentations_for_topics(args, topics: Iterator[str], output):
+    save_ppt = args.output_format == "pptx"
+    generation_arguments = dict(
+        schema=args.schema,
+        slides=args.num_slides,
+        parallel=args.parallel,
+        engine=args.engine,
+        speculative_fanout=args.speculative_fanout,
+        deadline=args.deadline,
+        slide_deadline=args.slide_deadline,
+        save_ppt=save_ppt,
+        output_folder=args.output_folder,
+    )
+    if args.processes is not None and args.processes != 1:
+        from talkgenerator import farm
+
+        if args.print_logs:
+            os_util.show_logs(logger)
+        for result in farm.generate_presentations_in_processes(
+            topics, processes=args.processes or None, **generation_arguments
+        ):
+            line = {
+                "topic": result.topic,
+                "seconds": round(result.seconds, 3),
+                "worker": result.worker,
+            }
+            if result.error is not None:
+                line["error"] = result.error
+            elif save_ppt:
+                line["file"] = result.presentation_file
+            else:
+                line["slides"] = result.slides
+            _write_json_line(output, line)
+        return
+
+    for result in generate_presentations(
+        topics,
+        max_concurrent_decks=args.max_concurrent_decks,
+        int_seed=args.int_seed,
+        print_logs=args.print_logs,
+        **generation_arguments,
+    ):
+        line = {"topic": result.topic}
+        if result.error is not None:
+            line["error"] = str(result.error)
+        elif save_ppt:
+            line["file"] = result.presentation_file
+        else:
+            line["slides"] = result.slide_deck.to_slide_deck_dictionary()
+        _write_json_line(output, line)
+
+
+def _write_json_line(output, line: dict):
+    output.write(json.dumps(line, default=str) + "\n")
+    output.flush()
+
+
+def _read_topics(lines: Iterable[str]) -> Iterator[str]:
+    for line in lines:
+        topic = line.strip()
+        if topic:
+            yield topic
+
+
+def save_presentation_to_stream(prs, stream: BinaryIO) -> BinaryIO:
+    """Writes the talk to the given binary stream, such as a BytesIO, an open file or a network connection.
+    The stream does not need to be seekable."""
+    prs.save(stream)
+    return stream
+
+
+def presentation_to_bytes(prs) -> bytes:
+    return save_presentation_to_stream(prs, BytesIO()).getvalue()
+
+
+def save_presentation_to_pptx(output_folder: str, file_name: str, prs) -> Optional[str]:
+    """Save the talk to a new file in the output folder. If the file name is already taken, a random suffix is added
+    instead of probing numbered names one by one."""
+    # Create the output folder if it doesn't exist
+    pathlib.Path(output_folder).mkdir(parents=True, exist_ok=True)
+
+    suffix = ""
+    for _ in range(MAX_PRESENTATION_SAVE_TRIES):
+        fp: str = os.path.join(output_folder, str(file_name) + suffix + ".pptx")
+        suffix = "_" + uuid.uuid4().hex[:8]
+        try:
+            # Creating the file exclusively makes sure no other talk is written to it, even by other processes
+            file_descriptor = os.open(fp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+        except FileExistsError:
+            continue
+
+        try:
+            with os.fdopen(file_descriptor, "wb") as output_file:
+                save_presentation_to_stream(prs, output_file)
+        except Exception:
+            os.remove(fp)
+            raise
         logger.info("Saved talk to {}".format(fp))
         return fp
-    except PermissionError:
-        return save_presentation_to_pptx(output_folder, file_name, prs, index + 1)
+    logger.error(
+        "Could not save talk to {}: no free file name found for {} after {} tries".format(
+            output_folder, file_name, MAX_PRESENTATION_SAVE_TRIES
+        )
+    )
+    return None
 
 
 def _open_file(filename: str):
@@ -184,18 +403,7 @@ def get_argument_parser():
         type=int,
         help="Number of slides to create.",
     )
-    parser.add_argument(
-        "--int_seed",
-        default=None,
-        type=int,
-        help="Seed used for random.seed(int_seed). Fill in any number to add more consistency between runs.",
-    )
-    parser.add_argument(
-        "--schema",
-        default="default",
-        type=str,
-        help="The presentation schema to generate the presentation with",
-    )
+    _add_generation_arguments(parser)
     parser.add_argument(
         "--presenter",
         default=None,
@@ -209,36 +417,159 @@ def get_argument_parser():
         help="The title of the talk, leave blank to randomise",
     )
     parser.add_argument(
-        "--parallel",
+        "--print_logs",
         default=True,
         type=str2bool,
+        help="Print logs about the generation process.",
+    )
+    parser.add_argument(
+        "--save_ppt",
+        default=True,
+        type=str2bool,
+        help="If this flag is true, the generated powerpoint will be saved",
+    )
+    parser.add_argument(
+        "--open_ppt",
+        default=True,
+        type=str2bool,
+        help="Generated powerpoint will automatically open",
+    )
+    parser.add_argument(
+        "--profile_startup",
+        "--profile-startup",
+        nargs="?",
+        const=True,
+        default=False,
+        type=str2bool,
+        help="Report the time and memory spent on imports, grammars, runtime checks, schemas and generating the slides",
+    )
+    _add_trace_file_argument(parser)
+    return parser
+
+
+def get_batch_argument_parser():
+    parser = argparse.ArgumentParser(
+        description="Build a slide deck for every topic, several at once."
+    )
+    parser.add_argument(
+        "topics",
+        nargs="*",
+        help="Topics to make a talk about, comma separated for talks about several topics",
+    )
+    parser.add_argument(
+        "--topics_file",
+        default=None,
+        type=str,
+        help="File with a topic on every line, used if no topics are given. Defaults to standard input",
+    )
+    parser.add_argument(
+        "--num_slides",
+        "--slides",
+        default=10,
+        type=int,
+        help="Number of slides to create in every talk.",
+    )
+    parser.add_argument(
+        "--max_concurrent_decks",
+        default=None,
+        type=int,
+        help="Number of talks generated at once, defaults to the MAX_CONCURRENT_DECKS setting",
+    )
+    parser.add_argument(
+        "--processes",
+        default=None,
+        type=int,
         help=(
-            "Generated powerpoint will generate in parallel "
-            + "faster but drops some conditions)"
+            "Generate the talks in this many worker processes, sharing the caches on disk. "
+            + "0 starts one per core (or FARM_PROCESSES), and by default the talks are generated in this process"
         ),
     )
+    parser.add_argument(
+        "--output_format",
+        default="pptx",
+        choices=["pptx", "json"],
+        help="Save every talk as a pptx file in the output folder, or print its slides as JSON",
+    )
+    _add_generation_arguments(parser)
     parser.add_argument(
         "--print_logs",
-        default=True,
+        default=False,
         type=str2bool,
         help="Print logs about the generation process.",
     )
+    _add_trace_file_argument(parser)
+    return parser
+
+
+def _add_trace_file_argument(parser: argparse.ArgumentParser):
     parser.add_argument(
-        "--output_folder",
-        default="../output/",
+        "--trace_file",
+        "--trace-file",
+        default=None,
         type=str,
-        help="The folder to output the generated presentations",
+        help=(
+            "Write a trace of the time spent on every deck, slide, generator and source call to this file: "
+            + "in the Chrome trace format if it ends in .json, and as JSON lines otherwise"
+        ),
     )
+
+
+def _add_generation_arguments(parser: argparse.ArgumentParser):
+    """Adds the arguments shared by the command lines for a single talk and for a batch of talks"""
     parser.add_argument(
-        "--save_ppt",
-        default=True,
-        type=str2bool,
-        help="If this flag is true, the generated powerpoint will be saved",
+        "--int_seed",
+        default=None,
+        type=int,
+        help="Seed used for random.seed(int_seed). Fill in any number to add more consistency between runs.",
     )
     parser.add_argument(
-        "--open_ppt",
+        "--schema",
+        default="default",
+        type=str,
+        help="The presentation schema to generate the presentation with",
+    )
+    parser.add_argument(
+        "--parallel",
         default=True,
         type=str2bool,
-        help="Generated powerpoint will automatically open",
+        help=(
+            "Generated powerpoint will generate in parallel "
+            + "faster but drops some conditions)"
+        ),
+    )
+    parser.add_argument(
+        "--engine",
+        default=None,
+        choices=["serial", "parallel"],
+        help=(
+            "The engine to generate the slides with. "
+            + "Defaults to 'parallel' or 'serial' depending on the parallel flag"
+        ),
+    )
+    parser.add_argument(
+        "--speculative_fanout",
+        default=1,
+        type=int,
+        help=(
+            "Number of candidate generators racing for every slide in the parallel engine. "
+            + "Higher values make more API calls, but are less affected by slow sources"
+        ),
+    )
+    parser.add_argument(
+        "--deadline",
+        default=None,
+        type=float,
+        help="Time budget in seconds for generating all slides, after which slides fall back to offline content",
+    )
+    parser.add_argument(
+        "--slide_deadline",
+        default=None,
+        type=float,
+        help="Time budget in seconds for generating a single slide",
+    )
+    parser.add_argument(
+        "--output_folder",
+        default="../output/",
+        type=str,
+        help="The folder to output the generated presentations",
     )
-    return parser
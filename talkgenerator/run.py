@@ -1,17 +1,66 @@
-from talkgenerator import generator
+import contextlib
+import sys
+
+from talkgenerator.util import profiling_util, tracing_util
+
+PROFILE_STARTUP_FLAGS = ("--profile_startup", "--profile-startup")
 
 
 def main(args):
     """Main run method for command line talk generation."""
-    presentations, slide_deck, output_file = generator.generate_presentation_using_cli_arguments(
-        args
-    )
+    from talkgenerator import generator
+
+    with _tracing(args.trace_file):
+        presentations, slide_deck, output_file = (
+            generator.generate_presentation_using_cli_arguments(args)
+        )
 
 
 def main_cli():
+    if sys.argv[1:2] == ["serve"]:
+        main_serve_cli(sys.argv[2:])
+        return
+
+    # Profiling has to start before the generator is imported, so the flag is looked for before parsing arguments
+    if any(arg.split("=")[0] in PROFILE_STARTUP_FLAGS for arg in sys.argv[1:]):
+        profiling_util.start_profiling()
+
+    from talkgenerator import generator
+
     args = generator.get_argument_parser().parse_args()
+    if not args.profile_startup:
+        profiling_util.stop_profiling()
     main(args)
 
 
+def main_serve_cli(arguments=None):
+    """Command line for serving talks over HTTP, as `talkgenerator serve`."""
+    from talkgenerator import server
+
+    server.main(server.get_serve_argument_parser().parse_args(arguments))
+
+
+def main_batch_cli():
+    """Command line for generating a talk for every given topic, several at once."""
+    from talkgenerator import generator
+
+    args = generator.get_batch_argument_parser().parse_args()
+    with _tracing(args.trace_file):
+        generator.generate_presentations_using_cli_arguments(args)
+
+
+@contextlib.contextmanager
+def _tracing(trace_file):
+    """Traces the enclosed block to the given file, if there is one."""
+    if not trace_file:
+        yield
+        return
+    tracing_util.start_tracing()
+    try:
+        yield
+    finally:
+        tracing_util.write_trace(trace_file)
+
+
 if __name__ == "__main__":
     main_cli()
@@ -2,16 +2,19 @@ import logging
 
 import talkgenerator.settings
 import talkgenerator.util.language_util
+from talkgenerator.util import profiling_util
 
 logger = logging.getLogger("talkgenerator")
 
 
 def check_runtime_environment():
-    check_env = talkgenerator.settings.check_environment_variables()
+    with profiling_util.profile("runtime check", "environment variables"):
+        check_env = talkgenerator.settings.check_environment_variables()
     if check_env:
         logger.info("Successful check: Environment variables")
 
-    check_ntlk = talkgenerator.util.language_util.check_and_download()
+    with profiling_util.profile("runtime check", "NLTK dictionaries"):
+        check_ntlk = talkgenerator.util.language_util.check_and_download()
     if check_ntlk:
         logger.info("Successful check: NLTK Dictionaries available")
 
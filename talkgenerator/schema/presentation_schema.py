@@ -5,25 +5,36 @@ and slide generators, that have functions for generating slides
 along with some other metadata.
 """
 import time
+import contextvars
 import logging
-import multiprocessing
-from multiprocessing.pool import ThreadPool
-multiprocessing.set_start_method('spawn')
+import threading
+from concurrent.futures import Executor, FIRST_COMPLETED, wait
 import random
 from typing import List, Collection, Callable, Dict, Union, Optional, Tuple
 
 from pptx import Presentation
 
+from talkgenerator import settings
 from talkgenerator.datastructures.image_data import ImageData
 from talkgenerator.schema.slide_topic_generators import SlideSeedGenerator
 from talkgenerator.datastructures.slide_generator_data import _filter_generated_elements
 from talkgenerator.datastructures.slide_generator_data import SlideGeneratorData
 from talkgenerator.slide import slide_generator_types
 from talkgenerator.slide.slide_deck import SlideDeck
-from talkgenerator.util import random_util
+from talkgenerator.util import random_util, concurrency_util, deadline_util
+from talkgenerator.util import image_hash_util, tracing_util
+from talkgenerator.util.deadline_util import Deadline
+from talkgenerator.util.image_hash_util import ImageHashIndex
 
 logger = logging.getLogger("talkgenerator")
 
+ENGINES = ("serial", "parallel")
+
+# How many times a slide can still be regenerated after the deck deadline passed
+_MAX_ATTEMPTS_AFTER_DEADLINE = 2
+# Number of times the serial engine generates a slide before adding it despite being rejected
+_MAX_SERIAL_ATTEMPTS = 3
+
 
 class PresentationSchema:
     """ Class responsible for determining which slide generators to use in a presentation,
@@ -37,6 +48,8 @@ class PresentationSchema:
         slide_generators: List[SlideGeneratorData],
         max_allowed_tags=None,
         ignore_weights=False,
+        executor: Executor = None,
+        deadline_fallback_generators: List[SlideGeneratorData] = None,
     ):
         self._powerpoint_creator = powerpoint_creator
         self._seed_generator = seed_generator
@@ -46,6 +59,20 @@ class PresentationSchema:
         self._max_allowed_tags = max_allowed_tags
         self._ignore_weights = ignore_weights
         self._title_generator = title_generator
+        self._executor = executor
+        # Cheap, offline generators used once the deadline of a slide is nearly passed
+        if deadline_fallback_generators is None:
+            deadline_fallback_generators = []
+        self._deadline_fallback_generators = deadline_fallback_generators
+
+    def get_executor(self) -> Executor:
+        """ The executor generating slides in parallel, which is reused for every round and every deck.
+        Unless one was given, this is the executor shared by all schemas in the process """
+        if self._executor is None:
+            return concurrency_util.get_executor(
+                "slides", settings.generation_settings()["max_workers"]
+            )
+        return self._executor
 
     def generate_presentation(
         self,
@@ -56,8 +83,25 @@ class PresentationSchema:
         parallel: bool = False,
         int_seed: int = None,
         save_ppt: bool = True,
+        engine: str = None,
+        executor: Executor = None,
+        speculative_fanout: int = 1,
+        deadline: float = None,
+        slide_deadline: float = None,
     ) -> Tuple[Presentation, SlideDeck]:
-        """Generate a presentation about a certain topic with a certain number of slides"""
+        """Generate a presentation about a certain topic with a certain number of slides.
+        The engine is either 'serial' or 'parallel' (on the pooled threads of the executor), and defaults to
+        'parallel' or 'serial' depending on the parallel flag. The executor overrides the executor of the schema for this deck.
+        The parallel engine races speculative_fanout candidate generators for every slide.
+        The deadline and slide_deadline are time budgets in seconds for the whole deck and for every slide.
+        Close to these deadlines, slides are generated with the offline fallback generators, and slides that are
+        still missing after the deck deadline are left out."""
+        if executor is None:
+            executor = self.get_executor()
+        if engine is None:
+            engine = "parallel" if parallel else "serial"
+        if engine not in ENGINES:
+            raise ValueError("Unknown generation engine: {}".format(engine))
 
         logger.info('Made it to presentation_schema...')
         # Generate random talk title
@@ -82,13 +126,17 @@ class PresentationSchema:
             "topics": topics,
             "presenter": presenter,
             "title": title,
+            # Perceptual hashes of the images in the deck, to avoid images looking like each other
+            "image_hashes": ImageHashIndex(),
         }
+        if deadline is not None:
+            main_presentation_context["deadline"] = Deadline(deadline)
 
         used_tags = {}
         used_elements = set()
 
         # Generate
-        if parallel:
+        if engine == "parallel":
             self._generate_slide_deck_parallel(
                 slide_deck,
                 num_slides,
@@ -97,6 +145,9 @@ class PresentationSchema:
                 used_elements,
                 used_tags,
                 int_seed,
+                executor,
+                speculative_fanout,
+                slide_deadline,
             )
         else:
             self._generate_slide_deck(
@@ -107,11 +158,13 @@ class PresentationSchema:
                 used_elements,
                 used_tags,
                 int_seed,
+                slide_deadline,
             )
 
         if save_ppt:
-            presentation = self._powerpoint_creator()
-            slide_deck.save_to_powerpoint(presentation)
+            with tracing_util.span("save to powerpoint", tracing_util.RENDER):
+                presentation = self._powerpoint_creator()
+                slide_deck.save_to_powerpoint(presentation)
             return presentation, slide_deck
 
         return None, slide_deck
@@ -125,63 +178,163 @@ class PresentationSchema:
         used_elements,
         used_tags: Dict[str, int],
         int_seed: int,
+        executor: Executor,
+        speculative_fanout: int = 1,
+        slide_deadline: float = None,
     ):
+        """ Generates all slides concurrently, committing every result as soon as it is finished.
+        Only slides violating the constraints are resubmitted, using the prohibitions of that moment.
+        With a speculative fanout above one, several candidate generators race for every slide, and the first
+        valid result wins """
         logger.info("Generating the slide deck in parallel")
-        slide_nrs_to_generate = range(num_slides)
-
-        generated_results = [None] * num_slides
-
-        while len(slide_nrs_to_generate) > 0:
-            if len(slide_nrs_to_generate) < num_slides:
-                logger.info(
-                    "Regenerating the following slides: " + str(slide_nrs_to_generate)
+        attempts = [0] * num_slides
+        late_attempts = [0] * num_slides
+        cancel_events = [None] * num_slides
+        futures = {}
+
+        def submit(slide_nr):
+            cancel_events[slide_nr] = threading.Event()
+            for slide_generator_context in self._create_slide_generator_contexts(
+                slide_nr,
+                main_presentation_context,
+                seed_generator,
+                num_slides,
+                used_elements,
+                used_tags,
+                int_seed,
+                attempts[slide_nr],
+                speculative_fanout,
+                cancel_events[slide_nr],
+                slide_deadline,
+            ):
+                # The slide is generated in the context of the deck, e.g. to trace it as part of the deck
+                future = executor.submit(
+                    contextvars.copy_context().run, slide_generator_context, slide_nr
                 )
+                futures[future] = slide_nr
 
-            with ThreadPool(processes=num_slides) as pool:
-                all_slide_results = pool.map(
-                    SlideGeneratorContext(
-                        presentation_schema=self,  # reference the enclosing presentation schema
-                        presentation_context=main_presentation_context,
-                        seed_generator=seed_generator,
-                        num_slides=num_slides,
-                        used_elements=used_elements,
-                        prohibited_generators=self._calculate_prohibited_generators(
-                            used_tags, num_slides
-                        ),
-                        int_seed=int_seed,
-                    ),
-                    slide_nrs_to_generate,
-                )
-                slide_nrs_to_generate = []
-                for slide_result in all_slide_results:
-                    if slide_result:
-                        (
-                            slide,
-                            generated_elements,
-                            slide_generator_data,
-                            slide_nr,
-                        ) = slide_result
-                        generated_results[slide_nr] = slide_result
-
-            # Check Constraints
-
-            for i in range(num_slides):
-                if not slide_deck.has_slide_nr(i):
-                    if not generated_results[i]:
-                        slide_nrs_to_generate.append(i)
-                    else:
-                        success = self._update_slide_deck_with_generated_result(
-                            slide_deck,
-                            generated_results[i],
-                            used_elements,
-                            used_tags,
-                            num_slides,
-                        )
-                        if not success:
-                            slide_nrs_to_generate.append(i)
+        for slide_nr in range(num_slides):
+            submit(slide_nr)
+
+        while len(futures) > 0:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future not in futures:
+                    # Candidate lost the race from a candidate finishing in the same batch
+                    continue
+                slide_nr = futures.pop(future)
+                if self._commit_generated_result(
+                    slide_deck,
+                    future.result(),
+                    used_elements,
+                    used_tags,
+                    num_slides,
+                    main_presentation_context["image_hashes"],
+                ):
+                    # Cancel all other candidates for this slide
+                    cancel_events[slide_nr].set()
+                    for other_future in _get_keys_with_value(futures, slide_nr):
+                        other_future.cancel()
+                        futures.pop(other_future)
+                elif slide_nr not in futures.values() and _can_regenerate(
+                    main_presentation_context, slide_nr, late_attempts
+                ):
+                    attempts[slide_nr] += 1
+                    logger.info("Regenerating slide {}".format(slide_nr + 1))
+                    submit(slide_nr)
 
         return slide_deck
 
+    def _create_slide_generator_contexts(
+        self,
+        slide_nr: int,
+        main_presentation_context,
+        seed_generator: SlideSeedGenerator,
+        num_slides: int,
+        used_elements,
+        used_tags: Dict[str, int],
+        int_seed: Optional[int],
+        attempt: int,
+        speculative_fanout: int,
+        cancel_event: threading.Event,
+        slide_deadline: Optional[float],
+    ) -> List["SlideGeneratorContext"]:
+        """ Creates a context for every candidate that should try to generate the given slide """
+        # Retries get a different seed, otherwise they would generate the same rejected slide
+        if int_seed is not None:
+            int_seed += attempt * num_slides
+        prohibited_generators = self._calculate_prohibited_generators(
+            used_tags, num_slides
+        )
+        if speculative_fanout > 1:
+            candidate_generators = self._select_candidate_generators(
+                slide_nr, num_slides, prohibited_generators, speculative_fanout
+            )
+        else:
+            # Let the slide select its own generator, as it always did
+            candidate_generators = [None]
+
+        return [
+            SlideGeneratorContext(
+                presentation_schema=self,  # reference the enclosing presentation schema
+                presentation_context=main_presentation_context,
+                seed_generator=seed_generator,
+                num_slides=num_slides,
+                # Copied, as results of other slides are committed while this one is generating
+                used_elements=set(used_elements),
+                prohibited_generators=set(prohibited_generators),
+                int_seed=int_seed,
+                slide_generator=candidate_generator,
+                cancel_event=cancel_event,
+                slide_deadline=slide_deadline,
+            )
+            for candidate_generator in candidate_generators
+        ]
+
+    def _select_candidate_generators(
+        self, slide_nr, num_slides, prohibited_generators, amount
+    ) -> List[SlideGeneratorData]:
+        """ Selects up to the given amount of different generators with a positive weight for the slide number """
+        candidates = []
+        excluded = set(prohibited_generators)
+        while len(candidates) < amount:
+            try:
+                generator = self._select_generator(slide_nr, num_slides, excluded)
+            except ValueError:
+                break
+            if (
+                generator is None
+                or generator in excluded
+                or (candidates and generator.get_weight_for(slide_nr, num_slides) <= 0)
+            ):
+                break
+            candidates.append(generator)
+            excluded.add(generator)
+        if len(candidates) == 0:
+            raise ValueError("No generators left to generate slides with!")
+        return candidates
+
+    def _commit_generated_result(
+        self,
+        slide_deck,
+        generated_result,
+        used_elements,
+        used_tags,
+        num_slides,
+        image_hashes: ImageHashIndex = None,
+    ) -> bool:
+        """ Adds the generated result to the slide deck if it satisfies the constraints """
+        if not generated_result:
+            return False
+        return self._update_slide_deck_with_generated_result(
+            slide_deck,
+            generated_result,
+            used_elements,
+            used_tags,
+            num_slides,
+            image_hashes,
+        )
+
     def _generate_slide_deck(
         self,
         slide_deck,
@@ -191,49 +344,138 @@ class PresentationSchema:
         used_elements,
         used_tags,
         int_seed=None,
+        slide_deadline=None,
     ):
+        late_attempts = [0] * num_slides
         for slide_nr in range(num_slides):
             logger.debug('Generating slide: {}'.format(slide_nr))
-            # Generate the slide
-            slide_results = self.generate_slide(
-                presentation_context=create_slide_presentation_context(
-                    main_presentation_context, seed_generator.get_seed(slide_nr)
-                ),
-                slide_nr=slide_nr,
-                num_slides=num_slides,
-                used_elements=used_elements,
-                prohibited_generators=self._calculate_prohibited_generators(
-                    used_tags, num_slides
-                ),
-                int_seed=int_seed,
-            )
-
-            if slide_results:
-                success = self._update_slide_deck_with_generated_result(
-                    slide_deck, slide_results, used_elements, used_tags, num_slides
+            for attempt in range(_MAX_SERIAL_ATTEMPTS):
+                # Retries get a different seed, otherwise they would generate the same rejected slide
+                slide_seed = (
+                    int_seed + attempt * num_slides if int_seed is not None else None
+                )
+                slide_results = self.generate_slide(
+                    presentation_context=create_slide_presentation_context(
+                        main_presentation_context,
+                        seed_generator.get_seed(slide_nr),
+                        slide_deadline,
+                    ),
+                    slide_nr=slide_nr,
+                    num_slides=num_slides,
+                    used_elements=used_elements,
+                    prohibited_generators=self._calculate_prohibited_generators(
+                        used_tags, num_slides
+                    ),
+                    int_seed=slide_seed,
                 )
-                assert success
+                if not slide_results:
+                    break
+                # Slides can still be rejected here, e.g. when an image finished downloading and turned out to look
+                # like another image in the deck
+                if self._update_slide_deck_with_generated_result(
+                    slide_deck,
+                    slide_results,
+                    used_elements,
+                    used_tags,
+                    num_slides,
+                    main_presentation_context.get("image_hashes"),
+                ):
+                    break
+                if attempt + 1 == _MAX_SERIAL_ATTEMPTS:
+                    logger.warning(
+                        "Adding rejected slide {} anyway".format(slide_nr + 1)
+                    )
+                    self._add_to_slide_deck(
+                        slide_deck, slide_results, used_elements, used_tags
+                    )
+                elif not _can_regenerate(
+                    main_presentation_context, slide_nr, late_attempts
+                ):
+                    break
+                else:
+                    logger.info("Regenerating slide {}".format(slide_nr + 1))
 
         return slide_deck
 
+    def _add_to_slide_deck(
+        self,
+        slide_deck,
+        generated_result,
+        used_elements,
+        used_tags,
+        image_hashes: ImageHashIndex = None,
+    ):
+        slide, generated_elements, slide_generator_data, slide_nr = generated_result
+        slide_deck.add_slide(slide_nr, slide)
+        self._update_used_elements(
+            used_elements, used_tags, generated_elements, slide_generator_data
+        )
+        if image_hashes is not None:
+            image_hash_util.add_images(generated_elements, image_hashes)
+
     def _update_slide_deck_with_generated_result(
-        self, slide_deck, generated_result, used_elements, used_tags, num_slides
+        self,
+        slide_deck,
+        generated_result,
+        used_elements,
+        used_tags,
+        num_slides,
+        image_hashes: ImageHashIndex = None,
     ):
         slide, generated_elements, slide_generator_data, slide_nr = generated_result
+        rejection_reason = self._get_rejection_reason(
+            generated_elements,
+            slide_generator_data,
+            used_elements,
+            used_tags,
+            num_slides,
+            image_hashes,
+        )
+        if rejection_reason is None:
+            self._add_to_slide_deck(
+                slide_deck, generated_result, used_elements, used_tags, image_hashes
+            )
+            return True
+        logger.info(
+            "Rejected slide {} using {}: {}".format(
+                slide_nr + 1, slide_generator_data, rejection_reason
+            )
+        )
+        tracing_util.event(
+            "slide {} rejected".format(slide_nr + 1),
+            tracing_util.SLIDE,
+            generator=str(slide_generator_data),
+            reason=rejection_reason,
+        )
+        return False
+
+    def _get_rejection_reason(
+        self,
+        generated_elements,
+        slide_generator_data,
+        used_elements,
+        used_tags,
+        num_slides,
+        image_hashes: ImageHashIndex = None,
+    ) -> Optional[str]:
+        """ Why a generated slide can not be added to the deck, or None if it can """
         # Check if allowed according to repeated elements & slide type tags
-        if slide_generator_types.is_different_enough_for_allowed_repeated(
+        if not slide_generator_types.is_different_enough_for_allowed_repeated(
             generated_elements,
             used_elements,
             slide_generator_data.get_allowed_repeated_elements(),
-        ) and slide_generator_data not in self._calculate_prohibited_generators(
+        ):
+            return "repeated elements"
+        if slide_generator_data in self._calculate_prohibited_generators(
             used_tags, num_slides
         ):
-            slide_deck.add_slide(slide_nr, slide)
-            self._update_used_elements(
-                used_elements, used_tags, generated_elements, slide_generator_data
-            )
-            return True
-        return False
+            return "too many slides with its tags"
+        # Slides generated at the same time might have chosen images looking the same
+        if image_hashes is not None and image_hash_util.has_duplicate_images(
+            generated_elements, image_hashes
+        ):
+            return "duplicate image"
+        return None
 
     @classmethod
     def _update_used_elements(
@@ -255,17 +497,76 @@ class PresentationSchema:
         used_elements=None,
         prohibited_generators=None,
         int_seed=None,
+        slide_generator: SlideGeneratorData = None,
+        cancel_event: threading.Event = None,
+    ):
+        """ Generates a slide, starting with the given slide generator if there is one, and falling back to other
+        generators if it fails. Stops without a result once the cancel event is set. """
+        with tracing_util.span(
+            "slide {}".format(slide_nr + 1),
+            tracing_util.SLIDE,
+            seed=presentation_context.get("seed"),
+        ) as slide_span:
+            slide_result = self._generate_slide(
+                presentation_context,
+                slide_nr,
+                num_slides,
+                used_elements,
+                prohibited_generators,
+                int_seed,
+                slide_generator,
+                cancel_event,
+            )
+            slide_span.set_attribute(
+                "generator", str(slide_result[2]) if slide_result else None
+            )
+            return slide_result
+
+    def _generate_slide(
+        self,
+        presentation_context,
+        slide_nr,
+        num_slides,
+        used_elements=None,
+        prohibited_generators=None,
+        int_seed=None,
+        slide_generator: SlideGeneratorData = None,
+        cancel_event: threading.Event = None,
     ):
         logger.debug('presentation_schema.generate_slide: {}'.format(slide_nr))
         if int_seed is not None:
             random.seed(int_seed + slide_nr)
 
+        if cancel_event is not None and cancel_event.is_set():
+            logger.debug('Generating slide {} was cancelled'.format(slide_nr))
+            return None
+
         # Default arguments: avoid mutable defaults
         if prohibited_generators is None:
             prohibited_generators = set()
 
         # Select the slide generator to generate with
-        generator = self._select_generator(slide_nr, num_slides, prohibited_generators)
+        deadline = presentation_context.get("deadline")
+        generator = None
+        is_fallback = False
+        if deadline is not None and deadline.is_nearly_expired():
+            generator = self._select_deadline_fallback_generator(prohibited_generators)
+            is_fallback = generator is not None
+            if generator is None and deadline.is_expired():
+                logger.warning(
+                    "Deadline passed before generating slide {}".format(slide_nr + 1)
+                )
+                return None
+        if generator is None:
+            if (
+                slide_generator is not None
+                and slide_generator not in prohibited_generators
+            ):
+                generator = slide_generator
+            else:
+                generator = self._select_generator(
+                    slide_nr, num_slides, prohibited_generators
+                )
         logger.debug('Generator: {}'.format(generator))
 
         start_time = time.time()
@@ -275,7 +576,11 @@ class PresentationSchema:
                     slide_nr + 1, presentation_context["seed"], generator
                 )
             )
-            slide_result = generator.generate(presentation_context, used_elements)
+            with deadline_util.using(deadline), tracing_util.span(
+                str(generator), tracing_util.GENERATOR_ATTEMPT, fallback=is_fallback
+            ) as attempt_span:
+                slide_result = generator.generate(presentation_context, used_elements)
+                attempt_span.set_attribute("generated", bool(slide_result))
             logger.debug('Slide result: {}'.format(slide_result))
 
             # Try again if slide is None, and prohibit generator for generating for this topic
@@ -288,12 +593,13 @@ class PresentationSchema:
                 )
                 prohibited_generators.add(generator)
 
-                return self.generate_slide(
+                return self._generate_slide(
                     presentation_context=presentation_context,
                     slide_nr=slide_nr,
                     num_slides=num_slides,
                     used_elements=used_elements,
                     prohibited_generators=prohibited_generators,
+                    cancel_event=cancel_event,
                 )
 
             slide, generated_elements = slide_result
@@ -313,6 +619,17 @@ class PresentationSchema:
                 presentation_context["Presentation"],
             )
 
+    def _select_deadline_fallback_generator(
+        self, prohibited_generators
+    ) -> Optional[SlideGeneratorData]:
+        return random_util.choice_optional(
+            [
+                generator
+                for generator in self._deadline_fallback_generators
+                if generator not in prohibited_generators
+            ]
+        )
+
     def _select_generator(self, slide_nr, total_slides, prohibited_generators):
         """Select a generator for a certain slide number"""
         logging.debug('presentation_schema._select_generator self._slide_generators: {}'.format(
@@ -382,6 +699,9 @@ class SlideGeneratorContext(object):
         used_elements: Optional[Collection[Union[str, ImageData]]] = None,
         prohibited_generators: Optional[Collection[SlideGeneratorData]] = None,
         int_seed: Optional[int] = None,
+        slide_generator: Optional[SlideGeneratorData] = None,
+        cancel_event: Optional[threading.Event] = None,
+        slide_deadline: Optional[float] = None,
     ):
         self.presentation_schema = presentation_schema
         self.presentation_context = presentation_context
@@ -390,6 +710,9 @@ class SlideGeneratorContext(object):
         self.used_elements = used_elements
         self.prohibited_generators = prohibited_generators
         self.int_seed = int_seed
+        self.slide_generator = slide_generator
+        self.cancel_event = cancel_event
+        self.slide_deadline = slide_deadline
 
     def __call__(self, slide_nr):
         if self and self.int_seed and self.int_seed is not None:
@@ -399,23 +722,48 @@ class SlideGeneratorContext(object):
             # presentation_context=dict(),
             create_slide_presentation_context(
                 self.presentation_context,
-                self.seed_generator.get_seed(slide_nr)
-                # 'cat'
+                self.seed_generator.get_seed(slide_nr),
+                self.slide_deadline,
             ),
             slide_nr=slide_nr,
             num_slides=self.num_slides,
             used_elements=self.used_elements,
             prohibited_generators=self.prohibited_generators,
+            slide_generator=self.slide_generator,
+            cancel_event=self.cancel_event,
         )
 
 
 # Helper functions
-def create_slide_presentation_context(main_presentation_context, seed):
+def create_slide_presentation_context(
+    main_presentation_context, seed, slide_deadline: float = None
+):
     presentation_context = dict(main_presentation_context)
     presentation_context["seed"] = seed
+    if slide_deadline is not None:
+        presentation_context["deadline"] = Deadline.earliest(
+            main_presentation_context.get("deadline"), Deadline(slide_deadline)
+        )
     return presentation_context
 
 
+def _can_regenerate(main_presentation_context, slide_nr, late_attempts) -> bool:
+    """ Whether a slide can be generated again, which is only a few more times once the deck deadline passed """
+    deadline = main_presentation_context.get("deadline")
+    if deadline is not None and deadline.is_expired():
+        late_attempts[slide_nr] += 1
+        if late_attempts[slide_nr] > _MAX_ATTEMPTS_AFTER_DEADLINE:
+            logger.warning(
+                "Leaving out slide {} as the deck deadline passed".format(slide_nr + 1)
+            )
+            return False
+    return True
+
+
+def _get_keys_with_value(dictionary, value):
+    return [key for key, key_value in dictionary.items() if key_value == value]
+
+
 def add_tags(used_tags, tags):
     for tag in tags:
         if tag not in used_tags:
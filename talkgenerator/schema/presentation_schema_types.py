@@ -1,3 +1,6 @@
+import threading
+from typing import Callable, Dict, List
+
 from talkgenerator.schema.slide_schemas import *
 from talkgenerator.schema import slide_topic_generators
 from talkgenerator.schema.presentation_schema import PresentationSchema
@@ -10,107 +13,161 @@ from talkgenerator.slide import slide_generator_types
 # =====  PRESENTATION SCHEMAS  =====
 # ==================================
 
+# Schemas are built by their factory on first request, such that only the slide generators they use get created
+
 
 # This object holds all the information about how to generate the presentation
-presentation_schema = PresentationSchema(
-    # Basic powerpoint generator
-    powerpoint_creator=powerpoint_slide_creator.create_new_powerpoint,
-    # Topic per slide generator
-    seed_generator=slide_topic_generators.SideTrackingTopicGenerator,
-    # Title of the presentation
-    title_generator=talk_title_generator,
-    # Slide generators
-    slide_generators=all_slide_generators,
-    # Max tags
-    max_allowed_tags=default_max_allowed_tags,
-)
+def create_default_schema() -> PresentationSchema:
+    return PresentationSchema(
+        # Basic powerpoint generator
+        powerpoint_creator=powerpoint_slide_creator.create_new_powerpoint,
+        # Topic per slide generator
+        seed_generator=slide_topic_generators.SideTrackingTopicGenerator,
+        # Title of the presentation
+        title_generator=talk_title_generator,
+        # Offline slide generators for when the deadline is nearly passed
+        deadline_fallback_generators=get_deadline_fallback_slide_generators(),
+        # Slide generators
+        slide_generators=get_all_slide_generators(),
+        # Max tags
+        max_allowed_tags=default_max_allowed_tags,
+    )
+
 
 # Interview schema: Disallow about_me slides
-interview_max_allowed_tags = default_max_allowed_tags.copy()
-interview_max_allowed_tags["about_me"] = 0
-
-interview_schema = PresentationSchema(
-    # Basic powerpoint generator
-    powerpoint_creator=powerpoint_slide_creator.create_new_powerpoint,
-    # Topic per slide generator
-    seed_generator=slide_topic_generators.SideTrackingTopicGenerator,
-    # Title of the presentation
-    title_generator=talk_title_generator,
-    # Slide generators
-    slide_generators=all_slide_generators,
-    # Max tags
-    max_allowed_tags=interview_max_allowed_tags,
-)
+def create_interview_schema() -> PresentationSchema:
+    interview_max_allowed_tags = default_max_allowed_tags.copy()
+    interview_max_allowed_tags["about_me"] = 0
 
-# Test schema: for testing purposes
+    return PresentationSchema(
+        # Basic powerpoint generator
+        powerpoint_creator=powerpoint_slide_creator.create_new_powerpoint,
+        # Topic per slide generator
+        seed_generator=slide_topic_generators.SideTrackingTopicGenerator,
+        # Title of the presentation
+        title_generator=talk_title_generator,
+        # Offline slide generators for when the deadline is nearly passed
+        deadline_fallback_generators=get_deadline_fallback_slide_generators(),
+        # Slide generators
+        slide_generators=get_all_slide_generators(),
+        # Max tags
+        max_allowed_tags=interview_max_allowed_tags,
+    )
 
-test_schema = PresentationSchema(
-    # Basic powerpoint generator
-    powerpoint_slide_creator.create_new_powerpoint,
-    # Title of the presentation
-    title_generator=talk_title_generator,
-    # Topic per slide generator
-    # seed_generator=slide_topic_generators.SideTrackingTopicGenerator,
-    seed_generator=slide_topic_generators.IdentityTopicGenerator,
-    # Slide generators
-    slide_generators=title_slide_generators
-    + [
-        SlideGeneratorData(
-            # slide_templates.generate_image_slide(
-            slide_generator_types.ImageSlideGenerator.of(
-                inspiration_title_generator, generate_unsplash_image
-            ),
-            weight_function=ConstantWeightFunction(8),
-            allowed_repeated_elements=10,
-            name="Test sourcing",
-        )
-    ],
-    # ignore_weights=True,
-)
+
+# Test schema: for testing purposes
+def create_test_schema() -> PresentationSchema:
+    return PresentationSchema(
+        # Basic powerpoint generator
+        powerpoint_slide_creator.create_new_powerpoint,
+        # Title of the presentation
+        title_generator=talk_title_generator,
+        # Topic per slide generator
+        # seed_generator=slide_topic_generators.SideTrackingTopicGenerator,
+        seed_generator=slide_topic_generators.IdentityTopicGenerator,
+        # Offline slide generators for when the deadline is nearly passed
+        deadline_fallback_generators=get_deadline_fallback_slide_generators(),
+        # Slide generators
+        slide_generators=get_title_slide_generators()
+        + [
+            SlideGeneratorData(
+                # slide_templates.generate_image_slide(
+                slide_generator_types.ImageSlideGenerator.of(
+                    inspiration_title_generator, generate_unsplash_image
+                ),
+                weight_function=ConstantWeightFunction(8),
+                allowed_repeated_elements=10,
+                name="Test sourcing",
+            )
+        ],
+        # ignore_weights=True,
+    )
 
 
 # TED schema: using only images from approved sources
-ted_schema = PresentationSchema(
-    # Basic powerpoint generator
-    powerpoint_creator=powerpoint_slide_creator.create_new_powerpoint,
-    # Topic per slide generator
-    seed_generator=slide_topic_generators.SideTrackingTopicGenerator,
-    # Title of the presentation
-    title_generator=talk_ted_title_generator,
-    # Slide generators
-    slide_generators=title_slide_generators
-    + history_slide_generators_copyright_free
-    + single_image_slide_generators_copyright_free
-    + statement_slide_generators_copyright_free
-    + captioned_images_slide_generators_copyright_free
-    + own_chart_generators
-    + conclusion_slide_generators_copyright_free,
-    # Max tags
-    max_allowed_tags={
-        # Absolute maxima
-        "title": 1,
-        "history": 1,
-        "anecdote": 1,
-        "location_chart": 1,
-        "chart": 1,
-        "deep": 2,
-        # Relative (procentual) maxima
-        "two_captions": 0.3,
-        "three_captions": 0.2,
-        "multi_captions": 0.3,
-        "gif": 0.5,
-        "quote": 0.2,
-        "statement": 0.2,
-    },
-)
-
-schemas = {
-    "default": presentation_schema,
-    "interview": interview_schema,
-    "test": test_schema,
-    "ted": ted_schema,
+def create_ted_schema() -> PresentationSchema:
+    return PresentationSchema(
+        # Basic powerpoint generator
+        powerpoint_creator=powerpoint_slide_creator.create_new_powerpoint,
+        # Topic per slide generator
+        seed_generator=slide_topic_generators.SideTrackingTopicGenerator,
+        # Title of the presentation
+        title_generator=talk_ted_title_generator,
+        # Offline slide generators for when the deadline is nearly passed
+        deadline_fallback_generators=get_deadline_fallback_slide_generators(),
+        # Slide generators
+        slide_generators=get_title_slide_generators()
+        + get_history_slide_generators_copyright_free()
+        + get_single_image_slide_generators_copyright_free()
+        + get_statement_slide_generators_copyright_free()
+        + get_captioned_images_slide_generators_copyright_free()
+        + get_own_chart_generators()
+        + get_conclusion_slide_generators_copyright_free(),
+        # Max tags
+        max_allowed_tags={
+            # Absolute maxima
+            "title": 1,
+            "history": 1,
+            "anecdote": 1,
+            "location_chart": 1,
+            "chart": 1,
+            "deep": 2,
+            # Relative (procentual) maxima
+            "two_captions": 0.3,
+            "three_captions": 0.2,
+            "multi_captions": 0.3,
+            "gif": 0.5,
+            "quote": 0.2,
+            "statement": 0.2,
+        },
+    )
+
+
+_schema_factories: Dict[str, Callable[[], PresentationSchema]] = {
+    "default": create_default_schema,
+    "interview": create_interview_schema,
+    "test": create_test_schema,
+    "ted": create_ted_schema,
 }
+_schemas: Dict[str, PresentationSchema] = {}
+# Re-entrant, such that a factory can build upon another registered schema
+_schemas_lock = threading.RLock()
+
+
+def register_schema(name: str, factory: Callable[[], PresentationSchema]):
+    """ Makes a schema available under the given name, built by the factory when it is first requested """
+    with _schemas_lock:
+        _schema_factories[name] = factory
+        _schemas.pop(name, None)
+
+
+def get_schema_names() -> List[str]:
+    return list(_schema_factories.keys())
 
 
 def get_schema(name):
-    return schemas[name]
+    with _schemas_lock:
+        schema = _schemas.get(name)
+        if schema is None:
+            schema = _schema_factories[name]()
+            _schemas[name] = schema
+        return schema
+
+
+# Backwards compatibility for the former module-level schemas
+_schema_attributes = {
+    "presentation_schema": "default",
+    "interview_schema": "interview",
+    "test_schema": "test",
+    "ted_schema": "ted",
+}
+
+
+def __getattr__(name):
+    if name in _schema_attributes:
+        return get_schema(_schema_attributes[name])
+    if name == "schemas":
+        return {
+            schema_name: get_schema(schema_name) for schema_name in get_schema_names()
+        }
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
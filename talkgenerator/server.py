@@ -0,0 +1,317 @@
+"""
+HTTP service generating talks, which keeps the schemas, grammars, NLTK data, connection pools and caches of the process
+warm between requests instead of paying for them on every command line run.
+
+POST /generate with a JSON object with a topic (and optionally slides, schema, title, presenter, deadline,
+slide_deadline and format) returns the pptx file, or its slides as JSON if the format is "json".
+GET /health and GET /metrics describe the state of the service.
+"""
+import argparse
+import json
+import logging
+import threading
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+from typing import Dict
+
+from talkgenerator import settings
+from talkgenerator.generator import str2bool
+from talkgenerator.util import os_util
+
+logger = logging.getLogger("talkgenerator")
+
+PPTX_CONTENT_TYPE = (
+    "application/vnd.openxmlformats-officedocument.presentationml.presentation"
+)
+_MAX_REQUEST_BYTES = 64 * 1024
+
+
+class BadRequestError(ValueError):
+    pass
+
+
+class ServerMetrics(object):
+    """ Counters of the requests handled by the server, safe to update from the request threads """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._started = time.time()
+        self._counters: Dict[str, float] = {
+            "requests": 0,
+            "generated": 0,
+            "rejected": 0,
+            "failed": 0,
+            "in_flight": 0,
+            "generation_seconds": 0.0,
+        }
+
+    def add(self, counter: str, value: float = 1):
+        with self._lock:
+            self._counters[counter] += value
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            metrics = dict(self._counters)
+        metrics["uptime_seconds"] = round(time.time() - self._started, 3)
+        metrics["generation_seconds"] = round(metrics["generation_seconds"], 3)
+        return metrics
+
+
+class TalkGeneratorServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, server_address, max_concurrent_requests: int, max_slides: int):
+        super().__init__(server_address, _RequestHandler)
+        self.max_slides = max_slides
+        self.metrics = ServerMetrics()
+        self.generation_slots = threading.BoundedSemaphore(max_concurrent_requests)
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    server: TalkGeneratorServer
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(HTTPStatus.OK, {"status": "ok"})
+        elif self.path == "/metrics":
+            self._send_json(HTTPStatus.OK, self.server.metrics.to_dict())
+        else:
+            self._send_json(HTTPStatus.NOT_FOUND, {"error": "Unknown path"})
+
+    def do_POST(self):
+        if self.path != "/generate":
+            self._send_json(HTTPStatus.NOT_FOUND, {"error": "Unknown path"})
+            return
+
+        metrics = self.server.metrics
+        metrics.add("requests")
+        try:
+            request = self._read_request()
+        except BadRequestError as e:
+            self._send_json(HTTPStatus.BAD_REQUEST, {"error": str(e)})
+            return
+
+        # Refusing requests right away tells a load balancer to try elsewhere, rather than queueing them here
+        if not self.server.generation_slots.acquire(blocking=False):
+            metrics.add("rejected")
+            self._send_json(
+                HTTPStatus.SERVICE_UNAVAILABLE,
+                {"error": "Too many talks are being generated"},
+                {"Retry-After": "1"},
+            )
+            return
+
+        metrics.add("in_flight")
+        start = time.perf_counter()
+        try:
+            content_type, body = _generate(request)
+        except Exception as e:
+            logger.exception("Could not generate a talk for {}".format(request))
+            metrics.add("failed")
+            self._send_json(HTTPStatus.INTERNAL_SERVER_ERROR, {"error": str(e)})
+            return
+        finally:
+            metrics.add("in_flight", -1)
+            metrics.add("generation_seconds", time.perf_counter() - start)
+            self.server.generation_slots.release()
+
+        metrics.add("generated")
+        self._send(HTTPStatus.OK, content_type, body)
+
+    def _read_request(self) -> dict:
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+        except ValueError:
+            raise BadRequestError("Invalid Content-Length")
+        if length < 0:
+            raise BadRequestError("Invalid Content-Length")
+        if length > _MAX_REQUEST_BYTES:
+            raise BadRequestError("Request too large")
+        try:
+            request = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            raise BadRequestError("Request is not valid JSON")
+        if not isinstance(request, dict):
+            raise BadRequestError("Request should be a JSON object")
+        return parse_generation_request(request, self.server.max_slides)
+
+    def _send_json(self, status: HTTPStatus, content, headers: Dict[str, str] = None):
+        body = json.dumps(content, default=str).encode("utf-8")
+        self._send(status, "application/json", body, headers)
+
+    def _send(
+        self,
+        status: HTTPStatus,
+        content_type: str,
+        body: bytes,
+        headers: Dict[str, str] = None,
+    ):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, message_format, *args):
+        logger.info("%s - " + message_format, self.address_string(), *args)
+
+
+def parse_generation_request(request: dict, max_slides: int) -> dict:
+    """ Checks a request to generate a talk, and fills in the defaults of the arguments it doesn't give """
+    from talkgenerator.schema.presentation_schema_types import get_schema_names
+
+    topic = request.get("topic")
+    if isinstance(topic, list):
+        if not topic or not all(_is_text(part) for part in topic):
+            raise BadRequestError("A list of topics should only contain texts")
+    elif not _is_text(topic):
+        raise BadRequestError("A topic is required")
+    schema = request.get("schema", "default")
+    if schema not in get_schema_names():
+        raise BadRequestError("Unknown schema: {}".format(schema))
+    slides = request.get("slides", 10)
+    if not _is_integer(slides) or not 1 <= slides <= max_slides:
+        raise BadRequestError("slides should be between 1 and {}".format(max_slides))
+    for field in ["title", "presenter"]:
+        if request.get(field) is not None and not isinstance(request[field], str):
+            raise BadRequestError("{} should be a text".format(field))
+    output_format = request.get("format", "pptx")
+    if output_format not in ("pptx", "json"):
+        raise BadRequestError("format should be 'pptx' or 'json'")
+    deadline = request.get("deadline", settings.server_settings()["default_deadline"])
+    slide_deadline = request.get("slide_deadline")
+    for value in [deadline, slide_deadline]:
+        if value is not None and not (_is_number(value) and value > 0):
+            raise BadRequestError("Deadlines should be positive numbers of seconds")
+    # Requests are generated concurrently, sharing the random generator of the process, so seeding it would neither
+    # make a talk reproducible nor leave the other talks alone
+    if request.get("int_seed") is not None:
+        raise BadRequestError("int_seed is not supported by the server")
+
+    return {
+        "topic": topic,
+        "schema": schema,
+        "slides": slides,
+        "title": request.get("title"),
+        "presenter": request.get("presenter"),
+        "deadline": deadline,
+        "slide_deadline": slide_deadline,
+        "format": output_format,
+    }
+
+
+def _is_text(value) -> bool:
+    return isinstance(value, str) and bool(value.strip())
+
+
+def _is_integer(value) -> bool:
+    # Booleans are integers in Python, but not in JSON
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _is_number(value) -> bool:
+    return _is_integer(value) or isinstance(value, float)
+
+
+def _generate(request: dict):
+    """ Generates the requested talk, returning its content type and content """
+    from talkgenerator import generator
+
+    arguments = dict(request)
+    output_format = arguments.pop("format")
+    output_stream = BytesIO() if output_format == "pptx" else None
+    _, slide_deck, _ = generator.generate_presentation(
+        save_ppt=output_stream is not None,
+        output_stream=output_stream,
+        open_ppt=False,
+        **arguments
+    )
+    if output_stream is not None:
+        return PPTX_CONTENT_TYPE, output_stream.getvalue()
+    body = json.dumps(
+        {"slides": slide_deck.to_slide_deck_dictionary()}, default=str
+    ).encode("utf-8")
+    return "application/json", body
+
+
+def warm_up(schema: str = "default"):
+    """ Loads everything that would otherwise slow down the first request """
+    from talkgenerator import runtime_checker
+    from talkgenerator.schema.presentation_schema_types import get_schema
+    from talkgenerator.slide import powerpoint_slide_creator
+
+    runtime_checker.check_runtime_environment()
+    get_schema(schema)
+    powerpoint_slide_creator.create_new_powerpoint()
+
+
+def create_server(
+    host: str = None,
+    port: int = None,
+    max_concurrent_requests: int = None,
+    max_slides: int = None,
+) -> TalkGeneratorServer:
+    server_settings = settings.server_settings()
+    return TalkGeneratorServer(
+        (
+            host if host is not None else server_settings["host"],
+            port if port is not None else server_settings["port"],
+        ),
+        max_concurrent_requests or server_settings["max_concurrent_requests"],
+        max_slides or server_settings["max_slides"],
+    )
+
+
+def serve(
+    host: str = None,
+    port: int = None,
+    max_concurrent_requests: int = None,
+    warm: bool = True,
+):
+    """ Serves talks until interrupted """
+    if warm:
+        warm_up()
+    server = create_server(host, port, max_concurrent_requests)
+    logger.info("Serving talks on {}:{}".format(*server.server_address[:2]))
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+
+def main(args):
+    if args.print_logs:
+        os_util.show_logs(logger)
+    try:
+        serve(args.host, args.port, args.max_concurrent_requests)
+    except KeyboardInterrupt:
+        logger.info("Stopped serving talks")
+
+
+def get_serve_argument_parser():
+    parser = argparse.ArgumentParser(
+        prog="talkgenerator serve", description="Serve slide decks over HTTP."
+    )
+    parser.add_argument(
+        "--host", default=None, type=str, help="Address to listen on (SERVER_HOST)"
+    )
+    parser.add_argument(
+        "--port", default=None, type=int, help="Port to listen on (SERVER_PORT)"
+    )
+    parser.add_argument(
+        "--max_concurrent_requests",
+        default=None,
+        type=int,
+        help="Number of talks generated at once (SERVER_MAX_CONCURRENT_REQUESTS)",
+    )
+    parser.add_argument(
+        "--print_logs",
+        default=True,
+        type=str2bool,
+        help="Print logs about the requests and the generation process.",
+    )
+    return parser
@@ -1,4 +1,5 @@
 import logging
+import os
 from environs import Env
 
 
@@ -54,6 +55,97 @@ def pexels_auth():
     return {"pexels_key": env.str("PEXELS_KEY", "")}
 
 
+def cache_settings():
+    return {
+        "enabled": env.bool("CACHE_ENABLED", True),
+        "cache_dir": env.str(
+            "CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "talkgenerator")
+        ),
+        "memory_max_bytes": env.int("MEMORY_CACHE_MAX_BYTES", 64 * 1024 * 1024),
+        "redis_url": env.str("REDIS_URL", ""),
+    }
+
+
+def cache_ttl(source_name, default=None):
+    """ Time-to-live in seconds of the cache of the given source, e.g. set by CONCEPTNET_CACHE_TTL """
+    return env.float(source_name.upper() + "_CACHE_TTL", default)
+
+
+def generation_settings():
+    return {
+        "max_workers": env.int("GENERATION_WORKERS", 10),
+        # Number of decks generated at once by the batch mode, sharing the slide workers
+        "max_concurrent_decks": env.int("MAX_CONCURRENT_DECKS", 4),
+        # Number of worker processes generating decks in the batch mode, or 0 for one per core
+        "farm_processes": env.int("FARM_PROCESSES", 0),
+        # Seconds before a deadline at which only offline generators are still used
+        "deadline_margin": env.float("DEADLINE_MARGIN", 1.0),
+    }
+
+
+def image_settings():
+    return {
+        # Download images in the background as soon as they are chosen for a slide
+        "prefetch": env.bool("IMAGE_PREFETCH", True),
+        "prefetch_workers": env.int("IMAGE_PREFETCH_WORKERS", 8),
+        "prefetch_max_images": env.int("IMAGE_PREFETCH_MAX_IMAGES", 128),
+        "prefetch_max_bytes": env.int("IMAGE_PREFETCH_MAX_BYTES", 256 * 1024 * 1024),
+        # Content-addressed store of downloaded images, shared by all processes
+        "store": env.bool("IMAGE_STORE_ENABLED", True),
+        "store_dir": env.str(
+            "IMAGE_STORE_DIR", os.path.join(cache_settings()["cache_dir"], "images")
+        ),
+        "store_max_bytes": env.int("IMAGE_STORE_MAX_BYTES", 1024 * 1024 * 1024),
+        # Downscaling and recompressing images to the resolution they are shown at
+        "normalise": env.bool("IMAGE_NORMALISE", True),
+        "target_dpi": env.int("IMAGE_TARGET_DPI", 150),
+        "max_pixels": env.int("IMAGE_MAX_PIXELS", 1920 * 1080),
+        "jpeg_quality": env.int("IMAGE_JPEG_QUALITY", 85),
+        # Number of processes to normalise images in, or 0 to do it in the calling thread
+        "normalise_processes": env.int("IMAGE_NORMALISE_PROCESSES", 2),
+        # Number of threads preparing the images of a deck before its slides are added to the presentation
+        "render_workers": env.int("IMAGE_RENDER_WORKERS", 8),
+        # Checking whether chosen images can be downloaded before accepting them for a slide
+        "validate": env.bool("IMAGE_VALIDATE", True),
+        "validation_batch_size": env.int("IMAGE_VALIDATION_BATCH_SIZE", 3),
+        "validation_workers": env.int("IMAGE_VALIDATION_WORKERS", 4),
+        "max_download_bytes": env.int("IMAGE_MAX_DOWNLOAD_BYTES", 25 * 1024 * 1024),
+        # Rejecting removed-image placeholders and images looking like others in the deck
+        "check_duplicates": env.bool("IMAGE_CHECK_DUPLICATES", True),
+        # Maximum number of differing bits (of 64) between the perceptual hashes of images looking the same
+        "duplicate_distance": env.int("IMAGE_DUPLICATE_DISTANCE", 8),
+        # Seconds a slide waits for checking its images before accepting them unchecked
+        "check_timeout": env.float("IMAGE_CHECK_TIMEOUT", 2.0),
+    }
+
+
+def server_settings():
+    return {
+        "host": env.str("SERVER_HOST", "127.0.0.1"),
+        "port": env.int("SERVER_PORT", 8080),
+        # Requests generating at the same time, further requests are refused until one finishes
+        "max_concurrent_requests": env.int("SERVER_MAX_CONCURRENT_REQUESTS", 4),
+        "max_slides": env.int("SERVER_MAX_SLIDES", 50),
+        # Time budget in seconds for generating the slides of a request that doesn't set its own deadline
+        "default_deadline": env.float("SERVER_DEFAULT_DEADLINE", 60.0),
+    }
+
+
+def http_settings():
+    # Every generation and image prefetching worker can have a connection open to the same host
+    max_workers = (
+        generation_settings()["max_workers"] + image_settings()["prefetch_workers"]
+    )
+    return {
+        "connect_timeout": env.float("HTTP_CONNECT_TIMEOUT", 3.05),
+        "read_timeout": env.float("HTTP_READ_TIMEOUT", 10),
+        "retries": env.int("HTTP_RETRIES", 2),
+        "backoff_factor": env.float("HTTP_BACKOFF_FACTOR", 0.3),
+        "pool_connections": env.int("HTTP_POOL_CONNECTIONS", 20),
+        "pool_maxsize": env.int("HTTP_POOL_MAXSIZE", max(20, max_workers)),
+    }
+
+
 def _get_missing_keys(key_variables):
     missing = []
     for key_name in key_variables:
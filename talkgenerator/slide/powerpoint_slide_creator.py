@@ -1,20 +1,26 @@
+import contextvars
 import os
 import sys
 import logging
+import threading
 from functools import lru_cache
 from io import BytesIO
 from pathlib import Path
-from typing import List
+from typing import Dict, List, Optional, Tuple
+from weakref import WeakKeyDictionary
 
-import requests
 import PIL
 from PIL import Image
 from PIL import UnidentifiedImageError
 from lxml.etree import XMLSyntaxError
 from pptx import Presentation
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+from pptx.oxml.shapes.picture import CT_Picture
+from pptx.shapes.placeholder import PlaceholderPicture
 
+from talkgenerator import settings
 from talkgenerator.datastructures.image_data import ImageData
-from talkgenerator.util import os_util
+from talkgenerator.util import concurrency_util, os_util, image_util
 
 # Location of powerpoint template
 _POWERPOINT_TEMPLATE_FILE = "data/powerpoint/template.pptx"
@@ -27,6 +33,13 @@ def get_powerpoint_template_file():
     return os_util.to_actual_file(_POWERPOINT_TEMPLATE_FILE)
 
 
+@lru_cache(maxsize=1)
+def _get_template_bytes() -> bytes:
+    """ The content of the template, such that new presentations don't need to read it from disk """
+    with open(get_powerpoint_template_file(), "rb") as template_file:
+        return template_file.read()
+
+
 SOURCES_PLACEHOLDER = 10
 
 # Layouts index in template
@@ -49,12 +62,23 @@ LAYOUT_TITLE_AND_CHART = 16
 
 # = HELPERS =
 class FileLikeImage:
-    def get_file_like(self):
+    def get_file_like(self, placeholder_size=None):
+        """ Returns the image to insert, made fit for a placeholder of the given (width, height) in EMU if given """
         raise NotImplementedError()
 
     def image(self):
         raise NotImplementedError()
 
+    def size(self):
+        """ Returns the (width, height) of the image, read from its header if possible rather than decoding it """
+        raise NotImplementedError()
+
+    def _decoded_size(self):
+        open_image = self.image()
+        if open_image is None:
+            return None
+        return open_image.size
+
 
 class ExternalImage(FileLikeImage):
     def __init__(self, url):
@@ -62,12 +86,17 @@ class ExternalImage(FileLikeImage):
 
     @lru_cache()
     def get_bytes_io(self):
-        response = requests.get(self._url)
-        tmp_img = BytesIO(response.content)
-        return tmp_img
-
-    def get_file_like(self):
-        return self.get_bytes_io()
+        # Normally already downloaded by the prefetcher while the slides were being generated
+        image_bytes = image_util.get_image_bytes(self._url)
+        if image_bytes is None:
+            return BytesIO()
+        return BytesIO(image_bytes)
+
+    def get_file_like(self, placeholder_size=None):
+        content = self.get_bytes_io().getvalue()
+        if not content:
+            return self.get_bytes_io()
+        return BytesIO(image_util.normalise_for_placeholder(content, placeholder_size))
 
     def image(self):
         open_image = None
@@ -78,21 +107,130 @@ class ExternalImage(FileLikeImage):
             logging.error('PIL.UnidentifiedImageError')
         return open_image
 
+    @lru_cache()
+    def size(self):
+        return image_util.get_image_size(self._url) or self._decoded_size()
+
 
 class InternalImage(FileLikeImage):
     def __init__(self, file_location):
         self._file_location = file_location
 
-    def get_file_like(self):
+    def get_file_like(self, placeholder_size=None):
         return self._file_location
 
     def image(self):
-        return Image.open(self._file_location())
+        return Image.open(self._file_location)
+
+    def size(self):
+        return image_util.get_image_size(self._file_location) or self._decoded_size()
+
+
+class PreparedImage(FileLikeImage):
+    """ An image that is already downloaded and made fit for its placeholder, before adding the slide showing it """
+
+    def __init__(self, size: Tuple[int, int], content: bytes):
+        self._size = size
+        self._content = content
+
+    def get_file_like(self, placeholder_size=None):
+        return BytesIO(self._content)
+
+    def image(self):
+        return Image.open(self.get_file_like())
+
+    def size(self):
+        return self._size
+
+
+def _get_image_ref(image) -> Tuple[str, FileLikeImage]:
+    if isinstance(image, ImageData):
+        image_url = image.get_image_url()
+    else:
+        image_url = image
+
+    if is_external_url(image_url):
+        return image_url, ExternalImage(image_url)
+    path = Path(image_url).absolute()
+    return image_url, InternalImage(str(path))
+
+
+def _get_placeholder_size(placeholder) -> Optional[Tuple[int, int]]:
+    if placeholder is None or not placeholder.width or not placeholder.height:
+        return None
+    return placeholder.width, placeholder.height
+
+
+class _PresentationImages(object):
+    """ The images of a presentation, by image url and placeholder size: those prepared before adding the slides, and
+    the image parts already added, such that every distinct image is only read, normalised and hashed once per deck """
+
+    def __init__(self):
+        self.prepared: Dict[tuple, PreparedImage] = {}
+        self.parts: Dict[tuple, object] = {}
+
+
+_presentation_images: "WeakKeyDictionary[object, _PresentationImages]" = (
+    WeakKeyDictionary()
+)
+_presentation_images_lock = threading.Lock()
+
+
+def _get_presentation_images(prs_or_slide) -> _PresentationImages:
+    package = prs_or_slide.part.package
+    with _presentation_images_lock:
+        presentation_images = _presentation_images.get(package)
+        if presentation_images is None:
+            presentation_images = _PresentationImages()
+            _presentation_images[package] = presentation_images
+        return presentation_images
+
+
+# The slide layouts of each presentation, which python-pptx would otherwise look up through the relationships of the
+# presentation part for every new slide
+_slide_layouts: "WeakKeyDictionary[object, list]" = WeakKeyDictionary()
+
+
+def get_slide_layout(prs, layout_index: int):
+    package = prs.part.package
+    with _presentation_images_lock:
+        slide_layouts = _slide_layouts.get(package)
+        if slide_layouts is None:
+            slide_layouts = list(prs.slide_layouts)
+            _slide_layouts[package] = slide_layouts
+    return slide_layouts[layout_index]
+
+
+def _get_image_part(slide, image_url: str, image_ref: FileLikeImage, placeholder_size):
+    package = slide.part.package
+    deck_image_parts = _get_presentation_images(slide).parts
+    key = (image_url, placeholder_size)
+    image_part = deck_image_parts.get(key)
+    if image_part is None:
+        image_part = package.get_or_add_image_part(
+            image_ref.get_file_like(placeholder_size)
+        )
+        deck_image_parts[key] = image_part
+    return image_part
+
+
+def _insert_picture(placeholder, image_part):
+    """ Same as placeholder.insert_picture, but with an image part that is already in the presentation """
+    # Mirrors PicturePlaceholder._new_placeholder_pic of python-pptx 0.6.18 (unchanged up to 1.0.2), whose private
+    # internals it uses, hence python-pptx being pinned in requirements.txt
+    rId = placeholder.part.relate_to(image_part, RT.IMAGE)
+    picture = CT_Picture.new_ph_pic(
+        placeholder.shape_id, placeholder.name, image_part.desc, rId
+    )
+    picture.crop_to_fit(image_part._px_size, (placeholder.width, placeholder.height))
+    placeholder._replace_placeholder_with(picture)
+    return PlaceholderPicture(picture, placeholder._parent)
+
 
 # CREATION
 def _create_slide(prs, slide_type):
     """ Creates a new slide in the given presentation using the slide_type template """
-    return prs.slides.add_slide(prs.slide_layouts[slide_type])
+    return prs.slides.add_slide(get_slide_layout(prs, slide_type))
 
 
 def _add_title(slide, title):
@@ -117,28 +255,31 @@ def is_external_url(url: str):
 def _add_image(
     slide, placeholder_id: int, image: ImageData, original_image_size: bool = True
 ):
-    if isinstance(image, ImageData):
-        image_url = image.get_image_url()
-    else:
-        image_url = image
-
-    if is_external_url(image_url):
-        image_ref = ExternalImage(image_url)
-    else:
-        path = Path(image_url).absolute()
-        image_ref = InternalImage(str(path))
-
+    image_url, image_ref = _get_image_ref(image)
     placeholder = slide.placeholders[placeholder_id]
+    placeholder_size = _get_placeholder_size(placeholder)
+    prepared_image = _get_presentation_images(slide).prepared.get(
+        (image_url, placeholder_size)
+    )
+    if prepared_image is not None:
+        image_ref = prepared_image
     if original_image_size:
         # Calculate the image size of the image
         try:
             # Insert the picture
             try:
-                width, height = image_ref.image().size
+                image_size = image_ref.size()
+                if image_size is None:
+                    logger.error("_add_image could not read the size of {}".format(image_url))
+                    return None
+                width, height = image_size
                 # Make sure the placeholder doesn't zoom in
                 placeholder.height = height
                 placeholder.width = width
-                placeholder = placeholder.insert_picture(image_ref.get_file_like())
+                placeholder = _insert_picture(
+                    placeholder,
+                    _get_image_part(slide, image_url, image_ref, placeholder_size),
+                )
                 # Calculate ratios and compare
                 image_ratio = width / height
                 placeholder_ratio = placeholder.width / placeholder.height
@@ -163,7 +304,10 @@ def _add_image(
             return None
     else:
         try:
-            return placeholder.insert_picture(image_ref.get_file_like())
+            return _insert_picture(
+                placeholder,
+                _get_image_part(slide, image_url, image_ref, placeholder_size),
+            )
         except (OSError, ValueError) as e:
             logger.error(e)
             logger.error("Unexpected error inserting image: {}:{}".format(image, sys.exc_info()[0]))
@@ -199,7 +343,9 @@ def add_sources_note(slide, _sources: List[str]):
 
 
 def create_new_powerpoint() -> Presentation:
-    return Presentation(get_powerpoint_template_file())
+    """ Returns a new presentation from the template, parsed from its content in memory rather than reading it again.
+    Copying a parsed presentation is not safe, as python-pptx caches objects that would then point into the original """
+    return Presentation(BytesIO(_get_template_bytes()))
 
 
 def create_title_slide(prs, title, subtitle):
@@ -209,6 +355,11 @@ def create_title_slide(prs, title, subtitle):
     return slide
 
 
+def get_black_transparent_image():
+    data_folder = Path(__file__).parent.parent / "data" / "images" / "black-transparent.png"
+    return str(data_folder.absolute())
+
+
 def create_large_quote_slide(prs, title, text, background_image=None):
     if bool(text):
         slide = _create_slide(prs, LAYOUT_LARGE_QUOTE)
@@ -219,8 +370,7 @@ def create_large_quote_slide(prs, title, text, background_image=None):
             _add_image(slide, 11, background_image, False)
 
         # Add black transparent image for making other image behind it transparent (missing feature in python-pptx)
-        data_folder = Path(__file__).parent.parent / "data" / "images" / "black-transparent.png"
-        _add_image(slide, 12, ImageData(str(data_folder.absolute())), False)
+        _add_image(slide, 12, ImageData(get_black_transparent_image()), False)
 
         return slide
 
@@ -314,3 +464,82 @@ def create_chart_slide(prs, title, chart_type, chart_data, chart_modifier=None):
     if chart_modifier:
         chart_modifier(chart, chart_data)
     return slide
+
+
+# RENDER PLANS
+# Downloading, measuring and normalising the images of a deck concurrently, before its slides are added one by one
+
+# The layout of every slide creator adding images, and the placeholder of each of its image arguments
+_IMAGE_PLACEHOLDERS = {
+    create_large_quote_slide: (LAYOUT_LARGE_QUOTE, {"background_image": 11}),
+    create_image_slide: (LAYOUT_TITLE_AND_PICTURE, {"image_url": 1}),
+    create_full_image_slide: (LAYOUT_FULL_PICTURE, {"image_url": 1}),
+    create_two_column_images_slide: (
+        LAYOUT_TWO_TITLE_AND_IMAGE,
+        {"image_or_text_1": 13, "image_or_text_2": 14},
+    ),
+    create_three_column_images_slide: (
+        LAYOUT_THREE_TITLE_AND_IMAGE,
+        {"image_or_text_1": 13, "image_or_text_2": 14, "image_or_text_3": 16},
+    ),
+}
+
+
+def get_image_placements(
+    prs, ppt_slide_creator, arguments: Dict
+) -> List[Tuple[str, Optional[Tuple[int, int]]]]:
+    """ Returns the (image url, placeholder size) of the images the slide creator will add for the given arguments """
+    if ppt_slide_creator not in _IMAGE_PLACEHOLDERS:
+        return []
+    layout_index, image_placeholders = _IMAGE_PLACEHOLDERS[ppt_slide_creator]
+    layout = get_slide_layout(prs, layout_index)
+    placements = []
+    for argument, placeholder_id in image_placeholders.items():
+        image = arguments.get(argument)
+        if image and os_util.is_image(image):
+            image_url, _ = _get_image_ref(image)
+            placeholder = layout.placeholders.get(idx=placeholder_id)
+            placements.append((image_url, _get_placeholder_size(placeholder)))
+    return placements
+
+
+def _prepare_image(image_url: str, placeholder_size) -> Optional[PreparedImage]:
+    image_ref = ExternalImage(image_url)
+    content = image_ref.get_bytes_io().getvalue()
+    if not content:
+        return None
+    size = image_util.get_content_size(content) or image_ref.size()
+    if size is None:
+        return None
+    return PreparedImage(size, image_ref.get_file_like(placeholder_size).getvalue())
+
+
+def prepare_images(prs, placements: List[Tuple[str, Optional[Tuple[int, int]]]]):
+    """ Prepares the external images of the given placements concurrently, for adding them to the presentation later.
+    Images that can not be prepared are left to the slide creators """
+    presentation_images = _get_presentation_images(prs)
+    placements = [
+        placement
+        for placement in dict.fromkeys(placements)
+        if is_external_url(placement[0])
+        and placement not in presentation_images.prepared
+    ]
+    if not placements:
+        return
+    executor = concurrency_util.get_executor(
+        "render", settings.image_settings()["render_workers"]
+    )
+    futures = {
+        placement: executor.submit(
+            contextvars.copy_context().run, _prepare_image, *placement
+        )
+        for placement in placements
+    }
+    for placement, future in futures.items():
+        try:
+            prepared_image = future.result()
+        except Exception as e:
+            logger.warning("Could not prepare image {}: {}".format(placement[0], e))
+            continue
+        if prepared_image is not None:
+            presentation_images.prepared[placement] = prepared_image
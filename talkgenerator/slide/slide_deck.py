@@ -1,6 +1,7 @@
 import logging
 from typing import List
 
+from talkgenerator.slide import powerpoint_slide_creator
 from talkgenerator.slide.slides import Slide
 
 logger = logging.getLogger("talkgenerator")
@@ -26,6 +27,15 @@ class SlideDeck:
                 "ERROR: SOME SLIDES WERE NOT GENERATED: {}".format(self._slides)
             )
             self._slides = [slide for slide in self._slides if slide is not None]
+        # Download and resize all images concurrently first, such that adding the slides in order is cheap
+        powerpoint_slide_creator.prepare_images(
+            prs_template,
+            [
+                placement
+                for slide in self._slides
+                for placement in slide.get_image_placements(prs_template)
+            ],
+        )
         return [slide.create_powerpoint_slide(prs_template) for slide in self._slides]
 
     def to_slide_deck_dictionary(self) -> List[dict]:
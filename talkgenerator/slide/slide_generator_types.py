@@ -3,7 +3,7 @@ from abc import ABCMeta
 from abc import abstractmethod
 
 from talkgenerator.slide import slides
-from talkgenerator.util import generator_util
+from talkgenerator.util import generator_util, tracing_util
 
 logger = logging.getLogger("talkgenerator")
 
@@ -454,11 +454,22 @@ class CombinedSlideGenerator(object):
     def __call__(self, presentation_context):
         # print("CombinedGenerator:", self)
         return [
-            content_generator(presentation_context) if content_generator else None
+            _generate_content(content_generator, presentation_context)
+            if content_generator
+            else None
             for content_generator in self._generators
         ]
 
 
+def _generate_content(content_generator, presentation_context):
+    with tracing_util.span(
+        tracing_util.describe(content_generator), tracing_util.CONTENT_GENERATOR
+    ) as content_span:
+        content = content_generator(presentation_context)
+        content_span.set_attribute("generated", content is not None)
+        return content
+
+
 def is_different_enough(generated, used):
     (used_elements, allowed_repeated_elements) = used
     return is_different_enough_for_allowed_repeated(
@@ -25,6 +25,12 @@ class Slide(metaclass=ABCMeta):
     def set_note(self, note: str):
         self._note = note
 
+    def get_image_placements(self, prs):
+        """ Returns the (image url, placeholder size) of the images this slide shows in the given presentation """
+        return powerpoint_slide_creator.get_image_placements(
+            prs, self._ppt_slide_creator, self._arguments
+        )
+
     def create_powerpoint_slide(self, prs):
         """ Should generate a slide in the powerpoint """
         ppt_slide = self._ppt_slide_creator(prs, **self._arguments)
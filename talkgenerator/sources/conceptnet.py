@@ -1,13 +1,8 @@
 import time
 import logging
-from functools import lru_cache
-from pathlib import Path
 from urllib.parse import urlencode
 
-import requests
-# from cachier import cachier
-
-from talkgenerator.util import generator_util, cache_util
+from talkgenerator.util import generator_util, cache_util, http_util
 
 URL = "http://api.conceptnet.io/c/en/{}?"
 
@@ -82,19 +77,25 @@ def remove_nones(entries):
 # RETRIEVING DATA
 
 
-@lru_cache(maxsize=20)
-# @cachier(cache_dir=Path("..", "tmp").absolute())
+def _cache_key(word, arguments=None):
+    return cache_util.make_key(normalise(word), arguments or _DEFAULT_ARGUMENTS)
+
+
+@cache_util.cached("conceptnet", ttl=14 * 24 * 60 * 60, key_function=_cache_key)
 def _get_data(word, arguments=None):
     if not arguments:
         arguments = _DEFAULT_ARGUMENTS
-    splitted_word = _remove_prohibited_words(word)
-    search_term = "_".join(splitted_word)
+    # Conceptnet concepts are lower case, so normalising doesn't change the result
+    search_term = "_".join(normalise(word).split(" "))
     url = URL.format(search_term) + urlencode(arguments, False, "/")
     start = time.perf_counter()
     try:
-        result = requests.get(url).json()
+        response = http_util.get(url)
+        # Error responses are not cached, as they are not what Conceptnet knows about the word
+        response.raise_for_status()
+        result = response.json()
     except Exception as e:
-        logger.warning("conceptnet _get_data timeout: {}".format(e))
+        logger.warning("conceptnet _get_data failed: {}".format(e))
         result = None
     end = time.perf_counter()
     logger.info(
@@ -1,11 +1,7 @@
-from functools import lru_cache
-from pathlib import Path
-
 import requests
 from bs4 import BeautifulSoup
-# from cachier import cachier
 
-from talkgenerator.util import scraper_util
+from talkgenerator.util import scraper_util, cache_util, http_util
 
 quote_search_url = (
     "https://www.goodreads.com/search?page={}&q={"
@@ -13,13 +9,12 @@ quote_search_url = (
 )
 
 
-@lru_cache(maxsize=20)
-# @cachier(cache_dir=Path("..", "tmp").absolute())
+@cache_util.cached("goodreads", ttl=30 * 24 * 60 * 60)
 def _search_quotes_page(search_term, page):
     url = quote_search_url.format(page, search_term.replace(" ", "+"))
     try:
-        page = requests.get(url, timeout=5)
-    except (requests.exceptions.ConnectionError, requests.exceptions.ReadTimeout) as e:
+        page = http_util.get(url, timeout=5)
+    except requests.exceptions.RequestException:
         return None
     if page:
         soup = BeautifulSoup(page.content, "html.parser")
@@ -1,32 +1,51 @@
 import logging
-from pathlib import Path
+import threading
 from typing import List
 
-# from cachier import cachier
-from pexels_api import API
 from talkgenerator import settings
 from talkgenerator.datastructures.image_data import ImageData
+from talkgenerator.util import cache_util
 
 logging.getLogger("pexels").setLevel(logging.DEBUG)
 logger = logging.getLogger("talkgenerator")
 
 
 def get_pexels_session():
+    from pexels_api import API
+
     creds = settings.pexels_auth()
     api = API(creds["pexels_key"])
     return api
 
 
-pexels_session = get_pexels_session()
+# The session is only created on first use, so importing this module stays cheap
+_pexels_session = None
+_pexels_session_lock = threading.Lock()
+
+
+def get_session():
+    global _pexels_session
+    if _pexels_session is None:
+        with _pexels_session_lock:
+            if _pexels_session is None:
+                _pexels_session = get_pexels_session()
+    return _pexels_session
+
+
+def __getattr__(name):
+    # Backwards compatibility for the former module-level session
+    if name == "pexels_session":
+        return get_session()
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
 
 
-# @cachier(cache_dir=Path("..", "tmp").absolute())
+@cache_util.cached("pexels", ttl=7 * 24 * 60 * 60)
 def _search_pexels(query):
-    return pexels_session.search(query)
+    return get_session().search(query)
 
 
 def search_photos(query) -> List[ImageData]:
-    if pexels_session and query:
+    if query and get_session():
         results = _search_pexels(query)
         if results and results["photos"]:
             images = []
@@ -1,24 +1,22 @@
 from json import JSONDecodeError
-from pathlib import Path
 
 import requests
-# from cachier import cachier
 
-from talkgenerator.util import language_util
+from talkgenerator.util import language_util, cache_util, http_util
 
 URL = "https://api.phrasefinder.io/search?corpus=eng-us&query={}&nmax=1"
 
 
-# @cachier(cache_dir=Path("..", "tmp").absolute())
+@cache_util.cached("phrasefinder", ttl=90 * 24 * 60 * 60)
 def _search(word):
     word.replace(" ", "%20")
     url = URL.format(word)
     try:
-        result = requests.get(url)
+        result = http_util.get(url)
         result = result.json()
         if result:
             return result["phrases"]
-    except JSONDecodeError:
+    except (JSONDecodeError, requests.exceptions.RequestException):
         return None
 
 
@@ -4,6 +4,7 @@ from typing import List
 
 from talkgenerator import settings
 from talkgenerator.datastructures.image_data import ImageData
+from talkgenerator.util import cache_util, http_util
 
 logging.getLogger("pixabay").setLevel(logging.DEBUG)
 logger = logging.getLogger("talkgenerator")
@@ -23,6 +24,7 @@ def search_vertical(query):
     return search_photos(query, orientation="vertical")
 
 
+@cache_util.cached("pixabay", ttl=7 * 24 * 60 * 60)
 def search_photos(query, orientation="all") -> List[ImageData]:
     api_key = get_pixabay_session()
     logger.debug("pixabay_api_key: {}".format(api_key))
@@ -31,7 +33,11 @@ def search_photos(query, orientation="all") -> List[ImageData]:
     url_query = f"https://pixabay.com/api/?key={api_key}&q={query}&image_type=photo&orientation={orientation}"
     logger.debug("pixabay url_query: {}".format(url_query))
     if api_key and url_query:
-        results = requests.get(url=url_query)
+        try:
+            results = http_util.get(url_query)
+        except requests.exceptions.RequestException as e:
+            logger.warning("Pixabay request failed: {}".format(e))
+            return None
         logger.debug("request response results: {}".format(results))
         response_data = results.json()
         if results.status_code == 200 and response_data["hits"]:
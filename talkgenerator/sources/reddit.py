@@ -1,25 +1,25 @@
-import datetime
 import logging
-from functools import lru_cache
-from pathlib import Path
-
-import praw
-# from cachier import cachier
-from prawcore import ResponseException
-from prawcore import RequestException
+import threading
 
 from talkgenerator import settings
+from talkgenerator.util import cache_util
 
+# The Reddit client is only created (and praw only imported) on first use
 singleton_reddit = None
+_reddit_lock = threading.Lock()
 
 logger = logging.getLogger("talkgenerator")
 
 
 def get_reddit():
-    reddit = singleton_reddit
-    if not bool(reddit):
-        reddit = praw.Reddit(**settings.reddit_auth())
-    return reddit
+    global singleton_reddit
+    if singleton_reddit is None:
+        with _reddit_lock:
+            if singleton_reddit is None:
+                import praw
+
+                singleton_reddit = praw.Reddit(**settings.reddit_auth())
+    return singleton_reddit
 
 
 def has_reddit_access():
@@ -33,10 +33,12 @@ def get_subreddit(name):
             return subreddit
 
 
-@lru_cache(maxsize=20)
-# @cachier(cache_dir=Path("..", "tmp").absolute(), stale_after=datetime.timedelta(weeks=2))
+# Submissions are lazy objects bound to the Reddit session, so they are only cached in memory
+@cache_util.cached("reddit", ttl=14 * 24 * 60 * 60, persistent=False)
 def search_subreddit(name, query, sort="relevance", limit=500, filter_nsfw=True):
     if has_reddit_access():
+        from prawcore import RequestException, ResponseException
+
         try:
             submissions = list(
                 get_subreddit(name).search(query, sort=sort, limit=limit)
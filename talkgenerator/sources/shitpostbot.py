@@ -1,12 +1,9 @@
 import random
-from functools import lru_cache
-from pathlib import Path
 
 import requests
 from bs4 import BeautifulSoup
-# from cachier import cachier
 
-from talkgenerator.util import scraper_util
+from talkgenerator.util import scraper_util, cache_util, http_util
 
 _MAX_RANDOM_PAGE = 150
 _SEARCH_URL = (
@@ -19,11 +16,13 @@ def _search_shitpostbot_page(search_term, page):
     return [element[1] for element in _search_shitpostbot_page_rated(search_term, page)]
 
 
-@lru_cache(maxsize=20)
-# @cachier(cache_dir=Path("..", "tmp").absolute())
+@cache_util.cached("shitpostbot", ttl=7 * 24 * 60 * 60)
 def _search_shitpostbot_page_rated(search_term, page):
     url = _SEARCH_URL.format(search_term, page, search_term.replace(" ", "+"))
-    page = requests.get(url)
+    try:
+        page = http_util.get(url)
+    except requests.exceptions.RequestException:
+        return None
     if page:
         soup = BeautifulSoup(page.content, "html.parser")
 
@@ -2,6 +2,7 @@
 import json
 import random
 import re
+import threading
 from functools import lru_cache
 
 import tracery
@@ -12,6 +13,7 @@ from talkgenerator.sources import phrasefinder
 from talkgenerator.sources import wikihow
 from talkgenerator.util import language_util
 from talkgenerator.util import os_util
+from talkgenerator.util import profiling_util
 from talkgenerator.util import random_util
 
 known_functions = {
@@ -87,11 +89,23 @@ class TemplatedTextGenerator(AbstractTextGenerator):
 
 class TraceryTextGenerator(AbstractTextGenerator):
     def __init__(self, tracery_json, variable="origin"):
-        with open(os_util.to_actual_file(tracery_json)) as grammar_file:
-            grammar = get_tracery_grammar(grammar_file)
-            grammar.add_modifiers(base_english)
-            self._grammar = grammar
-            self._variable = variable
+        # The grammar is only parsed when it is first used, as most schemas only use some of the generators
+        self._tracery_json = tracery_json
+        self._variable = variable
+        self._grammar = None
+        self._grammar_lock = threading.Lock()
+
+    def _get_grammar(self):
+        if self._grammar is None:
+            with self._grammar_lock:
+                if self._grammar is None:
+                    with profiling_util.profile("tracery grammar", self._tracery_json):
+                        grammar = tracery.Grammar(
+                            get_tracery_rules(os_util.to_actual_file(self._tracery_json))
+                        )
+                        grammar.add_modifiers(base_english)
+                        self._grammar = grammar
+        return self._grammar
 
     def generate(self, variables_dictionary=None):
         """ Generates a text from internal tracery grammar using the given variables dictionary"""
@@ -101,7 +115,7 @@ class TraceryTextGenerator(AbstractTextGenerator):
 
         # Generate
         for i in range(100):  # TODO prune the grammar instead of retrying
-            template = self._grammar.flatten("#" + self._variable + "#")
+            template = self._get_grammar().flatten("#" + self._variable + "#")
             if can_format_with(template, variables_dictionary):
                 result = apply_variables_to_template(template, variables_dictionary)
                 if result:
@@ -109,8 +123,10 @@ class TraceryTextGenerator(AbstractTextGenerator):
 
 
 @lru_cache(maxsize=20)
-def get_tracery_grammar(grammar_file):
-    return tracery.Grammar(json.load(grammar_file))
+def get_tracery_rules(grammar_path):
+    """ Returns the parsed rules of a tracery file, which are shared by all grammars made from the same file """
+    with open(grammar_path) as grammar_file:
+        return json.load(grammar_file)
 
 
 def can_format_with(template, variables_dictionary):
@@ -1,15 +1,13 @@
 """ Module for interacting with Wikihow """
 
 import logging
+import threading
 from json import JSONDecodeError
-from pathlib import Path
 from typing import List
 
-# from cachier import cachier
-from pyunsplash import PyUnsplash
-
 from talkgenerator.datastructures.image_data import ImageData
 from talkgenerator import settings
+from talkgenerator.util import cache_util
 
 # pyunsplash logger defaults to level logging.ERROR
 # If you need to change that, use getLogger/setLevel
@@ -19,13 +17,33 @@ logger = logging.getLogger("talkgenerator")
 
 
 def get_unsplash_session():
+    from pyunsplash import PyUnsplash
+
     creds = settings.unsplash_auth()
     # instantiate PyUnsplash object
     api = PyUnsplash(api_key=creds["unsplash_access_key"])
     return api
 
 
-unsplash_session = get_unsplash_session()
+# The session is only created on first use, so importing this module stays cheap
+_unsplash_session = None
+_unsplash_session_lock = threading.Lock()
+
+
+def get_session():
+    global _unsplash_session
+    if _unsplash_session is None:
+        with _unsplash_session_lock:
+            if _unsplash_session is None:
+                _unsplash_session = get_unsplash_session()
+    return _unsplash_session
+
+
+def __getattr__(name):
+    # Backwards compatibility for the former module-level session
+    if name == "unsplash_session":
+        return get_session()
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
 
 
 def _map_to_image_data(photo):
@@ -38,7 +56,7 @@ def _map_to_image_data(photo):
 
 def random(_=None):
     try:
-        random_image = unsplash_session.photos(type_="random")
+        random_image = get_session().photos(type_="random")
         image_url = random_image.body["links"]["download"]
         creator_name = random_image.body["user"]["name"]
         return ImageData(image_url=image_url, source=creator_name)
@@ -55,14 +73,17 @@ def random_as_list(_=None):
         return []
 
 
-# @cachier(cache_dir=Path("..", "tmp").absolute())
+@cache_util.cached("unsplash", ttl=7 * 24 * 60 * 60)
+def _search_unsplash(query) -> List[ImageData]:
+    results = get_session().search(type_="photos", query=query)
+    if results and results.body:
+        return [_map_to_image_data(photo) for photo in results.entries]
+
+
 def search_photos(query) -> List[ImageData]:
-    if unsplash_session and query:
-        results = unsplash_session.search(type_="photos", query=query)
-        if results and results.body:
-            images = []
-            for photo in results.entries:
-                images.append(_map_to_image_data(photo))
+    if query and get_session():
+        images = _search_unsplash(query)
+        if images:
             return images
         else:
             logger.warning(
@@ -70,7 +91,7 @@ def search_photos(query) -> List[ImageData]:
                     query
                 )
             )
-    elif unsplash_session and not query:
+    elif not query and get_session():
         return random_as_list()
     else:
         logger.warning("No active Unsplash session due to missing/wrong credentials.")
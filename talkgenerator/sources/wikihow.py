@@ -4,14 +4,12 @@ import time
 import logging
 from functools import lru_cache
 from itertools import chain
-from pathlib import Path
 
-import inflect
 import requests
 from bs4 import BeautifulSoup
-# from cachier import cachier
 
 from talkgenerator import settings
+from talkgenerator.util import cache_util, http_util, language_util
 
 logger = logging.getLogger("talkgenerator")
 
@@ -24,7 +22,7 @@ _ADVANCED_SEARCH_URL = (
 
 def _create_log_in_session(username, password):
     log_in_credentials = {"wpName": username, "wpPassword": password}
-    session = requests.session()
+    session = http_util.create_session()
     max_session_attempts = 16
     trial = 1
     success = False
@@ -100,12 +98,18 @@ def _remove_trademarks(action):
     return action
 
 
-@lru_cache(maxsize=20)
-# @cachier(cache_dir=Path("..", "tmp").absolute())
+@cache_util.cached("wikihow", ttl=30 * 24 * 60 * 60)
 def basic_search_wikihow(search_words):
-    return requests.get(
-        "https://en.wikihow.com/wikiHowTo?search=" + search_words.replace(" ", "+")
-    )
+    """ Returns the content of the search results page, or None if the search failed """
+    try:
+        page = http_util.get(
+            "https://en.wikihow.com/wikiHowTo?search=" + search_words.replace(" ", "+")
+        )
+    except requests.exceptions.RequestException as e:
+        logger.warning("Wikihow search failed: {}".format(e))
+        return None
+    if page:
+        return page.content
 
 
 # wikihow_session = get_wikihow_session()
@@ -113,7 +117,6 @@ wikihow_session = None
 
 
 @lru_cache(maxsize=20)
-# @cachier(cache_dir=Path("..", "tmp").absolute())
 def _advanced_search_wikihow(search_words):
     # session = get_wikihow_session()
     if wikihow_session:
@@ -131,9 +134,11 @@ def get_related_wikihow_actions_basic_search(seed_word):
     page = basic_search_wikihow(seed_word)
     # Try again but with plural if nothing is found
     if not page:
-        page = basic_search_wikihow(inflect.engine().plural(seed_word))
+        page = basic_search_wikihow(language_util.get_inflect_engine().plural(seed_word))
+    if not page:
+        return []
 
-    soup = BeautifulSoup(page.content, "html.parser")
+    soup = BeautifulSoup(page, "html.parser")
     actions_elements = soup.find_all("a", class_="result_link")
     action_titles = list(
         chain.from_iterable(
@@ -152,7 +157,7 @@ def get_related_wikihow_actions_advanced_search(seed_word):
     page = _advanced_search_wikihow(seed_word)
     # Try again but with plural if nothing is found
     if not page:
-        page = _advanced_search_wikihow(inflect.engine().plural(seed_word))
+        page = _advanced_search_wikihow(language_util.get_inflect_engine().plural(seed_word))
     if page:
         soup = BeautifulSoup(page.content, "html.parser")
         actions_elements = soup.find_all("div", class_="mw-search-result-heading")
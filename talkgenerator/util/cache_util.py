@@ -1,3 +1,25 @@
+"""
+Caching layer shared by the modules in talkgenerator.sources.
+Every source registers a SourceCache (through the cached decorator), which looks up values in a tiered cache:
+an in-memory LRU bounded in bytes, an SQLite file on disk and, optionally, a Redis-compatible server.
+"""
+import functools
+import logging
+import os
+import pickle
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from talkgenerator import settings
+from talkgenerator.util import tracing_util
+
+logger = logging.getLogger("talkgenerator")
+
+
 # from https://stackoverflow.com/questions/1151658/python-hashable-dicts
 class HashableDict(dict):
     """ A hashable version of a dictionary, useful for when a function needs to be cached but uses a dict as an
@@ -11,3 +33,519 @@ class HashableDict(dict):
 
     def __eq__(self, other):
         return self.__key() == other.__key()
+
+    def to_key(self) -> Tuple:
+        """ Order-independent representation of the dictionary, usable in persistent cache keys """
+        return self.__key()
+
+
+# CACHE TIERS
+
+
+class CacheTier(object):
+    """ A single level of the cache. get returns a (hit, value) tuple """
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        hit, value, _ = self.get_with_expiry(key)
+        return hit, value
+
+    def get_with_expiry(self, key: str) -> Tuple[bool, Any, Optional[float]]:
+        """ Returns a (hit, value, expires) tuple, where expires is the time the value expires at, or None if never """
+        raise NotImplementedError()
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        raise NotImplementedError()
+
+    def delete(self, key: str):
+        raise NotImplementedError()
+
+    def clear(self):
+        raise NotImplementedError()
+
+
+class MemoryCache(CacheTier):
+    """ Thread-safe least-recently-used cache, bounded by the estimated size of its values in bytes """
+
+    def __init__(self, max_bytes: int):
+        self._max_bytes = max_bytes
+        self._current_bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_with_expiry(self, key: str) -> Tuple[bool, Any, Optional[float]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None, None
+            value, expires, _ = entry
+            if expires is not None and expires < time.time():
+                self._remove(key)
+                return False, None, None
+            self._entries.move_to_end(key)
+            return True, value, expires
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        size = _estimate_size(value)
+        if size > self._max_bytes:
+            return
+        expires = time.time() + ttl if ttl is not None else None
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (value, expires, size)
+            self._current_bytes += size
+            while self._current_bytes > self._max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def delete(self, key: str):
+        with self._lock:
+            self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._current_bytes = 0
+
+    def delete_prefix(self, prefix: str):
+        with self._lock:
+            for key in [key for key in self._entries if key.startswith(prefix)]:
+                self._remove(key)
+
+    def get_size_in_bytes(self) -> int:
+        return self._current_bytes
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._current_bytes -= entry[2]
+
+
+def _estimate_size(value) -> int:
+    try:
+        return len(pickle.dumps(value))
+    except (pickle.PicklingError, TypeError, AttributeError, RecursionError):
+        return sys.getsizeof(value)
+
+
+class PersistentCache(CacheTier):
+    """ Key-value store with a time-to-live, backed by an SQLite file so that cached values survive restarts and
+    can be shared between concurrently running processes """
+
+    def __init__(self, name: str, ttl: Optional[float] = None, cache_dir: str = None):
+        if cache_dir is None:
+            cache_dir = settings.cache_settings()["cache_dir"]
+        self._name = name
+        self._ttl = ttl
+        self._file = os.path.join(cache_dir, name + ".sqlite")
+        self._local = threading.local()
+        self._pruned = False
+
+    def _get_connection(self) -> sqlite3.Connection:
+        # SQLite connections can not be shared between threads, so every thread gets its own
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            os.makedirs(os.path.dirname(self._file), exist_ok=True)
+            connection = sqlite3.connect(self._file, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS entries "
+                "(key TEXT PRIMARY KEY, value BLOB, expires REAL)"
+            )
+            self._local.connection = connection
+            if not self._pruned:
+                self._pruned = True
+                self._prune(connection)
+        return connection
+
+    def _prune(self, connection: sqlite3.Connection):
+        """ Deletes the expired entries, which would otherwise only be deleted when they are looked up again """
+        try:
+            connection.execute(
+                "DELETE FROM entries WHERE expires IS NOT NULL AND expires < ?",
+                (time.time(),),
+            )
+        except sqlite3.Error as e:
+            logger.warning("Could not prune {} cache: {}".format(self._name, e))
+
+    def get_with_expiry(self, key: str) -> Tuple[bool, Any, Optional[float]]:
+        try:
+            row = (
+                self._get_connection()
+                .execute("SELECT value, expires FROM entries WHERE key = ?", (key,))
+                .fetchone()
+            )
+            if row is None:
+                return False, None, None
+            value, expires = row
+            if expires is not None and expires < time.time():
+                self.delete(key)
+                return False, None, None
+            return True, pickle.loads(value), expires
+        except (sqlite3.Error, pickle.UnpicklingError, EOFError) as e:
+            logger.warning("Could not read {} cache: {}".format(self._name, e))
+            return False, None, None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        if ttl is None:
+            ttl = self._ttl
+        expires = time.time() + ttl if ttl is not None else None
+        try:
+            self._get_connection().execute(
+                "INSERT OR REPLACE INTO entries (key, value, expires) VALUES (?, ?, ?)",
+                (key, sqlite3.Binary(pickle.dumps(value)), expires),
+            )
+        except (sqlite3.Error, pickle.PicklingError, TypeError, AttributeError) as e:
+            logger.warning("Could not write to {} cache: {}".format(self._name, e))
+
+    def delete(self, key: str):
+        self._get_connection().execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def clear(self):
+        self._get_connection().execute("DELETE FROM entries")
+
+    def __str__(self):
+        return "PersistentCache[" + self._name + "]"
+
+
+class LocalRedis(object):
+    """ In-process stand-in for a Redis client, implementing the small part of its interface used by RedisCache """
+
+    def __init__(self):
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        with self._lock:
+            entry = self._values.get(name)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires is not None and expires < time.time():
+                del self._values[name]
+                return None
+            return value
+
+    def set(self, name, value, ex=None):
+        with self._lock:
+            self._values[name] = (value, time.time() + ex if ex else None)
+        return True
+
+    def pttl(self, name):
+        with self._lock:
+            entry = self._values.get(name)
+            if entry is None:
+                return -2
+            if entry[1] is None:
+                return -1
+            return max(0, int((entry[1] - time.time()) * 1000))
+
+    def delete(self, *names):
+        with self._lock:
+            for name in names:
+                self._values.pop(name, None)
+
+    def scan_iter(self, match=None):
+        prefix = match.rstrip("*") if match else ""
+        with self._lock:
+            return [name for name in list(self._values) if name.startswith(prefix)]
+
+
+class RedisCache(CacheTier):
+    """ Cache tier storing pickled values in a Redis-compatible server, shared by all machines using it """
+
+    def __init__(self, client, prefix: str):
+        self._client = client
+        self._prefix = "talkgenerator:" + prefix + ":"
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        try:
+            value = self._client.get(self._prefix + key)
+            if value is None:
+                return False, None
+            return True, pickle.loads(value)
+        except Exception as e:
+            logger.warning("Could not read from Redis cache: {}".format(e))
+            return False, None
+
+    def get_with_expiry(self, key: str) -> Tuple[bool, Any, Optional[float]]:
+        hit, value = self.get(key)
+        if not hit:
+            return False, None, None
+        try:
+            # Milliseconds to live, or a negative number if the key has no time-to-live
+            milliseconds = self._client.pttl(self._prefix + key)
+        except Exception as e:
+            logger.warning("Could not read expiry from Redis cache: {}".format(e))
+            return False, None, None
+        if milliseconds is None or milliseconds < 0:
+            return True, value, None
+        return True, value, time.time() + milliseconds / 1000
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        try:
+            self._client.set(
+                self._prefix + key,
+                pickle.dumps(value),
+                ex=int(ttl) if ttl is not None else None,
+            )
+        except Exception as e:
+            logger.warning("Could not write to Redis cache: {}".format(e))
+
+    def delete(self, key: str):
+        self._client.delete(self._prefix + key)
+
+    def clear(self):
+        keys = list(self._client.scan_iter(match=self._prefix + "*"))
+        if keys:
+            self._client.delete(*keys)
+
+
+class TieredCache(CacheTier):
+    """ Looks up keys in the given tiers in order, copying hits into the faster tiers before it """
+
+    def __init__(self, *tiers: CacheTier):
+        self._tiers = tiers
+
+    def get_with_expiry(self, key: str) -> Tuple[bool, Any, Optional[float]]:
+        for i in range(len(self._tiers)):
+            hit, value, expires = self._tiers[i].get_with_expiry(key)
+            if hit:
+                # The copies expire when the original does
+                ttl = expires - time.time() if expires is not None else None
+                if ttl is None or ttl > 0:
+                    for faster_tier in self._tiers[:i]:
+                        faster_tier.set(key, value, ttl)
+                return True, value, expires
+        return False, None, None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        for tier in self._tiers:
+            tier.set(key, value, ttl)
+
+    def delete(self, key: str):
+        for tier in self._tiers:
+            tier.delete(key)
+
+    def clear(self):
+        for tier in self._tiers:
+            tier.clear()
+
+
+# SHARED TIERS
+
+_shared_tiers_lock = threading.Lock()
+_memory_cache: Optional[MemoryCache] = None
+_redis_client = None
+
+
+def get_memory_cache() -> MemoryCache:
+    """ The memory tier is shared by all sources, such that the byte bound holds for the whole process """
+    global _memory_cache
+    with _shared_tiers_lock:
+        if _memory_cache is None:
+            _memory_cache = MemoryCache(settings.cache_settings()["memory_max_bytes"])
+        return _memory_cache
+
+
+def get_redis_client():
+    """ Returns a client for the Redis server in the REDIS_URL setting, the local stand-in if it is 'local://',
+    or None if no Redis tier should be used """
+    global _redis_client
+    with _shared_tiers_lock:
+        if _redis_client is None:
+            redis_url = settings.cache_settings()["redis_url"]
+            if redis_url == "local://":
+                _redis_client = LocalRedis()
+            elif redis_url:
+                try:
+                    import redis
+
+                    _redis_client = redis.Redis.from_url(redis_url)
+                except ImportError:
+                    logger.warning(
+                        "REDIS_URL is set, but the redis package is not installed"
+                    )
+        return _redis_client
+
+
+class _PrefixedMemoryTier(CacheTier):
+    """ View on the shared memory tier that keeps the keys of different sources apart """
+
+    def __init__(self, tier: MemoryCache, prefix: str):
+        self._tier = tier
+        self._prefix = prefix + ":"
+
+    def get_with_expiry(self, key: str) -> Tuple[bool, Any, Optional[float]]:
+        return self._tier.get_with_expiry(self._prefix + key)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        self._tier.set(self._prefix + key, value, ttl)
+
+    def delete(self, key: str):
+        self._tier.delete(self._prefix + key)
+
+    def clear(self):
+        self._tier.delete_prefix(self._prefix)
+
+
+def create_default_tiers(
+    name: str, persistent: bool = True, ttl: Optional[float] = None
+) -> TieredCache:
+    tiers = [_PrefixedMemoryTier(get_memory_cache(), name)]
+    if persistent:
+        tiers.append(PersistentCache(name, ttl))
+        redis_client = get_redis_client()
+        if redis_client is not None:
+            tiers.append(RedisCache(redis_client, name))
+    return TieredCache(*tiers)
+
+
+# SOURCE CACHES
+
+_enabled: Optional[bool] = None
+_source_caches: Dict[str, "SourceCache"] = {}
+
+
+def is_enabled() -> bool:
+    if _enabled is None:
+        return settings.cache_settings()["enabled"]
+    return _enabled
+
+
+def set_enabled(enabled: Optional[bool]):
+    """ Globally enables or disables caching for all sources. None falls back to the CACHE_ENABLED setting """
+    global _enabled
+    _enabled = enabled
+
+
+class SourceCache(object):
+    """ The cache of a single source, keeping track of its own time-to-live and hit/miss statistics """
+
+    def __init__(
+        self, name: str, ttl: Optional[float] = None, tiers: CacheTier = None,
+    ):
+        self._name = name
+        self._ttl = settings.cache_ttl(name, ttl)
+        self._tiers = tiers
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._miss_seconds = 0.0
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any]):
+        with tracing_util.span(self._name, tracing_util.SOURCE_CALL) as source_span:
+            if not is_enabled():
+                source_span.set_attribute("cache", "disabled")
+                return compute()
+            hit, value = self._tiers.get(key)
+            if hit:
+                source_span.set_attribute("cache", "hit")
+                with self._lock:
+                    self._hits += 1
+                return value
+
+            source_span.set_attribute("cache", "miss")
+            start = time.perf_counter()
+            value = compute()
+            with self._lock:
+                self._misses += 1
+                self._miss_seconds += time.perf_counter() - start
+            if value is not None:
+                self._tiers.set(key, value, self._ttl)
+            return value
+
+    def clear(self):
+        self._tiers.clear()
+
+    def get_statistics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "miss_seconds": round(self._miss_seconds, 3),
+            }
+
+    def __str__(self):
+        return "SourceCache[" + self._name + "]"
+
+
+def get_source_cache(name: str) -> SourceCache:
+    return _source_caches[name]
+
+
+def get_statistics() -> Dict[str, Dict[str, Any]]:
+    """ Hit/miss statistics of every registered source cache """
+    return {name: cache.get_statistics() for name, cache in _source_caches.items()}
+
+
+def make_key(*args, **kwargs) -> str:
+    """ Creates a stable textual key from function arguments """
+    return repr(
+        (
+            tuple(_to_key_part(arg) for arg in args),
+            tuple((k, _to_key_part(kwargs[k])) for k in sorted(kwargs)),
+        )
+    )
+
+
+def _to_key_part(argument):
+    if isinstance(argument, HashableDict):
+        return argument.to_key()
+    if isinstance(argument, dict):
+        return tuple((k, argument[k]) for k in sorted(argument))
+    return argument
+
+
+def cached(
+    name: str,
+    ttl: Optional[float] = None,
+    key_function: Callable[..., str] = make_key,
+    persistent: bool = True,
+):
+    """ Decorator registering a source cache with the given name, which caches the (non-None) results of the
+    function. Non-persistent caches only use the memory tier, e.g. for values that can not be pickled. """
+
+    def decorator(func):
+        source_cache = SourceCache(name, ttl, _LazyTiers(name, persistent, ttl))
+        _source_caches[name] = source_cache
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return source_cache.get_or_compute(
+                key_function(*args, **kwargs), lambda: func(*args, **kwargs)
+            )
+
+        wrapper.cache = source_cache
+        return wrapper
+
+    return decorator
+
+
+class _LazyTiers(CacheTier):
+    """ Only creates the tiers of a source when it is first used, so importing a source doesn't touch the disk """
+
+    def __init__(self, name: str, persistent: bool, ttl: Optional[float] = None):
+        self._name = name
+        self._persistent = persistent
+        self._ttl = ttl
+        self._tiers = None
+        self._lock = threading.Lock()
+
+    def _get_tiers(self) -> TieredCache:
+        with self._lock:
+            if self._tiers is None:
+                self._tiers = create_default_tiers(
+                    self._name, self._persistent, settings.cache_ttl(self._name, self._ttl)
+                )
+            return self._tiers
+
+    def get_with_expiry(self, key: str) -> Tuple[bool, Any, Optional[float]]:
+        return self._get_tiers().get_with_expiry(key)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        self._get_tiers().set(key, value, ttl)
+
+    def delete(self, key: str):
+        self._get_tiers().delete(key)
+
+    def clear(self):
+        self._get_tiers().clear()
@@ -0,0 +1,86 @@
+"""
+Long-lived thread and process pools shared within the process, so that generating slides or decks doesn't start and
+stop workers for every round of work.
+"""
+import atexit
+import itertools
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from typing import Any, Callable, Dict, Iterable, Iterator
+
+logger = logging.getLogger("talkgenerator")
+
+_executors: Dict[str, Executor] = {}
+_executors_lock = threading.Lock()
+
+
+def get_executor(name: str, max_workers: int) -> ThreadPoolExecutor:
+    """ Returns the shared executor with the given name, creating it with max_workers threads on first use """
+    with _executors_lock:
+        executor = _executors.get(name)
+        if executor is None:
+            logger.debug(
+                "Creating executor '{}' with {} workers".format(name, max_workers)
+            )
+            executor = ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix="talkgenerator-" + name
+            )
+            _executors[name] = executor
+        return executor
+
+
+def get_process_executor(
+    name: str, max_workers: int, initializer: Callable[[], None] = None
+) -> ProcessPoolExecutor:
+    """ Returns the shared process pool with the given name, for CPU-bound work that would otherwise hold the GIL.
+    The workers are spawned rather than forked, as forking a process with running threads can deadlock.
+    The initializer is called in every worker when it starts """
+    key = "processes-" + name
+    with _executors_lock:
+        executor = _executors.get(key)
+        if executor is None:
+            logger.debug(
+                "Creating process pool '{}' with {} workers".format(name, max_workers)
+            )
+            executor = ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=initializer,
+            )
+            _executors[key] = executor
+        return executor
+
+
+def imap_unordered(
+    submit: Callable[[Any], Future], items: Iterable, max_pending: int
+) -> Iterator[Any]:
+    """ Submits every item, yielding the results in the order they finish. Items are only taken from the iterable
+    while fewer than max_pending are unfinished, so it can be a long or endless stream """
+    items = iter(items)
+    pending = {submit(item) for item in itertools.islice(items, max_pending)}
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for item in itertools.islice(items, len(done)):
+            pending.add(submit(item))
+        for future in done:
+            yield future.result()
+
+
+def shutdown_executors(wait: bool = True):
+    with _executors_lock:
+        executors = list(_executors.values())
+        _executors.clear()
+    for executor in executors:
+        executor.shutdown(wait=wait)
+
+
+atexit.register(shutdown_executors, False)
@@ -0,0 +1,78 @@
+"""
+Time budgets for generating decks and slides.
+The deadline of a slide is stored in its presentation context, and is also made available to the code running for
+that slide (e.g. generators only receiving a seed, or source calls) through a context variable.
+"""
+import contextlib
+import contextvars
+import logging
+import time
+from typing import Optional
+
+from talkgenerator import settings
+
+logger = logging.getLogger("talkgenerator")
+
+
+class Deadline(object):
+    """ A point in time before which some work should be finished """
+
+    def __init__(self, seconds: float):
+        self._end = time.monotonic() + seconds
+
+    @classmethod
+    def earliest(cls, *deadlines: Optional["Deadline"]) -> Optional["Deadline"]:
+        actual_deadlines = [deadline for deadline in deadlines if deadline is not None]
+        if len(actual_deadlines) == 0:
+            return None
+        return min(actual_deadlines, key=lambda deadline: deadline._end)
+
+    def remaining(self) -> float:
+        return self._end - time.monotonic()
+
+    def is_expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def is_nearly_expired(self) -> bool:
+        """ Whether so little time is left that only cheap, offline work should still be started """
+        return self.remaining() <= settings.generation_settings()["deadline_margin"]
+
+    def __repr__(self):
+        return "Deadline({}s left)".format(round(self.remaining(), 2))
+
+
+_current_deadline: contextvars.ContextVar = contextvars.ContextVar(
+    "talkgenerator_deadline", default=None
+)
+
+
+def get_current() -> Optional[Deadline]:
+    return _current_deadline.get()
+
+
+@contextlib.contextmanager
+def using(deadline: Optional[Deadline]):
+    """ Makes the given deadline the current one for the code in the with-block """
+    token = _current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current_deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """ Seconds left before the current deadline, or None if there is no deadline """
+    deadline = get_current()
+    if deadline is None:
+        return None
+    return deadline.remaining()
+
+
+def is_expired() -> bool:
+    deadline = get_current()
+    return deadline is not None and deadline.is_expired()
+
+
+def is_nearly_expired() -> bool:
+    deadline = get_current()
+    return deadline is not None and deadline.is_nearly_expired()
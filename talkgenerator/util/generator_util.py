@@ -7,12 +7,14 @@ import sys
 import random
 import logging
 import inspect
-from typing import Callable, Optional, Dict, Union, Tuple
+from typing import Callable, Optional, Dict, List, Union, Tuple
 
 import requests
 
+from talkgenerator import settings
 from talkgenerator.datastructures.image_data import ImageData
-from talkgenerator.util import random_util, os_util
+from talkgenerator.util import random_util, os_util, deadline_util, image_util
+from talkgenerator.util import image_hash_util
 
 logger = logging.getLogger("talkgenerator")
 
@@ -75,6 +77,9 @@ class CombinedGenerator(Generator):
             logger.debug("generated: {}".format(generated))
             if generated is not None:
                 return generated
+            # Don't try other alternatives if the time budget is spent
+            if deadline_util.is_expired():
+                return None
             _remove_object_from_weighted_list(current_weighted_generators, generator)
 
 
@@ -210,17 +215,65 @@ class ExternalImageListGenerator(Generator):
         images = self._image_generator(presentation_context)
         # logger.debug('images: {}'.format(images))
         logger.debug('****************************************************************')
+        if images:
+            # The list can come from a cache, so it is copied before images get removed from it
+            images = list(images)
 
         while bool(images) and len(images) > 0:
-            original_chosen_image = (
-                random_util.weighted_random([image for image in images if image[0] > 0])
-                if self._weighted
-                else random.choice(images)
+            candidates = self._choose_candidates(images)
+            if not candidates:
+                break
+
+            # Check a few candidates at once, such that one dead link doesn't cost a full round trip
+            validity = (
+                image_util.validate_image_urls(
+                    [image.get_image_url() for _, image in candidates]
+                )
+                if self._check_image_validness
+                else {}
             )
+            for entry, chosen_image in candidates:
+                image_url = chosen_image.get_image_url()
+                if not validity.get(image_url, True):
+                    images.remove(entry)
+                    continue
+
+                # Already start downloading the image while the rest of the presentation is generated
+                image_util.prefetch(image_url)
+                if not image_hash_util.is_acceptable_image(
+                    image_url, presentation_context.get("image_hashes")
+                ):
+                    images.remove(entry)
+                    continue
+                return chosen_image
+        return None
+
+    def _choose_candidates(self, images) -> List[Tuple[object, ImageData]]:
+        """ Randomly chooses some different entries of the images list, together with the image they hold """
+        number_of_candidates = (
+            settings.image_settings()["validation_batch_size"]
+            if self._check_image_validness
+            else 1
+        )
+        remaining = list(images)
+        candidates = []
+        while remaining and len(candidates) < number_of_candidates:
+            if self._weighted:
+                entry = random_util.weighted_random(
+                    [(image[0], image) for image in remaining if image[0] > 0]
+                )
+                if entry is None:
+                    break
+                original_chosen_image = entry[1]
+            else:
+                entry = random.choice(remaining)
+                original_chosen_image = entry
+            remaining.remove(entry)
+
             if isinstance(original_chosen_image, str):
-                chosen_image = ImageData(image_url=original_chosen_image)
+                candidates.append((entry, ImageData(image_url=original_chosen_image)))
             elif isinstance(original_chosen_image, ImageData):
-                chosen_image = original_chosen_image
+                candidates.append((entry, original_chosen_image))
             else:
                 logger.warning(
                     "INVALID IMAGE INPUT FOR EXTERNAL IMAGE GENERATOR / "
@@ -228,11 +281,8 @@ class ExternalImageListGenerator(Generator):
                     + " / "
                     + str(type(original_chosen_image))
                 )
-                images.remove(original_chosen_image)
-                continue
-
-            return chosen_image
-        return None
+                images.remove(entry)
+        return candidates
 
 
 class BackupGenerator(Generator):
@@ -242,7 +292,7 @@ class BackupGenerator(Generator):
     def __call__(self, context):
         for generator in self._generator_list:
             generated = generator(context)
-            if generated:
+            if generated or deadline_util.is_expired():
                 return generated
 
 
@@ -0,0 +1,114 @@
+"""
+Shared HTTP access for the source modules.
+All sessions use the same connection pools, so concurrently generated slides reuse keep-alive connections to the
+same hosts, and every request gets a default timeout and retries with an exponential backoff.
+"""
+import logging
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from talkgenerator import settings
+from talkgenerator.util import deadline_util, tracing_util
+
+logger = logging.getLogger("talkgenerator")
+
+_RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """ HTTP adapter that applies a default (connect, read) timeout to requests that don't specify one,
+    and that never waits longer than the current deadline allows """
+
+    def __init__(self, timeout, *args, **kwargs):
+        self._timeout = timeout
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self._timeout
+        remaining = deadline_util.remaining()
+        if remaining is not None:
+            if remaining <= 0:
+                raise requests.exceptions.Timeout(
+                    "Deadline passed before requesting {}".format(request.url),
+                    request=request,
+                )
+            kwargs["timeout"] = _clamp_timeout(kwargs["timeout"], remaining)
+        with tracing_util.span(
+            urlsplit(request.url).netloc,
+            tracing_util.HTTP_REQUEST,
+            method=request.method,
+        ) as request_span:
+            response = super().send(request, **kwargs)
+            request_span.set_attribute("status", response.status_code)
+            retries = getattr(getattr(response.raw, "retries", None), "history", ())
+            if retries:
+                request_span.set_attribute("retries", len(retries))
+            return response
+
+
+def _clamp_timeout(timeout, maximum):
+    if isinstance(timeout, tuple):
+        return tuple(_clamp_timeout(part, maximum) for part in timeout)
+    if timeout is None:
+        return maximum
+    return min(timeout, maximum)
+
+
+_adapter = None
+_adapter_lock = threading.Lock()
+_local = threading.local()
+
+
+def get_adapter() -> TimeoutHTTPAdapter:
+    """ The adapter holding the connection pools shared by all sessions """
+    global _adapter
+    with _adapter_lock:
+        if _adapter is None:
+            http_settings = settings.http_settings()
+            retry = Retry(
+                total=http_settings["retries"],
+                backoff_factor=http_settings["backoff_factor"],
+                status_forcelist=_RETRY_STATUSES,
+                raise_on_status=False,
+            )
+            _adapter = TimeoutHTTPAdapter(
+                timeout=(
+                    http_settings["connect_timeout"],
+                    http_settings["read_timeout"],
+                ),
+                pool_connections=http_settings["pool_connections"],
+                pool_maxsize=http_settings["pool_maxsize"],
+                max_retries=retry,
+            )
+        return _adapter
+
+
+def create_session() -> requests.Session:
+    """ Creates a new session (with its own cookies) that uses the shared connection pools """
+    session = requests.Session()
+    adapter = get_adapter()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def get_session() -> requests.Session:
+    """ Returns the session of the current thread, as sessions themselves are not guaranteed to be thread-safe """
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = create_session()
+        _local.session = session
+    return session
+
+
+def get(url, **kwargs) -> requests.Response:
+    return get_session().get(url, **kwargs)
+
+
+def head(url, **kwargs) -> requests.Response:
+    return get_session().head(url, **kwargs)
@@ -0,0 +1,198 @@
+"""
+Perceptual hashes of images, for recognising images that look (nearly) the same even if their files differ, such as the
+"image removed" placeholders of image hosts, or the same picture found on several sites.
+"""
+import logging
+import os
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from io import BytesIO
+from typing import Dict, Optional, Set
+
+from PIL import Image
+
+from talkgenerator import settings
+from talkgenerator.datastructures.image_data import ImageData
+from talkgenerator.util import image_util, os_util
+
+logger = logging.getLogger("talkgenerator")
+
+HASH_BITS = 64
+_PROHIBITED_IMAGES_DIR = "data/prohibited_images/"
+
+
+def difference_hash(content: bytes) -> Optional[int]:
+    """ 64 bit dHash: whether each pixel is brighter than its right neighbour, in a 9x8 grayscale thumbnail """
+    try:
+        image = Image.open(BytesIO(content))
+        image.draft("L", (9, 8))
+        pixels = list(image.convert("L").resize((9, 8), Image.BILINEAR).getdata())
+    except Exception as e:
+        logger.debug("Could not hash image: {}".format(e))
+        return None
+
+    image_hash = 0
+    for row in range(8):
+        for column in range(8):
+            left = pixels[row * 9 + column]
+            right = pixels[row * 9 + column + 1]
+            image_hash = (image_hash << 1) | (left > right)
+    return image_hash
+
+
+def hamming_distance(first_hash: int, second_hash: int) -> int:
+    return bin(first_hash ^ second_hash).count("1")
+
+
+def _get_band_offsets(number_of_bands: int):
+    """ The offset and width of every band, such that the bands are as wide as possible and together cover the hash """
+    band_bits, wider_bands = divmod(HASH_BITS, number_of_bands)
+    offsets = []
+    offset = 0
+    for band in range(number_of_bands):
+        bits = band_bits + 1 if band < wider_bands else band_bits
+        offsets.append((offset, bits))
+        offset += bits
+    return offsets
+
+
+class ImageHashIndex(object):
+    """ Finds images with a hash within max_distance bits of a given hash, without comparing it to every image.
+    The hashes are split in max_distance + 1 bands covering all bits: hashes that are close enough have at least one
+    identical band, so only the images sharing a band have to be compared """
+
+    def __init__(self, max_distance: int = None):
+        if max_distance is None:
+            max_distance = settings.image_settings()["duplicate_distance"]
+        self._max_distance = max_distance
+        self._band_offsets = _get_band_offsets(min(max_distance + 1, HASH_BITS))
+        self._bands: Dict[tuple, Set[int]] = {}
+        self._keys: Dict[int, Set[str]] = {}
+        self._lock = threading.Lock()
+
+    def _get_bands(self, image_hash: int):
+        return [
+            (band, (image_hash >> offset) & ((1 << bits) - 1))
+            for band, (offset, bits) in enumerate(self._band_offsets)
+        ]
+
+    def add(self, image_hash: int, key: str):
+        with self._lock:
+            self._keys.setdefault(image_hash, set()).add(key)
+            for band in self._get_bands(image_hash):
+                self._bands.setdefault(band, set()).add(image_hash)
+
+    def find(self, image_hash: int, ignored_key: str = None) -> Optional[str]:
+        """ Returns the key of an image that looks like the image with the given hash, other than the ignored key """
+        with self._lock:
+            candidates = set()
+            for band in self._get_bands(image_hash):
+                candidates.update(self._bands.get(band, ()))
+            for candidate in candidates:
+                if hamming_distance(candidate, image_hash) <= self._max_distance:
+                    other_keys = self._keys[candidate] - {ignored_key}
+                    if other_keys:
+                        return next(iter(other_keys))
+        return None
+
+    def __len__(self):
+        with self._lock:
+            return sum(len(keys) for keys in self._keys.values())
+
+
+@lru_cache(maxsize=1)
+def get_prohibited_index() -> ImageHashIndex:
+    """ The index of the placeholders that image hosts show for removed or unavailable images """
+    index = ImageHashIndex()
+    actual_dir = os_util.to_actual_file(_PROHIBITED_IMAGES_DIR)
+    for file_name in os.listdir(actual_dir):
+        with open(os.path.join(actual_dir, file_name), "rb") as image_file:
+            image_hash = difference_hash(image_file.read())
+        if image_hash is not None:
+            index.add(image_hash, file_name)
+    return index
+
+
+# Hashes of the images seen by this process, such that every image is only hashed once
+_MAX_KNOWN_HASHES = 4096
+_known_hashes: "OrderedDict[str, int]" = OrderedDict()
+_known_hashes_lock = threading.Lock()
+
+
+def get_known_image_hash(url: str) -> Optional[int]:
+    with _known_hashes_lock:
+        return _known_hashes.get(url)
+
+
+def get_image_hash(url: str) -> Optional[int]:
+    """ Returns the hash of the image at the given url if it is already downloaded, i.e. prefetched or stored, and
+    None otherwise. Nothing waits for downloads, so prefetching keeps overlapping with generating other slides """
+    image_hash = get_known_image_hash(url)
+    if image_hash is not None:
+        return image_hash
+    content = image_util.get_available_bytes(url)
+    if not content:
+        return None
+    image_hash = difference_hash(content)
+    if image_hash is not None:
+        with _known_hashes_lock:
+            _known_hashes[url] = image_hash
+            while len(_known_hashes) > _MAX_KNOWN_HASHES:
+                _known_hashes.popitem(last=False)
+    return image_hash
+
+
+def is_acceptable_image(url: str, deck_index: Optional[ImageHashIndex]) -> bool:
+    """ Whether the image is not a prohibited placeholder, nor looks like a different image already in the deck.
+    Images that are not downloaded yet are accepted, and are compared to the deck again when their slide is added """
+    if not settings.image_settings()["check_duplicates"] or not (
+        image_util.is_external_url(url)
+    ):
+        return True
+    image_hash = get_image_hash(url)
+    if image_hash is None:
+        return True
+
+    prohibited = get_prohibited_index().find(image_hash)
+    if prohibited is not None:
+        logger.info("Rejecting image {}, which looks like {}".format(url, prohibited))
+        return False
+    if deck_index is not None:
+        duplicate = deck_index.find(image_hash, ignored_key=url)
+        if duplicate is not None:
+            logger.info(
+                "Rejecting image {}, which looks like {} in the deck".format(
+                    url, duplicate
+                )
+            )
+            return False
+    return True
+
+
+def _get_image_urls(generated_elements):
+    for element in generated_elements:
+        if isinstance(element, ImageData):
+            yield element.get_image_url()
+        elif isinstance(element, str):
+            if image_util.is_external_url(element) and os_util.is_image(element):
+                yield element
+        elif isinstance(element, (tuple, list)):
+            yield from _get_image_urls(element)
+
+
+def has_duplicate_images(generated_elements, deck_index: ImageHashIndex) -> bool:
+    """ Whether any of the already downloaded images of a slide looks like a different image in the deck """
+    for url in _get_image_urls(generated_elements):
+        image_hash = get_image_hash(url)
+        if image_hash is not None and deck_index.find(image_hash, url) is not None:
+            return True
+    return False
+
+
+def add_images(generated_elements, deck_index: ImageHashIndex):
+    """ Adds the already downloaded images of a slide to the index of the deck """
+    for url in _get_image_urls(generated_elements):
+        image_hash = get_image_hash(url)
+        if image_hash is not None:
+            deck_index.add(image_hash, url)
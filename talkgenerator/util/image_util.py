@@ -0,0 +1,575 @@
+"""
+Downloading of the images shown on slides.
+Images are prefetched on a bounded pool as soon as a generator chooses them, such that their transfer overlaps with the
+generation of the other slides, and saving the presentation only has to pick up the downloaded bytes.
+Downloaded images are kept in a content-addressed store on disk, shared by all processes, so popular images are only
+downloaded once.
+Chosen images are validated with HEAD (or small ranged GET) requests, so dead links are found while the slides are still
+being generated.
+The dimensions of images are read from the first bytes of their header, rather than by decoding them.
+Before being embedded, oversized images are downscaled to the resolution they are shown at, and recompressed.
+"""
+import contextvars
+import hashlib
+import logging
+import os
+import sqlite3
+import struct
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from io import BytesIO
+from concurrent.futures import CancelledError, Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Dict, List, Optional, Tuple
+
+import requests
+from PIL import Image
+
+from talkgenerator import settings
+from talkgenerator.util import cache_util, concurrency_util, deadline_util, http_util
+
+logger = logging.getLogger("talkgenerator")
+
+
+class ImageStore(object):
+    """ Content-addressed store of image bytes on disk.
+    An SQLite index maps urls to the SHA-256 hash of their content, and every distinct content is stored once, in a
+    file named after its hash. When the files exceed max_bytes, the least recently used ones are removed """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self._directory = directory
+        self._max_bytes = max_bytes
+        self._local = threading.local()
+
+    def _get_connection(self) -> sqlite3.Connection:
+        # SQLite connections can not be shared between threads, so every thread gets its own
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            os.makedirs(self._directory, exist_ok=True)
+            connection = sqlite3.connect(
+                os.path.join(self._directory, "index.sqlite"),
+                timeout=30,
+                isolation_level=None,
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS urls (url TEXT PRIMARY KEY, hash TEXT)"
+            )
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS blobs "
+                "(hash TEXT PRIMARY KEY, size INTEGER, last_used REAL)"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS urls_hash ON urls (hash)")
+            self._local.connection = connection
+        return connection
+
+    def _get_blob_file(self, content_hash: str) -> str:
+        return os.path.join(self._directory, content_hash[:2], content_hash[2:])
+
+    def get(self, url: str) -> Optional[bytes]:
+        try:
+            connection = self._get_connection()
+            row = connection.execute(
+                "SELECT hash FROM urls WHERE url = ?", (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            content_hash = row[0]
+            try:
+                with open(self._get_blob_file(content_hash), "rb") as blob_file:
+                    content = blob_file.read()
+            except FileNotFoundError:
+                # Evicted by another process
+                connection.execute("DELETE FROM urls WHERE url = ?", (url,))
+                return None
+            connection.execute(
+                "UPDATE blobs SET last_used = ? WHERE hash = ?",
+                (time.time(), content_hash),
+            )
+            return content
+        except sqlite3.Error as e:
+            logger.warning("Could not read from image store: {}".format(e))
+            return None
+
+    def put(self, url: str, content: bytes) -> Optional[str]:
+        """ Stores the content of the image at the given url, returning its hash """
+        content_hash = hashlib.sha256(content).hexdigest()
+        blob_file = self._get_blob_file(content_hash)
+        try:
+            if not os.path.exists(blob_file):
+                _write_atomically(blob_file, content)
+            connection = self._get_connection()
+            connection.execute(
+                "INSERT OR REPLACE INTO blobs (hash, size, last_used) VALUES (?, ?, ?)",
+                (content_hash, len(content), time.time()),
+            )
+            connection.execute(
+                "INSERT OR REPLACE INTO urls (url, hash) VALUES (?, ?)",
+                (url, content_hash),
+            )
+            self._evict(connection)
+        except (OSError, sqlite3.Error) as e:
+            logger.warning("Could not write to image store: {}".format(e))
+            return None
+        return content_hash
+
+    def _evict(self, connection: sqlite3.Connection):
+        total_size = connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM blobs"
+        ).fetchone()[0]
+        if total_size <= self._max_bytes:
+            return
+        for content_hash, size in connection.execute(
+            "SELECT hash, size FROM blobs ORDER BY last_used"
+        ).fetchall():
+            if total_size <= self._max_bytes:
+                break
+            connection.execute("DELETE FROM urls WHERE hash = ?", (content_hash,))
+            connection.execute("DELETE FROM blobs WHERE hash = ?", (content_hash,))
+            try:
+                os.remove(self._get_blob_file(content_hash))
+            except FileNotFoundError:
+                pass
+            total_size -= size
+
+    def get_size_in_bytes(self) -> int:
+        return (
+            self._get_connection()
+            .execute("SELECT COALESCE(SUM(size), 0) FROM blobs")
+            .fetchone()[0]
+        )
+
+    def __str__(self):
+        return "ImageStore[" + self._directory + "]"
+
+
+def _write_atomically(file: str, content: bytes):
+    """ Writes to a temporary file first, such that other processes never see a partially written file """
+    directory = os.path.dirname(file)
+    os.makedirs(directory, exist_ok=True)
+    file_descriptor, temporary_file = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(file_descriptor, "wb") as output:
+            output.write(content)
+        os.replace(temporary_file, file)
+    except BaseException:
+        try:
+            os.remove(temporary_file)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+_image_store: Optional[ImageStore] = None
+_image_store_lock = threading.Lock()
+
+
+def get_image_store() -> Optional[ImageStore]:
+    """ The store shared by this process, or None if storing images is disabled """
+    global _image_store
+    image_settings = settings.image_settings()
+    if not image_settings["store"] or not cache_util.is_enabled():
+        return None
+    if _image_store is None:
+        with _image_store_lock:
+            if _image_store is None:
+                _image_store = ImageStore(
+                    image_settings["store_dir"], image_settings["store_max_bytes"]
+                )
+    return _image_store
+
+
+_prefetched: "OrderedDict[str, Future]" = OrderedDict()
+_prefetched_bytes: Dict[str, int] = {}
+_prefetched_lock = threading.Lock()
+
+
+def is_external_url(url: str) -> bool:
+    return url.startswith("http")
+
+
+def download(url: str) -> Optional[bytes]:
+    """ Downloads the image at the given url, returning None if that failed """
+    try:
+        response = http_util.get(url)
+        response.raise_for_status()
+    except requests.exceptions.RequestException as e:
+        logger.error("Could not download image {}: {}".format(url, e))
+        return None
+    return response.content
+
+
+def fetch(url: str) -> Optional[bytes]:
+    """ Returns the bytes of the image at the given url, from the image store if possible """
+    image_store = get_image_store()
+    if image_store is not None:
+        content = image_store.get(url)
+        if content is not None:
+            return content
+    content = download(url)
+    if content and image_store is not None:
+        image_store.put(url, content)
+    return content
+
+
+def prefetch(url: str) -> Optional[Future]:
+    """ Starts downloading the image at the given url in the background, if it isn't already """
+    image_settings = settings.image_settings()
+    if not image_settings["prefetch"] or not url or not is_external_url(url):
+        return None
+
+    with _prefetched_lock:
+        future = _prefetched.get(url)
+        if future is not None:
+            _prefetched.move_to_end(url)
+            return future
+
+        executor = concurrency_util.get_executor(
+            "images", image_settings["prefetch_workers"]
+        )
+        future = executor.submit(_fetch_prefetched, url)
+        _prefetched[url] = future
+        _evict_prefetched(image_settings)
+        return future
+
+
+def _fetch_prefetched(url: str) -> Optional[bytes]:
+    """ Fetches a prefetched image, and counts its bytes towards the memory that prefetched images may take """
+    content = fetch(url)
+    if content:
+        with _prefetched_lock:
+            if url in _prefetched:
+                _prefetched_bytes[url] = len(content)
+                _evict_prefetched(settings.image_settings())
+    return content
+
+
+def _evict_prefetched(image_settings):
+    """ Forgets the oldest images, so that long-running processes don't keep every image they ever used in memory """
+    total_bytes = sum(_prefetched_bytes.values())
+    while _prefetched and (
+        len(_prefetched) > image_settings["prefetch_max_images"]
+        or total_bytes > image_settings["prefetch_max_bytes"]
+    ):
+        url, evicted = _prefetched.popitem(last=False)
+        evicted.cancel()
+        total_bytes -= _prefetched_bytes.pop(url, 0)
+
+
+def get_image_bytes(url: str, timeout: Optional[float] = None) -> Optional[bytes]:
+    """ Returns the bytes of the image at the given url, waiting at most timeout seconds for its prefetch if there is
+    one """
+    with _prefetched_lock:
+        future = _prefetched.get(url)
+    if future is not None and not future.cancelled():
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            return None
+        except (CancelledError, Exception) as e:
+            logger.warning("Prefetching image {} failed: {}".format(url, e))
+    return fetch(url)
+
+
+def clear_prefetched():
+    with _prefetched_lock:
+        futures = list(_prefetched.values())
+        _prefetched.clear()
+        _prefetched_bytes.clear()
+    for future in futures:
+        future.cancel()
+
+
+# Validation
+
+# Statuses of servers not allowing HEAD requests, for which a ranged GET is tried instead
+_HEAD_NOT_SUPPORTED_STATUSES = (403, 405, 501)
+
+
+def is_valid_image_url(url: str) -> bool:
+    """ Whether the url looks like a downloadable image of an acceptable size. Images that are already downloaded
+    are valid if their size can be read, and images that could not be checked in time are assumed valid """
+    if not is_external_url(url):
+        return True
+    available_bytes = get_available_bytes(url)
+    if available_bytes is not None:
+        return get_content_size(available_bytes) is not None
+    validity = _check_remote_image(url)
+    return validity is not False
+
+
+@cache_util.cached("image_validity", ttl=24 * 60 * 60)
+def _check_remote_image(url: str) -> Optional[bool]:
+    max_bytes = settings.image_settings()["max_download_bytes"]
+    try:
+        response = http_util.head(url, allow_redirects=True)
+        if response.status_code in _HEAD_NOT_SUPPORTED_STATUSES or (
+            response.ok and "Content-Type" not in response.headers
+        ):
+            with http_util.get(
+                url, headers={"Range": "bytes=0-1023"}, stream=True
+            ) as response:
+                return _is_valid_image_response(response, max_bytes)
+        return _is_valid_image_response(response, max_bytes)
+    except requests.exceptions.Timeout:
+        # Not known, so not cached
+        return None
+    except requests.exceptions.RequestException as e:
+        logger.info("Image {} is not reachable: {}".format(url, e))
+        return False
+
+
+def _is_valid_image_response(response: requests.Response, max_bytes: int) -> bool:
+    if not response.ok:
+        return False
+    content_type = response.headers.get("Content-Type", "")
+    if content_type and not content_type.lower().startswith("image/"):
+        return False
+    # For ranged responses, the full size is after the slash in the Content-Range header
+    content_range = response.headers.get("Content-Range", "")
+    size = (
+        content_range.rsplit("/", 1)[-1]
+        if "/" in content_range
+        else response.headers.get("Content-Length")
+    )
+    if size and size.isdigit() and int(size) > max_bytes:
+        return False
+    return True
+
+
+def get_check_timeout() -> float:
+    """ How long a slide waits for checking an image, which is at most the time left before its deadline """
+    timeout = settings.image_settings()["check_timeout"]
+    remaining = deadline_util.remaining()
+    if remaining is None:
+        return timeout
+    return max(0.0, min(timeout, remaining))
+
+
+def validate_image_urls(urls: List[str]) -> Dict[str, bool]:
+    """ Checks the validity of the given image urls concurrently. The checks have their own small pool, so they don't
+    queue behind the downloads of the image workers, and images that could not be checked in time are assumed valid """
+    image_settings = settings.image_settings()
+    if not image_settings["validate"]:
+        return {url: True for url in urls}
+    executor = concurrency_util.get_executor(
+        "image validation", image_settings["validation_workers"]
+    )
+    # The checks run with the deadline of the caller, such that they don't take longer than the slide may
+    futures = {
+        url: executor.submit(contextvars.copy_context().run, is_valid_image_url, url)
+        for url in urls
+    }
+    end = time.monotonic() + get_check_timeout()
+    validity = {}
+    for url, future in futures.items():
+        try:
+            validity[url] = future.result(timeout=max(0.0, end - time.monotonic()))
+        except FutureTimeoutError:
+            # Unknown, the check finishes in the background and its result is cached for next time
+            validity[url] = True
+        except Exception as e:
+            logger.warning("Could not validate image {}: {}".format(url, e))
+            validity[url] = True
+    return validity
+
+
+# Dimensions
+
+# Enough to reach the size in the header of nearly every JPEG, even those with large EXIF data or thumbnails before it
+HEADER_BYTES = 64 * 1024
+
+_JPEG_START_OF_FRAME_MARKERS = {
+    0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF
+}
+
+
+def probe_size(header: bytes) -> Optional[Tuple[int, int]]:
+    """ Returns the (width, height) of a PNG, GIF or JPEG image from the first bytes of its content """
+    if header[:8] == b"\x89PNG\r\n\x1a\n" and len(header) >= 24:
+        return struct.unpack(">II", header[16:24])
+    if header[:6] in (b"GIF87a", b"GIF89a") and len(header) >= 10:
+        return struct.unpack("<HH", header[6:10])
+    if header[:2] == b"\xff\xd8":
+        return _probe_jpeg_size(header)
+    return None
+
+
+def get_content_size(content: bytes) -> Optional[Tuple[int, int]]:
+    """ Returns the (width, height) of an image from its content, reading its header with PIL if it is not a format
+    that can be probed, or if the size is not in its first bytes """
+    size = probe_size(content[:HEADER_BYTES])
+    if size is not None:
+        return size
+    try:
+        # Only reads the header, without decoding the image
+        with Image.open(BytesIO(content)) as image:
+            return image.size
+    except Exception:
+        return None
+
+
+def _probe_jpeg_size(header: bytes) -> Optional[Tuple[int, int]]:
+    position = 2
+    while position + 4 <= len(header):
+        if header[position] != 0xFF:
+            return None
+        marker = header[position + 1]
+        if marker == 0xFF:
+            # Fill byte
+            position += 1
+            continue
+        if marker == 0xD8 or 0xD0 <= marker <= 0xD7:
+            # Markers without a length
+            position += 2
+            continue
+        (length,) = struct.unpack(">H", header[position + 2 : position + 4])
+        if marker in _JPEG_START_OF_FRAME_MARKERS:
+            if position + 9 > len(header):
+                return None
+            height, width = struct.unpack(">HH", header[position + 5 : position + 9])
+            return width, height
+        position += 2 + length
+    return None
+
+
+def get_available_bytes(url: str) -> Optional[bytes]:
+    """ The bytes of the image if they are present without downloading, i.e. prefetched or stored """
+    with _prefetched_lock:
+        future = _prefetched.get(url)
+    if future is not None and future.done() and not future.cancelled():
+        if future.exception() is None and future.result():
+            return future.result()
+    image_store = get_image_store()
+    if image_store is not None:
+        return image_store.get(url)
+    return None
+
+
+def get_image_size(url: str) -> Optional[Tuple[int, int]]:
+    """ Returns the (width, height) of the image at the given url or path, without decoding it """
+    if not is_external_url(url):
+        try:
+            with open(url, "rb") as image_file:
+                return probe_size(image_file.read(HEADER_BYTES))
+        except OSError as e:
+            logger.error("Could not read image {}: {}".format(url, e))
+            return None
+
+    available_bytes = get_available_bytes(url)
+    if available_bytes is not None:
+        return get_content_size(available_bytes)
+    return _probe_remote_size(url)
+
+
+@cache_util.cached("image_size", ttl=30 * 24 * 60 * 60)
+def _probe_remote_size(url: str) -> Optional[Tuple[int, int]]:
+    """ Reads the size of a remote image by only requesting the start of its content """
+    try:
+        with http_util.get(
+            url, headers={"Range": "bytes=0-{}".format(HEADER_BYTES - 1)}, stream=True
+        ) as response:
+            response.raise_for_status()
+            # Servers not supporting ranges send everything, of which only the start is read
+            header = response.raw.read(HEADER_BYTES, decode_content=True)
+    except requests.exceptions.RequestException as e:
+        logger.error("Could not read size of image {}: {}".format(url, e))
+        return None
+    return probe_size(header)
+
+
+# Normalisation
+
+EMU_PER_INCH = 914400
+
+
+def normalise(
+    content: bytes,
+    target_size: Optional[Tuple[int, int]],
+    max_pixels: int,
+    jpeg_quality: int,
+) -> bytes:
+    """ Downscales the image to just cover the target (width, height) in pixels, as placeholders are filled by cropping
+    the image, but to at most max_pixels, and recompresses it. Returns the original content if that is already smaller,
+    or if the image can not be normalised """
+    try:
+        image = Image.open(BytesIO(content))
+        if getattr(image, "is_animated", False):
+            # Recompressing would lose the animation
+            return content
+
+        width, height = image.size
+        scale = (max_pixels / (width * height)) ** 0.5
+        if target_size is not None:
+            scale = min(
+                scale, max(target_size[0] / width, target_size[1] / height)
+            )
+        scale = min(scale, 1)
+        new_size = (max(1, int(width * scale)), max(1, int(height * scale)))
+
+        # Lets JPEGs be decoded at a lower resolution straight away
+        image.draft("RGB", new_size)
+        if new_size != image.size:
+            image = image.resize(new_size, Image.LANCZOS)
+
+        output = BytesIO()
+        if image.mode in ("RGBA", "LA") or (
+            image.mode == "P" and "transparency" in image.info
+        ):
+            image.save(output, format="PNG", optimize=True)
+        else:
+            exif = image.info.get("exif")
+            image.convert("RGB").save(
+                output,
+                format="JPEG",
+                quality=jpeg_quality,
+                optimize=True,
+                **({"exif": exif} if exif else {})
+            )
+    except Exception as e:
+        logger.warning("Could not normalise image: {}".format(e))
+        return content
+
+    normalised = output.getvalue()
+    if len(normalised) >= len(content):
+        return content
+    return normalised
+
+
+def to_pixels(size_in_emu: Tuple[int, int], dpi: int) -> Tuple[int, int]:
+    return (
+        max(1, round(size_in_emu[0] * dpi / EMU_PER_INCH)),
+        max(1, round(size_in_emu[1] * dpi / EMU_PER_INCH)),
+    )
+
+
+def normalise_for_placeholder(
+    content: bytes, placeholder_size_in_emu: Optional[Tuple[int, int]]
+) -> bytes:
+    """ Normalises the image for showing in a placeholder of the given size, in a process pool if configured """
+    image_settings = settings.image_settings()
+    if not content or not image_settings["normalise"]:
+        return content
+
+    target_size = (
+        to_pixels(placeholder_size_in_emu, image_settings["target_dpi"])
+        if placeholder_size_in_emu
+        else None
+    )
+    arguments = (
+        content,
+        target_size,
+        image_settings["max_pixels"],
+        image_settings["jpeg_quality"],
+    )
+    processes = image_settings["normalise_processes"]
+    if processes <= 0:
+        return normalise(*arguments)
+    try:
+        executor = concurrency_util.get_process_executor("images", processes)
+        return executor.submit(normalise, *arguments).result()
+    except Exception as e:
+        logger.warning("Could not normalise image in process pool: {}".format(e))
+        return content
@@ -2,9 +2,7 @@
 import logging
 import re
 import string
-
-import inflect
-import nltk
+import threading
 
 logger = logging.getLogger("talkgenerator")
 
@@ -23,6 +21,8 @@ def check_and_download():
 
 
 def _check_and_download_corpus(corpus_fullname, corpus_shortname):
+    import nltk
+
     try:
         nltk.data.find(corpus_fullname)
     except LookupError as le:
@@ -64,6 +64,8 @@ def replace_word(sentence, word, replacement):
 
 def get_pos_tags(word):
     """ Returns all possible POS tags for a given word according to nltk """
+    import nltk
+
     tags = nltk.pos_tag(nltk.word_tokenize(word))
     tags_strings = [tag[1] for tag in tags]
     # print(word, ":", tags_strings)
@@ -154,28 +156,48 @@ def to_ing_form(passed_string):
     return result
 
 
-inflect_engine = inflect.engine()
+# Creating the inflect engine is slow (it type-checks its whole API on import), so it is only done on first use
+_inflect_engine = None
+_inflect_engine_lock = threading.Lock()
+
+
+def get_inflect_engine():
+    global _inflect_engine
+    if _inflect_engine is None:
+        with _inflect_engine_lock:
+            if _inflect_engine is None:
+                import inflect
+
+                _inflect_engine = inflect.engine()
+    return _inflect_engine
+
+
+def __getattr__(name):
+    # Backwards compatibility for the former module-level engine
+    if name == "inflect_engine":
+        return get_inflect_engine()
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
 
 
 def is_singular(word):
-    return inflect_engine.singular_noun(word) is False
+    return get_inflect_engine().singular_noun(word) is False
 
 
 def is_plural(word):
-    return bool(inflect_engine.singular_noun(word))
+    return bool(get_inflect_engine().singular_noun(word))
 
 
 def to_plural(word):
     if is_singular(word):
         if word.startswith("a "):
             word = word[2:]
-        return inflect_engine.plural(word)
+        return get_inflect_engine().plural(word)
     return word
 
 
 def to_singular(word):
     if is_plural(word):
-        return inflect_engine.singular_noun(word)
+        return get_inflect_engine().singular_noun(word)
     return word
 
 
@@ -218,6 +240,8 @@ def is_verb(word):
 
 
 def get_last_noun_and_article(sentence):
+    import nltk
+
     tokens = nltk.word_tokenize(sentence)
     tags = nltk.pos_tag(tokens)
 
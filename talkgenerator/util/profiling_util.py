@@ -0,0 +1,243 @@
+"""
+Profiling of the start-up of the generator: how much time and memory goes to importing modules, parsing grammars,
+checking the runtime environment and building schemas. Grammars are only loaded when first used, so the time spent
+generating the slides is measured too, and the grammars loaded during it are reported on their own.
+Profiling is off by default, in which case measuring a block costs next to nothing.
+"""
+import builtins
+import contextlib
+import importlib.util
+import logging
+import sys
+import threading
+import time
+import tracemalloc
+from collections import namedtuple
+from typing import Dict, List, Optional
+
+logger = logging.getLogger("talkgenerator")
+
+IMPORT_CATEGORY = "import"
+
+ProfileRecord = namedtuple(
+    "ProfileRecord", ["category", "name", "seconds", "self_seconds", "memory"]
+)
+
+
+class _Measurement(object):
+    def __init__(self, category: str, name: str, memory: int):
+        self.category = category
+        self.name = name
+        self.start = time.perf_counter()
+        self.start_memory = memory
+        self.children_seconds = 0.0
+
+
+class StartupProfiler(object):
+    """ Records how long (and how much traced memory) named blocks of work take, including module imports """
+
+    def __init__(self, trace_memory: bool = True):
+        self._trace_memory = trace_memory
+        self._started_tracing = False
+        self._original_import = None
+        self._records: List[ProfileRecord] = []
+        self._records_lock = threading.Lock()
+        self._local = threading.local()
+        self._start = None
+        self._seconds = None
+        self._peak_memory = 0
+
+    # Lifecycle
+
+    def start(self):
+        if self._trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        self._original_import = builtins.__import__
+        builtins.__import__ = self._profiled_import
+        self._start = time.perf_counter()
+
+    def stop(self):
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+        self._seconds = time.perf_counter() - self._start
+        self._peak_memory = self._get_memory(peak=True)
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def is_running(self) -> bool:
+        return self._original_import is not None
+
+    # Measuring
+
+    @contextlib.contextmanager
+    def measure(self, category: str, name: str):
+        stack = self._get_stack()
+        measurement = _Measurement(category, name, self._get_memory())
+        stack.append(measurement)
+        try:
+            yield
+        finally:
+            stack.pop()
+            seconds = time.perf_counter() - measurement.start
+            if stack:
+                stack[-1].children_seconds += seconds
+            with self._records_lock:
+                self._records.append(
+                    ProfileRecord(
+                        category,
+                        name,
+                        seconds,
+                        seconds - measurement.children_seconds,
+                        self._get_memory() - measurement.start_memory,
+                    )
+                )
+
+    def _profiled_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        original_import = self._original_import
+        if original_import is None:
+            return builtins.__import__(name, globals, locals, fromlist, level)
+        full_name = _resolve_name(name, globals, level)
+        if full_name in sys.modules and not fromlist:
+            return original_import(name, globals, locals, fromlist, level)
+
+        number_of_modules = len(sys.modules)
+        with self.measure(IMPORT_CATEGORY, full_name):
+            result = original_import(name, globals, locals, fromlist, level)
+        if len(sys.modules) == number_of_modules:
+            # Nothing was actually loaded, so it is not worth reporting
+            self._forget_last_import(full_name)
+        return result
+
+    def _forget_last_import(self, full_name: str):
+        with self._records_lock:
+            for i in range(len(self._records) - 1, -1, -1):
+                record = self._records[i]
+                if record.category == IMPORT_CATEGORY and record.name == full_name:
+                    del self._records[i]
+                    return
+
+    def _get_stack(self) -> List[_Measurement]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = []
+            self._local.stack = stack
+        return stack
+
+    def _get_memory(self, peak=False) -> int:
+        if not tracemalloc.is_tracing():
+            return 0
+        current, peak_memory = tracemalloc.get_traced_memory()
+        return peak_memory if peak else current
+
+    # Reporting
+
+    def get_records(self, category: Optional[str] = None) -> List[ProfileRecord]:
+        with self._records_lock:
+            records = list(self._records)
+        if category is None:
+            return records
+        return [record for record in records if record.category == category]
+
+    def format_report(self, limit: int = 15) -> str:
+        records = self.get_records()
+        categories: Dict[str, List[ProfileRecord]] = {}
+        for record in records:
+            categories.setdefault(record.category, []).append(record)
+
+        total_seconds = (
+            self._seconds
+            if self._seconds is not None
+            else time.perf_counter() - self._start
+        )
+        lines = ["Startup profile: {:.3f}s in total".format(total_seconds)]
+        if self._trace_memory and self._seconds is not None:
+            lines[0] += ", {} peak traced memory".format(
+                _format_bytes(self._peak_memory)
+            )
+
+        for category, category_records in categories.items():
+            # Imports nest heavily, so these are ranked on the time spent in the module itself
+            sort_key = "self_seconds" if category == IMPORT_CATEGORY else "seconds"
+            category_records.sort(key=lambda r: getattr(r, sort_key), reverse=True)
+            lines.append("")
+            lines.append(
+                "{} ({} measured, {:.3f}s own time):".format(
+                    category,
+                    len(category_records),
+                    sum(record.self_seconds for record in category_records),
+                )
+            )
+            lines.append(
+                "  {:>9} {:>9} {:>10}  {}".format("total", "own", "memory", "name")
+            )
+            for record in category_records[:limit]:
+                lines.append(
+                    "  {:>8.3f}s {:>8.3f}s {:>10}  {}".format(
+                        record.seconds,
+                        record.self_seconds,
+                        _format_bytes(record.memory),
+                        record.name,
+                    )
+                )
+        return "\n".join(lines)
+
+
+def _resolve_name(name, globals, level) -> str:
+    if level == 0 or not globals:
+        return name
+    package = globals.get("__package__") or globals.get("__name__", "")
+    try:
+        return importlib.util.resolve_name("." * level + name, package)
+    except (ImportError, ValueError):
+        return name
+
+
+def _format_bytes(number_of_bytes: int) -> str:
+    return "{:.1f} MB".format(number_of_bytes / (1024 * 1024))
+
+
+# Process-wide profiler
+
+_active_profiler: Optional[StartupProfiler] = None
+
+
+def start_profiling(trace_memory: bool = True) -> StartupProfiler:
+    global _active_profiler
+    if _active_profiler is None:
+        _active_profiler = StartupProfiler(trace_memory=trace_memory)
+        _active_profiler.start()
+    return _active_profiler
+
+
+def stop_profiling() -> Optional[StartupProfiler]:
+    global _active_profiler
+    profiler = _active_profiler
+    _active_profiler = None
+    if profiler is not None and profiler.is_running():
+        profiler.stop()
+    return profiler
+
+
+def is_profiling() -> bool:
+    return _active_profiler is not None
+
+
+@contextlib.contextmanager
+def profile(category: str, name: str):
+    """ Measures the enclosed block if start-up profiling is active """
+    profiler = _active_profiler
+    if profiler is None:
+        yield
+    else:
+        with profiler.measure(category, name):
+            yield
+
+
+def report_startup(stream=None):
+    """ Ends start-up profiling, if it was active, and writes its report """
+    profiler = stop_profiling()
+    if profiler is not None:
+        print(profiler.format_report(), file=stream or sys.stderr)
@@ -0,0 +1,235 @@
+"""
+Tracing where the time of generating decks goes: spans for every deck, slide, attempt of a slide generator, content
+generator, source call and HTTP request, with their durations, cache hits, retries and failure reasons.
+Spans started while another span is active (also in other threads, if the context was copied) become its children.
+Tracing is off by default, in which case a span costs next to nothing.
+Traces are written as JSON lines, or in the Chrome trace event format for chrome://tracing and Perfetto.
+"""
+import contextlib
+import contextvars
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger("talkgenerator")
+
+DECK = "deck"
+SLIDE = "slide"
+GENERATOR_ATTEMPT = "generator attempt"
+CONTENT_GENERATOR = "content generator"
+SOURCE_CALL = "source call"
+HTTP_REQUEST = "http request"
+RENDER = "render"
+
+
+class Span(object):
+    """ A named, timed piece of work, with attributes describing it """
+
+    def __init__(
+        self,
+        span_id: int,
+        name: str,
+        category: str,
+        parent: Optional["Span"],
+        attributes: Dict[str, Any],
+    ):
+        self.span_id = span_id
+        self.name = name
+        self.category = category
+        self.parent_id = parent.span_id if parent is not None else None
+        self.attributes = attributes
+        self.thread_id = threading.get_ident()
+        self.thread_name = threading.current_thread().name
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    @property
+    def seconds(self) -> float:
+        end = self.end if self.end is not None else time.perf_counter()
+        return end - self.start
+
+    def __repr__(self):
+        return "Span({}, {}, {:.3f}s)".format(self.category, self.name, self.seconds)
+
+
+class _NoSpan(object):
+    """ Stands in for a span when not tracing, so that instrumented code doesn't need to check """
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+
+NO_SPAN = _NoSpan()
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar(
+    "talkgenerator_span", default=None
+)
+
+
+class Tracer(object):
+    """ Collects the finished spans of the process """
+
+    def __init__(self):
+        self._spans: List[Span] = []
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._start = time.perf_counter()
+
+    @contextlib.contextmanager
+    def span(self, name: str, category: str, **attributes):
+        span = Span(next(self._ids), name, category, _current_span.get(), attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.set_attribute("error", repr(e))
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end = time.perf_counter()
+            with self._lock:
+                self._spans.append(span)
+
+    def event(self, name: str, category: str, **attributes):
+        """ Records something happening at a single moment, such as a generated slide being rejected """
+        span = Span(next(self._ids), name, category, _current_span.get(), attributes)
+        span.end = span.start
+        with self._lock:
+            self._spans.append(span)
+
+    def get_spans(self, category: Optional[str] = None) -> List[Span]:
+        with self._lock:
+            spans = list(self._spans)
+        if category is None:
+            return spans
+        return [span for span in spans if span.category == category]
+
+    # Exporting
+
+    def write_json_lines(self, stream):
+        """ Writes every span as a JSON object on its own line, with times in seconds since tracing started """
+        for span in sorted(self.get_spans(), key=lambda span: span.start):
+            line = {
+                "id": span.span_id,
+                "parent": span.parent_id,
+                "name": span.name,
+                "category": span.category,
+                "start": round(span.start - self._start, 6),
+                "seconds": round(span.seconds, 6),
+                "thread": span.thread_name,
+                "attributes": span.attributes,
+            }
+            stream.write(json.dumps(line, default=str) + "\n")
+
+    def write_chrome_trace(self, stream):
+        """ Writes the spans in the Chrome trace event format, with a row for every thread """
+        pid = os.getpid()
+        events = []
+        thread_names = {}
+        for span in self.get_spans():
+            thread_names[span.thread_id] = span.thread_name
+            event = {
+                "name": span.name,
+                "cat": span.category,
+                "ts": round((span.start - self._start) * 1e6, 1),
+                "pid": pid,
+                "tid": span.thread_id,
+                "args": dict(span.attributes, id=span.span_id, parent=span.parent_id),
+            }
+            if span.end == span.start:
+                event.update({"ph": "i", "s": "t"})
+            else:
+                event.update({"ph": "X", "dur": round(span.seconds * 1e6, 1)})
+            events.append(event)
+        for thread_id, thread_name in thread_names.items():
+            events.append(
+                {
+                    "name": "thread_name",
+                    "ph": "M",
+                    "pid": pid,
+                    "tid": thread_id,
+                    "args": {"name": thread_name},
+                }
+            )
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, stream, default=str)
+
+    def write(self, file: str):
+        """ Writes a Chrome trace if the file name ends in .json, and JSON lines otherwise """
+        directory = os.path.dirname(file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(file, "w", encoding="utf-8") as stream:
+            if file.endswith(".json"):
+                self.write_chrome_trace(stream)
+            else:
+                self.write_json_lines(stream)
+        logger.info("Wrote trace of {} spans to {}".format(len(self._spans), file))
+
+
+# Process-wide tracer
+
+_active_tracer: Optional[Tracer] = None
+
+
+def start_tracing() -> Tracer:
+    global _active_tracer
+    if _active_tracer is None:
+        _active_tracer = Tracer()
+    return _active_tracer
+
+
+def stop_tracing() -> Optional[Tracer]:
+    global _active_tracer
+    tracer = _active_tracer
+    _active_tracer = None
+    return tracer
+
+
+def is_tracing() -> bool:
+    return _active_tracer is not None
+
+
+@contextlib.contextmanager
+def span(name: str, category: str, **attributes):
+    """ Traces the enclosed block as a span if tracing is active """
+    tracer = _active_tracer
+    if tracer is None:
+        yield NO_SPAN
+    else:
+        with tracer.span(name, category, **attributes) as traced_span:
+            yield traced_span
+
+
+def event(name: str, category: str, **attributes):
+    tracer = _active_tracer
+    if tracer is not None:
+        tracer.event(name, category, **attributes)
+
+
+def get_current_span():
+    """ The innermost active span of this context, to add attributes to """
+    if _active_tracer is None:
+        return NO_SPAN
+    return _current_span.get() or NO_SPAN
+
+
+def describe(function) -> str:
+    """ A short name for a generator or other callable, to name its spans with """
+    name = getattr(function, "__name__", None)
+    if name:
+        return name
+    return type(function).__name__
+
+
+def write_trace(file: str):
+    """ Ends tracing, if it was active, and writes the trace to the given file """
+    tracer = stop_tracing()
+    if tracer is not None:
+        tracer.write(file)
@@ -0,0 +1,104 @@
+import tempfile
+import time
+import unittest
+
+from talkgenerator.util import cache_util
+
+
+class CacheUtilTest(unittest.TestCase):
+    def setUp(self):
+        self._cache_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self._cache_dir.cleanup()
+
+    def test_persistent_cache_survives_new_instance(self):
+        cache = cache_util.PersistentCache("test", cache_dir=self._cache_dir.name)
+        cache.set("cat", {"edges": [1, 2, 3]})
+        other_cache = cache_util.PersistentCache("test", cache_dir=self._cache_dir.name)
+        self.assertEqual((True, {"edges": [1, 2, 3]}), other_cache.get("cat"))
+        self.assertEqual((False, None), other_cache.get("dog"))
+
+    def test_persistent_cache_expires(self):
+        cache = cache_util.PersistentCache(
+            "test", ttl=0.01, cache_dir=self._cache_dir.name
+        )
+        cache.set("cat", "value")
+        time.sleep(0.02)
+        self.assertEqual((False, None), cache.get("cat"))
+
+    def test_make_key_ignores_dict_order(self):
+        self.assertEqual(
+            cache_util.make_key("cat", cache_util.HashableDict(rel="a", limit=10)),
+            cache_util.make_key("cat", cache_util.HashableDict(limit=10, rel="a")),
+        )
+
+    def test_memory_cache_bounded_by_bytes(self):
+        cache = cache_util.MemoryCache(max_bytes=300)
+        cache.set("a", "x" * 100)
+        cache.set("b", "y" * 100)
+        cache.get("a")
+        cache.set("c", "z" * 100)
+        self.assertTrue(cache.get_size_in_bytes() <= 300)
+        self.assertTrue(cache.get("a")[0])
+        self.assertFalse(cache.get("b")[0])
+        self.assertTrue(cache.get("c")[0])
+
+    def test_tiered_cache_fills_faster_tiers(self):
+        memory = cache_util.MemoryCache(max_bytes=10000)
+        redis = cache_util.RedisCache(cache_util.LocalRedis(), "test")
+        redis.set("cat", "value")
+        tiered = cache_util.TieredCache(memory, redis)
+        self.assertEqual((True, "value"), tiered.get("cat"))
+        self.assertEqual((True, "value"), memory.get("cat"))
+
+    def test_promoted_values_keep_their_expiry(self):
+        memory = cache_util.MemoryCache(max_bytes=10000)
+        persistent = cache_util.PersistentCache("test", cache_dir=self._cache_dir.name)
+        persistent.set("cat", "value", ttl=0.05)
+        tiered = cache_util.TieredCache(memory, persistent)
+        self.assertEqual((True, "value"), tiered.get("cat"))
+        self.assertEqual((True, "value"), memory.get("cat"))
+        time.sleep(0.06)
+        self.assertEqual((False, None), memory.get("cat"))
+        self.assertEqual((False, None), tiered.get("cat"))
+
+    def test_expired_rows_pruned_on_open(self):
+        cache = cache_util.PersistentCache("test", cache_dir=self._cache_dir.name)
+        cache.set("cat", "value", ttl=0.01)
+        cache.set("dog", "value")
+        time.sleep(0.02)
+        other_cache = cache_util.PersistentCache("test", cache_dir=self._cache_dir.name)
+        rows = (
+            other_cache._get_connection().execute("SELECT key FROM entries").fetchall()
+        )
+        self.assertEqual([("dog",)], rows)
+
+    def test_source_cache_statistics(self):
+        calls = []
+        source_cache = cache_util.SourceCache(
+            "test", tiers=cache_util.MemoryCache(max_bytes=10000)
+        )
+        for _ in range(3):
+            source_cache.get_or_compute("cat", lambda: calls.append(1) or "value")
+        self.assertEqual(1, len(calls))
+        statistics = source_cache.get_statistics()
+        self.assertEqual(2, statistics["hits"])
+        self.assertEqual(1, statistics["misses"])
+
+    def test_disabled_cache_always_computes(self):
+        calls = []
+        source_cache = cache_util.SourceCache(
+            "test", tiers=cache_util.MemoryCache(max_bytes=10000)
+        )
+        cache_util.set_enabled(False)
+        try:
+            for _ in range(2):
+                source_cache.get_or_compute("cat", lambda: calls.append(1) or "value")
+        finally:
+            cache_util.set_enabled(None)
+        self.assertEqual(2, len(calls))
+
+
+if __name__ == "__main__":
+    unittest.main()
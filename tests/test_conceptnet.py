@@ -1,7 +1,11 @@
 # coding=utf-8
 import unittest
+from unittest import mock
+
+import requests
 
 from talkgenerator.sources import conceptnet
+from talkgenerator.util import cache_util
 
 
 class ConceptNetTest(unittest.TestCase):
@@ -22,6 +26,15 @@ class ConceptNetTest(unittest.TestCase):
         related_words = conceptnet.get_weighted_related_words("my lap", 10)
         self.assertTrue(len(related_words) > 0)
 
+    def test_error_responses_not_used(self):
+        response = requests.Response()
+        response.status_code = 429
+        response._content = b'{"error": "Too many requests"}'
+        cache_util.set_enabled(False)
+        self.addCleanup(cache_util.set_enabled, None)
+        with mock.patch.object(conceptnet.http_util, "get", return_value=response):
+            self.assertIsNone(conceptnet._get_data("cat"))
+
 
 if __name__ == "__main__":
     unittest.main()
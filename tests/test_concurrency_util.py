@@ -0,0 +1,41 @@
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from talkgenerator.util import concurrency_util
+
+
+class ConcurrencyUtilTest(unittest.TestCase):
+    def test_imap_unordered_bounds_pending_items(self):
+        lock = threading.Lock()
+        taken = []
+        pending = []
+        max_pending = []
+
+        def items():
+            for i in range(10):
+                taken.append(i)
+                yield i
+
+        def square(i):
+            with lock:
+                max_pending.append(len(pending))
+                pending.remove(i)
+            return i * i
+
+        def submit(i):
+            with lock:
+                pending.append(i)
+            return executor.submit(square, i)
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = concurrency_util.imap_unordered(submit, items(), 3)
+            self.assertEqual([], taken)
+            self.assertEqual(
+                sorted(i * i for i in range(10)), sorted(list(results))
+            )
+        self.assertLessEqual(max(max_pending), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
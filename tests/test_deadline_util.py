@@ -0,0 +1,36 @@
+import threading
+import unittest
+
+from talkgenerator.util import deadline_util
+from talkgenerator.util.deadline_util import Deadline
+
+
+class DeadlineUtilTest(unittest.TestCase):
+    def test_earliest(self):
+        short = Deadline(1)
+        long = Deadline(100)
+        self.assertIs(short, Deadline.earliest(long, None, short))
+        self.assertIsNone(Deadline.earliest(None, None))
+
+    def test_expired(self):
+        self.assertTrue(Deadline(0).is_expired())
+        self.assertFalse(Deadline(100).is_expired())
+        self.assertTrue(Deadline(0.5).is_nearly_expired())
+
+    def test_current_deadline_is_scoped(self):
+        self.assertIsNone(deadline_util.remaining())
+        with deadline_util.using(Deadline(0)):
+            self.assertTrue(deadline_util.is_expired())
+            # Other threads don't see the deadline
+            other_thread_expired = []
+            thread = threading.Thread(
+                target=lambda: other_thread_expired.append(deadline_util.is_expired())
+            )
+            thread.start()
+            thread.join()
+            self.assertFalse(other_thread_expired[0])
+        self.assertFalse(deadline_util.is_expired())
+
+
+if __name__ == "__main__":
+    unittest.main()
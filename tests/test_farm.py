@@ -0,0 +1,42 @@
+import os
+import unittest
+from unittest import mock
+
+from talkgenerator import farm, settings
+from talkgenerator.util import concurrency_util, image_util
+
+
+class DeckFarmTest(unittest.TestCase):
+    def test_failing_decks_reported_by_worker(self):
+        results = list(
+            farm.generate_presentations_in_processes(
+                ["cat", "dog"], processes=1, schema="unknown schema", slides=1
+            )
+        )
+        self.assertEqual(["cat", "dog"], sorted(result.topic for result in results))
+        for result in results:
+            self.assertIsNotNone(result.error)
+            self.assertIsNone(result.presentation_file)
+            self.assertIsInstance(result.worker, int)
+
+    def test_workers_do_not_create_process_pools(self):
+        list(
+            farm.generate_presentations_in_processes(
+                ["cat"], processes=1, schema="unknown schema", slides=1
+            )
+        )
+        executor = concurrency_util.get_process_executor("decks", 1)
+        self.assertEqual(
+            0, executor.submit(settings.image_settings).result()["normalise_processes"]
+        )
+
+        with mock.patch.dict(os.environ), mock.patch.object(
+            concurrency_util, "get_process_executor"
+        ) as get_process_executor:
+            farm._initialise_worker()
+            image_util.normalise_for_placeholder(b"<html>", (914400, 914400))
+        self.assertFalse(get_process_executor.called)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,29 @@
+import threading
+import unittest
+
+from talkgenerator.util import http_util
+
+
+class HttpUtilTest(unittest.TestCase):
+    def test_sessions_share_connection_pools(self):
+        session = http_util.get_session()
+        other_thread_sessions = []
+        thread = threading.Thread(
+            target=lambda: other_thread_sessions.append(http_util.get_session())
+        )
+        thread.start()
+        thread.join()
+
+        self.assertIs(session, http_util.get_session())
+        self.assertIsNot(session, other_thread_sessions[0])
+        self.assertIs(
+            session.get_adapter("https://api.conceptnet.io"),
+            other_thread_sessions[0].get_adapter("https://www.goodreads.com"),
+        )
+
+    def test_adapter_has_default_timeout(self):
+        self.assertIsNotNone(http_util.get_adapter()._timeout)
+
+
+if __name__ == "__main__":
+    unittest.main()
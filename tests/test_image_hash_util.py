@@ -0,0 +1,106 @@
+import os
+import unittest
+from io import BytesIO
+from unittest import mock
+
+from PIL import Image
+
+from talkgenerator.datastructures.image_data import ImageData
+from talkgenerator.util import image_hash_util, image_util, os_util
+from talkgenerator.util.image_hash_util import ImageHashIndex
+
+
+def _to_bytes(image, image_format="JPEG", **kwargs):
+    output = BytesIO()
+    image.save(output, format=image_format, **kwargs)
+    return output.getvalue()
+
+
+class ImageHashUtilTest(unittest.TestCase):
+    def setUp(self):
+        self.image = Image.effect_mandelbrot((300, 200), (-2, -1, 1, 1), 50).convert(
+            "RGB"
+        )
+        self.other_image = Image.linear_gradient("L").convert("RGB")
+
+    def test_similar_images_have_close_hashes(self):
+        image_hash = image_hash_util.difference_hash(_to_bytes(self.image))
+        resized_hash = image_hash_util.difference_hash(
+            _to_bytes(self.image.resize((150, 100)), "PNG")
+        )
+        other_hash = image_hash_util.difference_hash(_to_bytes(self.other_image))
+        self.assertLessEqual(
+            image_hash_util.hamming_distance(image_hash, resized_hash), 8
+        )
+        self.assertGreater(image_hash_util.hamming_distance(image_hash, other_hash), 8)
+
+    def test_index_finds_other_similar_images(self):
+        index = ImageHashIndex(max_distance=4)
+        index.add(0b1011, "first")
+        self.assertEqual("first", index.find(0b1001))
+        self.assertIsNone(index.find(0b1001, ignored_key="first"))
+        self.assertIsNone(index.find(0b1011 ^ (0b11111 << 40)))
+        self.assertEqual(1, len(index))
+
+    def test_bands_cover_whole_hash(self):
+        for max_distance in [0, 4, 8, 63]:
+            offsets = image_hash_util._get_band_offsets(max_distance + 1)
+            self.assertEqual(max_distance + 1, len(offsets))
+            self.assertEqual(image_hash_util.HASH_BITS, sum(bits for _, bits in offsets))
+            self.assertEqual(
+                [offset for offset, _ in offsets],
+                [sum(bits for _, bits in offsets[:band]) for band in range(len(offsets))],
+            )
+
+    def test_unrelated_hashes_do_not_share_buckets(self):
+        index = ImageHashIndex(max_distance=8)
+        index.add(0x0123456789ABCDEF, "first")
+        index.add(0xFEDCBA9876543210, "second")
+        self.assertTrue(all(len(hashes) == 1 for hashes in index._bands.values()))
+        self.assertEqual(18, len(index._bands))
+
+    def test_prohibited_placeholders_recognised(self):
+        prohibited_dir = os_util.to_actual_file("data/prohibited_images/")
+        with open(os.path.join(prohibited_dir, "imgur_removed.jpg"), "rb") as image_file:
+            placeholder = Image.open(image_file).convert("RGB")
+        smaller_placeholder = _to_bytes(
+            placeholder.resize((placeholder.width // 2, placeholder.height // 2)),
+            quality=60,
+        )
+
+        index = image_hash_util.get_prohibited_index()
+        self.assertIsNotNone(
+            index.find(image_hash_util.difference_hash(smaller_placeholder))
+        )
+        self.assertIsNone(
+            index.find(image_hash_util.difference_hash(_to_bytes(self.image)))
+        )
+
+    def test_only_downloaded_images_hashed(self):
+        first_url = "https://example.com/first.jpg"
+        second_url = "https://example.com/second.jpg"
+        available = {first_url: _to_bytes(self.image)}
+        deck_index = ImageHashIndex()
+        with mock.patch.object(
+            image_util, "get_available_bytes", side_effect=available.get
+        ), mock.patch.object(
+            image_util, "get_image_bytes", side_effect=AssertionError("Downloading")
+        ), mock.patch.dict(
+            os.environ, {"IMAGE_CHECK_DUPLICATES": "True"}
+        ):
+            self.assertTrue(image_hash_util.is_acceptable_image(first_url, deck_index))
+            image_hash_util.add_images([ImageData(image_url=first_url)], deck_index)
+
+            # Not downloaded yet, so accepted when chosen, and compared again when its slide is added
+            self.assertTrue(image_hash_util.is_acceptable_image(second_url, deck_index))
+            self.assertFalse(
+                image_hash_util.has_duplicate_images([second_url], deck_index)
+            )
+            available[second_url] = _to_bytes(self.image.resize((150, 100)), "PNG")
+            self.assertTrue(
+                image_hash_util.has_duplicate_images([second_url], deck_index)
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,281 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from io import BytesIO
+from unittest import mock
+
+import requests
+from PIL import Image
+
+from talkgenerator.util import image_util, os_util
+from talkgenerator.util.generator_util import ExternalImageListGenerator
+from talkgenerator.util.image_util import ImageStore
+
+
+class ImageUtilTest(unittest.TestCase):
+    def setUp(self):
+        image_util.clear_prefetched()
+        environment = mock.patch.dict(os.environ, {"IMAGE_STORE_ENABLED": "False"})
+        environment.start()
+        self.addCleanup(environment.stop)
+        self.downloaded = []
+        self.release = threading.Event()
+
+        def fake_download(url):
+            self.release.wait(5)
+            self.downloaded.append(url)
+            return url.encode()
+
+        patcher = mock.patch.object(image_util, "download", side_effect=fake_download)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(image_util.clear_prefetched)
+
+    def test_prefetch_downloads_once(self):
+        url = "https://example.com/cat.png"
+        future = image_util.prefetch(url)
+        self.assertIs(future, image_util.prefetch(url))
+        self.release.set()
+        self.assertEqual(url.encode(), image_util.get_image_bytes(url))
+        self.assertEqual([url], self.downloaded)
+
+    def test_local_images_not_prefetched(self):
+        self.assertIsNone(image_util.prefetch("data/images/black-transparent.png"))
+
+    def test_prefetched_images_bounded(self):
+        with mock.patch.dict(os.environ, {"IMAGE_PREFETCH_MAX_IMAGES": "2"}):
+            futures = [
+                image_util.prefetch("https://example.com/{}.png".format(i))
+                for i in range(3)
+            ]
+        self.release.set()
+        # The oldest image is forgotten, and is downloaded again when needed
+        self.assertEqual(b"https://example.com/1.png", futures[1].result())
+        self.assertEqual(
+            b"https://example.com/0.png",
+            image_util.get_image_bytes("https://example.com/0.png"),
+        )
+
+    def test_prefetched_bytes_bounded(self):
+        self.release.set()
+        urls = ["https://example.com/{}.png".format(i) for i in range(3)]
+        with mock.patch.dict(os.environ, {"IMAGE_PREFETCH_MAX_BYTES": "50"}):
+            for url in urls:
+                image_util.prefetch(url).result()
+        # Every url is 25 bytes, so only the last two fit
+        self.assertEqual(urls[1:], list(image_util._prefetched))
+
+
+class ImageStoreTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def test_identical_content_stored_once(self):
+        store = ImageStore(self.directory, max_bytes=1000)
+        first_hash = store.put("https://example.com/a.png", b"cat")
+        self.assertEqual(first_hash, store.put("https://example.com/b.png", b"cat"))
+        self.assertEqual(b"cat", store.get("https://example.com/b.png"))
+        self.assertIsNone(store.get("https://example.com/c.png"))
+        self.assertEqual(3, store.get_size_in_bytes())
+
+    def test_least_recently_used_evicted(self):
+        store = ImageStore(self.directory, max_bytes=10)
+        store.put("https://example.com/a.png", b"aaaa")
+        store.put("https://example.com/b.png", b"bbbb")
+        store.get("https://example.com/a.png")
+        store.put("https://example.com/c.png", b"cccc")
+
+        self.assertIsNone(store.get("https://example.com/b.png"))
+        self.assertEqual(b"aaaa", store.get("https://example.com/a.png"))
+        # Another process sees the same store
+        other_store = ImageStore(self.directory, max_bytes=10)
+        self.assertEqual(b"cccc", other_store.get("https://example.com/c.png"))
+
+
+class ImageSizeTest(unittest.TestCase):
+    def test_probe_size_matches_pil(self):
+        for image_format in ["PNG", "GIF", "JPEG"]:
+            output = BytesIO()
+            Image.new("RGB", (321, 123)).save(output, format=image_format)
+            self.assertEqual(
+                (321, 123),
+                image_util.probe_size(output.getvalue()[: image_util.HEADER_BYTES]),
+                image_format,
+            )
+
+    def test_probe_size_of_progressive_jpeg_with_exif(self):
+        output = BytesIO()
+        exif = Image.Exif()
+        exif[0x010E] = "A cat" * 500
+        Image.new("RGB", (64, 48)).save(
+            output, format="JPEG", progressive=True, exif=exif
+        )
+        self.assertEqual((64, 48), image_util.probe_size(output.getvalue()))
+
+    def test_unknown_format(self):
+        self.assertIsNone(image_util.probe_size(b"<html></html>"))
+        self.assertIsNone(image_util.probe_size(b"\xff\xd8\xff\xe0"))
+
+    def test_size_of_local_image(self):
+        image_file = os_util.to_actual_file("data/images/black-transparent.png")
+        self.assertEqual(
+            Image.open(image_file).size, image_util.get_image_size(image_file)
+        )
+
+
+class NormaliseTest(unittest.TestCase):
+    @staticmethod
+    def _create_image(size, mode="RGB", image_format="JPEG"):
+        output = BytesIO()
+        Image.effect_noise(size, 64).convert(mode).save(output, format=image_format)
+        return output.getvalue()
+
+    def test_downscales_to_cover_target_size(self):
+        content = self._create_image((2000, 1000))
+        normalised = image_util.normalise(content, (400, 400), 10 ** 7, 85)
+        self.assertLess(len(normalised), len(content))
+        self.assertEqual((800, 400), Image.open(BytesIO(normalised)).size)
+
+    def test_does_not_upscale_to_cover_target_size(self):
+        content = self._create_image((1000, 500))
+        normalised = image_util.normalise(content, (1600, 200), 10 ** 7, 85)
+        self.assertEqual((1000, 500), Image.open(BytesIO(normalised)).size)
+
+    def test_limits_pixels(self):
+        content = self._create_image((1000, 1000))
+        normalised = image_util.normalise(content, None, 250 * 250, 85)
+        self.assertEqual((250, 250), Image.open(BytesIO(normalised)).size)
+
+    def test_keeps_transparency(self):
+        content = self._create_image((800, 800), mode="RGBA", image_format="PNG")
+        normalised = image_util.normalise(content, (100, 100), 10 ** 7, 85)
+        self.assertEqual("RGBA", Image.open(BytesIO(normalised)).mode)
+
+    def test_keeps_invalid_image(self):
+        self.assertEqual(b"<html>", image_util.normalise(b"<html>", (100, 100), 100, 85))
+
+    def test_normalise_in_process_pool(self):
+        content = self._create_image((1000, 500))
+        with mock.patch.dict(
+            os.environ,
+            {"IMAGE_NORMALISE_PROCESSES": "1", "IMAGE_TARGET_DPI": "100"},
+        ):
+            normalised = image_util.normalise_for_placeholder(
+                content, (image_util.EMU_PER_INCH * 2, image_util.EMU_PER_INCH * 2)
+            )
+        self.assertEqual((400, 200), Image.open(BytesIO(normalised)).size)
+
+
+class ImageValidationTest(unittest.TestCase):
+    def setUp(self):
+        environment = mock.patch.dict(
+            os.environ, {"IMAGE_STORE_ENABLED": "False", "IMAGE_PREFETCH": "False"}
+        )
+        environment.start()
+        self.addCleanup(environment.stop)
+
+    @staticmethod
+    def _create_response(status_code, headers):
+        response = requests.Response()
+        response.status_code = status_code
+        response.headers.update(headers)
+        return response
+
+    def test_valid_image_response(self):
+        self.assertTrue(
+            image_util._is_valid_image_response(
+                self._create_response(200, {"Content-Type": "image/jpeg"}), 100
+            )
+        )
+        self.assertFalse(
+            image_util._is_valid_image_response(self._create_response(404, {}), 100)
+        )
+        self.assertFalse(
+            image_util._is_valid_image_response(
+                self._create_response(200, {"Content-Type": "text/html"}), 100
+            )
+        )
+        self.assertFalse(
+            image_util._is_valid_image_response(
+                self._create_response(206, {"Content-Range": "bytes 0-1023/5000"}), 100
+            )
+        )
+
+    def _is_valid_available_image(self, content):
+        with mock.patch.object(
+            image_util, "get_available_bytes", return_value=content
+        ), mock.patch.object(
+            image_util, "_check_remote_image", return_value=False
+        ) as check_remote_image:
+            valid = image_util.is_valid_image_url("https://example.com/image")
+        self.assertFalse(check_remote_image.called)
+        return valid
+
+    def test_downloaded_webp_image_valid(self):
+        output = BytesIO()
+        Image.new("RGB", (64, 48)).save(output, format="WEBP")
+        self.assertTrue(self._is_valid_available_image(output.getvalue()))
+
+    def test_downloaded_jpeg_with_large_header_valid(self):
+        output = BytesIO()
+        Image.new("RGB", (64, 48)).save(
+            output, format="JPEG", icc_profile=b"\0" * (2 * image_util.HEADER_BYTES)
+        )
+        content = output.getvalue()
+        self.assertIsNone(image_util.probe_size(content[: image_util.HEADER_BYTES]))
+        self.assertTrue(self._is_valid_available_image(content))
+        self.assertEqual((64, 48), image_util.get_content_size(content))
+
+    def test_downloaded_html_invalid(self):
+        self.assertFalse(self._is_valid_available_image(b"<html></html>"))
+
+    def test_slow_checks_assumed_valid(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+        urls = ["https://example.com/{}.png".format(i) for i in range(2)]
+        with mock.patch.object(
+            image_util, "_check_remote_image", side_effect=lambda _: release.wait(5)
+        ), mock.patch.dict(os.environ, {"IMAGE_CHECK_TIMEOUT": "0.1"}):
+            start = time.perf_counter()
+            validity = image_util.validate_image_urls(urls)
+        self.assertLess(time.perf_counter() - start, 2)
+        self.assertEqual({url: True for url in urls}, validity)
+
+    def test_generator_skips_invalid_images(self):
+        urls = ["https://example.com/{}.png".format(i) for i in range(5)]
+        valid_url = urls[3]
+        with mock.patch.object(
+            image_util, "_check_remote_image", side_effect=lambda url: url == valid_url
+        ), mock.patch.dict(os.environ, {"IMAGE_CHECK_DUPLICATES": "False"}):
+            validity = image_util.validate_image_urls(urls)
+            generator = ExternalImageListGenerator(lambda _: list(urls))
+            chosen_image = generator({})
+
+        self.assertEqual([valid_url], [url for url in urls if validity[url]])
+        self.assertEqual(valid_url, chosen_image.get_image_url())
+
+    def test_generator_does_not_wait_for_slow_download(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+        self.addCleanup(image_util.clear_prefetched)
+        url = "https://example.com/slow.png"
+        with mock.patch.object(
+            image_util, "download", side_effect=lambda _: release.wait(5)
+        ), mock.patch.dict(
+            os.environ, {"IMAGE_PREFETCH": "True", "IMAGE_CHECK_TIMEOUT": "0.1"}
+        ):
+            generator = ExternalImageListGenerator(
+                lambda _: [url], check_image_validness=False
+            )
+            start = time.perf_counter()
+            chosen_image = generator({})
+        self.assertLess(time.perf_counter() - start, 2)
+        self.assertEqual(url, chosen_image.get_image_url())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,152 @@
+import unittest
+from io import BytesIO
+from unittest import mock
+
+from PIL import Image
+from pptx import Presentation
+
+from talkgenerator.slide import powerpoint_slide_creator
+from talkgenerator.slide.powerpoint_slide_creator import InternalImage
+from talkgenerator.slide.slide_deck import SlideDeck
+from talkgenerator.slide.slides import FullImageSlide, LarqeQuoteSlide
+from talkgenerator.util import image_util
+
+
+class PowerpointSlideCreatorTest(unittest.TestCase):
+    def test_identical_images_added_once(self):
+        presentation = powerpoint_slide_creator.create_new_powerpoint()
+        with mock.patch.object(
+            InternalImage,
+            "get_file_like",
+            autospec=True,
+            side_effect=lambda image, placeholder_size=None: image._file_location,
+        ) as get_file_like:
+            for i in range(3):
+                powerpoint_slide_creator.create_large_quote_slide(
+                    presentation, "Quote {}".format(i), "A cat"
+                )
+        self.assertEqual(1, get_file_like.call_count)
+
+        output = BytesIO()
+        presentation.save(output)
+        saved = Presentation(output)
+        self.assertEqual(3, len(saved.slides))
+        image_parts = {
+            relationship.target_part.partname
+            for slide in saved.slides
+            for relationship in slide.part.rels.values()
+            if relationship.reltype.endswith("/image")
+        }
+        self.assertEqual(1, len(image_parts))
+
+    def test_insert_picture_same_as_python_pptx(self):
+        output = BytesIO()
+        Image.new("RGB", (400, 300), "red").save(output, format="PNG")
+        content = output.getvalue()
+        pictures = []
+        for use_image_part in [False, True]:
+            presentation = powerpoint_slide_creator.create_new_powerpoint()
+            slide = powerpoint_slide_creator._create_slide(
+                presentation, powerpoint_slide_creator.LAYOUT_FULL_PICTURE
+            )
+            placeholder = slide.placeholders[1]
+            if use_image_part:
+                image_part = presentation.part.package.get_or_add_image_part(
+                    BytesIO(content)
+                )
+                picture = powerpoint_slide_creator._insert_picture(
+                    placeholder, image_part
+                )
+            else:
+                picture = placeholder.insert_picture(BytesIO(content))
+            self.assertIs(picture._element, slide.placeholders[1]._element)
+            pictures.append(picture)
+
+        expected, actual = pictures
+        self.assertEqual(expected.image.blob, actual.image.blob)
+        for crop in ["crop_left", "crop_right", "crop_top", "crop_bottom"]:
+            self.assertEqual(getattr(expected, crop), getattr(actual, crop))
+        self.assertEqual(expected._element.xml, actual._element.xml)
+
+    def test_image_parts_not_shared_between_presentations(self):
+        first = powerpoint_slide_creator.create_new_powerpoint()
+        second = powerpoint_slide_creator.create_new_powerpoint()
+        powerpoint_slide_creator.create_large_quote_slide(first, "Quote", "A cat")
+        powerpoint_slide_creator.create_large_quote_slide(second, "Quote", "A cat")
+        for presentation in [first, second]:
+            for relationship in presentation.slides[0].part.rels.values():
+                if relationship.reltype.endswith("/image"):
+                    self.assertIs(
+                        presentation.part.package, relationship.target_part.package
+                    )
+
+    def test_images_prepared_before_adding_slides(self):
+        output = BytesIO()
+        Image.new("RGB", (400, 300), "red").save(output, format="PNG")
+        content = output.getvalue()
+        urls = ["https://example.com/{}.png".format(i) for i in range(3)]
+        slide_deck = SlideDeck(4)
+        for i, url in enumerate(urls):
+            slide_deck.add_slide(i, FullImageSlide("Image {}".format(i), url))
+        slide_deck.add_slide(3, LarqeQuoteSlide("Quote", "A cat", urls[0]))
+
+        presentation = powerpoint_slide_creator.create_new_powerpoint()
+        with mock.patch.object(
+            image_util, "get_image_bytes", return_value=content
+        ) as get_image_bytes, mock.patch.object(
+            powerpoint_slide_creator, "_prepare_image",
+            wraps=powerpoint_slide_creator._prepare_image,
+        ) as prepare_image:
+            slide_deck.save_to_powerpoint(presentation)
+
+        # The background of the quote slide has the same size as the first full image, so is only prepared once
+        self.assertEqual(3, prepare_image.call_count)
+        self.assertEqual(3, get_image_bytes.call_count)
+        self.assertEqual(
+            ["Image 0", "Image 1", "Image 2", "Quote"],
+            [slide.shapes.title.text for slide in presentation.slides],
+        )
+        self.assertEqual(
+            (400, 300),
+            powerpoint_slide_creator._get_presentation_images(presentation)
+            .prepared[(urls[1], (12192000, 6858000))]
+            .size(),
+        )
+
+    def test_new_presentations_independent_of_template(self):
+        first = powerpoint_slide_creator.create_new_powerpoint()
+        second = powerpoint_slide_creator.create_new_powerpoint()
+        powerpoint_slide_creator.create_title_slide(first, "Cats", "A B")
+
+        self.assertEqual(1, len(first.slides))
+        self.assertEqual(0, len(second.slides))
+        self.assertEqual(
+            0, len(powerpoint_slide_creator.create_new_powerpoint().slides)
+        )
+        self.assertIs(
+            second.slide_layouts[powerpoint_slide_creator.LAYOUT_LARGE_QUOTE].part,
+            powerpoint_slide_creator.get_slide_layout(
+                second, powerpoint_slide_creator.LAYOUT_LARGE_QUOTE
+            ).part,
+        )
+        output = BytesIO()
+        first.save(output)
+        self.assertEqual("Cats", Presentation(output).slides[0].shapes.title.text)
+
+    def test_slides_of_earlier_presentations_not_shared(self):
+        first = powerpoint_slide_creator.create_new_powerpoint()
+        # Touching the slides makes python-pptx cache them on the presentation
+        self.assertEqual(0, len(first.slides))
+        powerpoint_slide_creator.create_title_slide(first, "Cats", "A B")
+
+        second = powerpoint_slide_creator.create_new_powerpoint()
+        powerpoint_slide_creator.create_title_slide(second, "Dogs", "C D")
+        for presentation, title in [(first, "Cats"), (second, "Dogs")]:
+            output = BytesIO()
+            presentation.save(output)
+            saved = Presentation(output)
+            self.assertEqual([title], [slide.shapes.title.text for slide in saved.slides])
+
+
+if __name__ == "__main__":
+    unittest.main()
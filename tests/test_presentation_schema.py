@@ -0,0 +1,185 @@
+import itertools
+import random
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+from talkgenerator.datastructures.slide_generator_data import (
+    ConstantWeightFunction,
+    SlideGeneratorData,
+)
+from talkgenerator.schema import presentation_schema_types, slide_topic_generators
+from talkgenerator.schema.presentation_schema import PresentationSchema, ENGINES
+from talkgenerator.slide import slide_generator_types
+
+
+def _create_offline_slide_generator(prefix, counter, **kwargs):
+    return SlideGeneratorData(
+        slide_generator_types.TitleSlideGenerator.of(
+            lambda context: "{} {} {}".format(prefix, context["seed"], next(counter)),
+            lambda context: "Subtitle {}".format(next(counter)),
+        ),
+        name=prefix + " slide",
+        **kwargs
+    )
+
+
+def _create_offline_schema():
+    return PresentationSchema(
+        powerpoint_creator=None,
+        seed_generator=slide_topic_generators.IdentityTopicGenerator,
+        title_generator=None,
+        slide_generators=[
+            _create_offline_slide_generator("About", itertools.count()),
+        ],
+    )
+
+
+class PresentationSchemaTest(unittest.TestCase):
+    def setUp(self):
+        random.seed(123)
+
+    def test_all_engines_generate_complete_deck(self):
+        for engine in ENGINES:
+            _, slide_deck = _create_offline_schema().generate_presentation(
+                topics=["cat"], num_slides=5, save_ppt=False, engine=engine
+            )
+            self.assertTrue(slide_deck.is_complete(), engine)
+
+    def test_serial_engine_regenerates_rejected_slides(self):
+        schema = _create_offline_schema()
+        rejections = iter(["duplicate image"])
+        with mock.patch.object(
+            schema,
+            "_get_rejection_reason",
+            side_effect=lambda *args: next(rejections, None),
+        ) as get_rejection_reason:
+            _, slide_deck = schema.generate_presentation(
+                topics=["cat"], num_slides=3, save_ppt=False, engine="serial"
+            )
+        self.assertTrue(slide_deck.is_complete())
+        self.assertEqual(4, get_rejection_reason.call_count)
+
+    def test_serial_engine_adds_slides_that_keep_being_rejected(self):
+        schema = _create_offline_schema()
+        with mock.patch.object(
+            schema, "_get_rejection_reason", return_value="duplicate image"
+        ):
+            _, slide_deck = schema.generate_presentation(
+                topics=["cat"], num_slides=3, save_ppt=False, engine="serial"
+            )
+        self.assertTrue(slide_deck.is_complete())
+
+    def test_given_executor_bounds_workers(self):
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            schema = _create_offline_schema()
+            for _ in range(2):
+                _, slide_deck = schema.generate_presentation(
+                    topics=["cat"], num_slides=6, save_ppt=False, executor=executor
+                )
+                self.assertTrue(slide_deck.is_complete())
+
+    def test_speculative_fanout_generates_complete_deck(self):
+        counter = itertools.count()
+        schema = PresentationSchema(
+            powerpoint_creator=None,
+            seed_generator=slide_topic_generators.IdentityTopicGenerator,
+            title_generator=None,
+            slide_generators=[
+                _create_offline_slide_generator(prefix, counter)
+                for prefix in ("First", "Second", "Third")
+            ],
+        )
+        _, slide_deck = schema.generate_presentation(
+            topics=["cat"],
+            num_slides=5,
+            save_ppt=False,
+            engine="parallel",
+            speculative_fanout=3,
+        )
+        self.assertTrue(slide_deck.is_complete())
+
+    def test_max_allowed_tags_respected(self):
+        counter = itertools.count()
+        schema = PresentationSchema(
+            powerpoint_creator=None,
+            seed_generator=slide_topic_generators.IdentityTopicGenerator,
+            title_generator=None,
+            slide_generators=[
+                _create_offline_slide_generator(
+                    "Special",
+                    counter,
+                    weight_function=ConstantWeightFunction(100),
+                    tags=["special"],
+                ),
+                _create_offline_slide_generator("Normal", counter),
+            ],
+            max_allowed_tags={"special": 1},
+        )
+        for engine in ENGINES:
+            _, slide_deck = schema.generate_presentation(
+                topics=["cat"], num_slides=6, save_ppt=False, engine=engine
+            )
+            titles = [
+                slide.to_slide_dictionary()["title"]
+                for slide in slide_deck.get_structured_data()
+            ]
+            self.assertEqual(
+                1, len([title for title in titles if title.startswith("Special")])
+            )
+
+    def test_deadline_uses_fallback_generators(self):
+        counter = itertools.count()
+        schema = PresentationSchema(
+            powerpoint_creator=None,
+            seed_generator=slide_topic_generators.IdentityTopicGenerator,
+            title_generator=None,
+            slide_generators=[_create_offline_slide_generator("Normal", counter)],
+            deadline_fallback_generators=[
+                _create_offline_slide_generator("Fallback", counter)
+            ],
+        )
+        for engine in ENGINES:
+            _, slide_deck = schema.generate_presentation(
+                topics=["cat"], num_slides=3, save_ppt=False, engine=engine, deadline=0
+            )
+            titles = [
+                slide.to_slide_dictionary()["title"]
+                for slide in slide_deck.get_structured_data()
+            ]
+            self.assertEqual(3, len(titles), engine)
+            self.assertTrue(all(title.startswith("Fallback") for title in titles))
+
+    def test_unknown_engine(self):
+        with self.assertRaises(ValueError):
+            _create_offline_schema().generate_presentation(
+                topics=["cat"], num_slides=1, save_ppt=False, engine="unknown"
+            )
+
+
+class PresentationSchemaTypesTest(unittest.TestCase):
+    def test_schema_built_once_on_request(self):
+        built = []
+
+        def create_schema():
+            built.append(True)
+            return _create_offline_schema()
+
+        presentation_schema_types.register_schema("offline", create_schema)
+        self.assertEqual([], built)
+        schema = presentation_schema_types.get_schema("offline")
+        self.assertIs(schema, presentation_schema_types.get_schema("offline"))
+        self.assertEqual(1, len(built))
+        self.assertIn("offline", presentation_schema_types.get_schema_names())
+
+    def test_former_schema_attributes(self):
+        self.assertIs(
+            presentation_schema_types.get_schema("ted"),
+            presentation_schema_types.ted_schema,
+        )
+        with self.assertRaises(KeyError):
+            presentation_schema_types.get_schema("unknown")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import builtins
+import io
+import sys
+import unittest
+
+from talkgenerator.util import profiling_util
+from talkgenerator.util.profiling_util import StartupProfiler
+
+
+class ProfilingUtilTest(unittest.TestCase):
+    def test_measures_nested_blocks(self):
+        profiler = StartupProfiler(trace_memory=False)
+        profiler.start()
+        try:
+            with profiler.measure("schema", "outer"):
+                with profiler.measure("tracery grammar", "inner"):
+                    pass
+        finally:
+            profiler.stop()
+
+        outer = profiler.get_records("schema")[0]
+        inner = profiler.get_records("tracery grammar")[0]
+        self.assertGreaterEqual(outer.seconds, inner.seconds)
+        self.assertLessEqual(outer.self_seconds, outer.seconds - inner.seconds + 1e-6)
+
+    def test_records_new_imports_only(self):
+        sys.modules.pop("colorsys", None)
+        original_import = builtins.__import__
+        profiler = StartupProfiler()
+        profiler.start()
+        try:
+            import colorsys
+            import os
+        finally:
+            profiler.stop()
+
+        self.assertIs(original_import, builtins.__import__)
+        imported = [record.name for record in profiler.get_records("import")]
+        self.assertIn("colorsys", imported)
+        self.assertNotIn("os", imported)
+        self.assertIn("colorsys", profiler.format_report())
+
+    def test_inactive_profile_is_noop(self):
+        self.assertFalse(profiling_util.is_profiling())
+        with profiling_util.profile("schema", "default"):
+            pass
+        stream = io.StringIO()
+        profiling_util.report_startup(stream)
+        self.assertEqual("", stream.getvalue())
+
+    def test_report_startup_stops_profiling(self):
+        profiling_util.start_profiling(trace_memory=False)
+        with profiling_util.profile("runtime check", "environment variables"):
+            pass
+        stream = io.StringIO()
+        profiling_util.report_startup(stream)
+        self.assertFalse(profiling_util.is_profiling())
+        self.assertIn("environment variables", stream.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+import json
+import threading
+import unittest
+from http.client import HTTPConnection
+from unittest import mock
+from urllib import request
+from urllib.error import HTTPError
+
+from talkgenerator import server
+
+
+class ServerTest(unittest.TestCase):
+    def setUp(self):
+        self.server = server.create_server("127.0.0.1", 0, max_concurrent_requests=1)
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.url = "http://127.0.0.1:{}".format(self.server.server_address[1])
+
+    def _post(self, content):
+        return request.urlopen(
+            request.Request(
+                self.url + "/generate",
+                data=json.dumps(content).encode("utf-8"),
+                method="POST",
+            ),
+            timeout=10,
+        )
+
+    def test_generate_pptx(self):
+        with mock.patch.object(
+            server, "_generate", return_value=(server.PPTX_CONTENT_TYPE, b"PK")
+        ) as generate:
+            response = self._post({"topic": "cat", "slides": 3})
+        self.assertEqual(server.PPTX_CONTENT_TYPE, response.headers["Content-Type"])
+        self.assertEqual(b"PK", response.read())
+        self.assertEqual("cat", generate.call_args[0][0]["topic"])
+        self.assertEqual(3, generate.call_args[0][0]["slides"])
+
+        with request.urlopen(self.url + "/metrics", timeout=10) as response:
+            metrics = json.load(response)
+        self.assertEqual(1, metrics["generated"])
+        self.assertEqual(0, metrics["in_flight"])
+
+    def test_invalid_requests_refused(self):
+        for content in [
+            {},
+            {"topic": "cat", "slides": 1000},
+            {"topic": "cat", "slides": True},
+            {"topic": "cat", "schema": "?"},
+            {"topic": ["cat", 3]},
+            {"topic": "cat", "title": ["A", "B"]},
+            {"topic": "cat", "presenter": 3},
+            {"topic": "cat", "deadline": 0},
+            {"topic": "cat", "slide_deadline": -1},
+            {"topic": "cat", "int_seed": 3},
+        ]:
+            with self.assertRaises(HTTPError) as context:
+                self._post(content)
+            self.assertEqual(400, context.exception.code)
+
+    def test_requests_beyond_limit_refused(self):
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow_generate(_):
+            started.set()
+            release.wait(10)
+            return "application/json", b"{}"
+
+        with mock.patch.object(server, "_generate", side_effect=slow_generate):
+            thread = threading.Thread(target=self._post, args=({"topic": "cat"},))
+            thread.start()
+            started.wait(10)
+            with self.assertRaises(HTTPError) as context:
+                self._post({"topic": "dog"})
+            release.set()
+            thread.join(10)
+        self.assertEqual(503, context.exception.code)
+
+    def test_negative_content_length_refused(self):
+        connection = HTTPConnection(
+            "127.0.0.1", self.server.server_address[1], timeout=10
+        )
+        self.addCleanup(connection.close)
+        connection.putrequest("POST", "/generate")
+        connection.putheader("Content-Length", "-1")
+        connection.endheaders()
+        self.assertEqual(400, connection.getresponse().status)
+
+    def test_health(self):
+        with request.urlopen(self.url + "/health", timeout=10) as response:
+            self.assertEqual({"status": "ok"}, json.load(response))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,12 +1,21 @@
+import io
+import json
+import os
 import random
 import logging
+import tempfile
+import threading
 import unittest
+from io import BytesIO
 from unittest import mock
 
+from pptx import Presentation
+
 from talkgenerator.schema import slide_schemas
 from talkgenerator import generator
 from talkgenerator.slide import powerpoint_slide_creator
-from talkgenerator.util import os_util
+from talkgenerator.sources.text_generator import TraceryTextGenerator
+from talkgenerator.util import os_util, profiling_util
 
 
 class TestTalkGenerator(unittest.TestCase):
@@ -18,6 +27,10 @@ class TestTalkGenerator(unittest.TestCase):
         self.default_args.configure_mock(schema="default")
         self.default_args.configure_mock(title=None)
         self.default_args.configure_mock(parallel=True)
+        self.default_args.configure_mock(engine=None)
+        self.default_args.configure_mock(speculative_fanout=1)
+        self.default_args.configure_mock(deadline=None)
+        self.default_args.configure_mock(slide_deadline=None)
         self.default_args.configure_mock(
             output_folder=os_util.to_actual_file("../output/test/")
         )
@@ -69,5 +82,136 @@ class TestTalkGenerator(unittest.TestCase):
             slide.create_powerpoint_slide(presentation)
 
 
+class TestSavePresentation(unittest.TestCase):
+    def setUp(self):
+        self.presentation = powerpoint_slide_creator.create_new_powerpoint()
+        powerpoint_slide_creator.create_title_slide(self.presentation, "Cats", "A B")
+
+    def test_save_to_stream(self):
+        content = generator.presentation_to_bytes(self.presentation)
+        self.assertEqual(b"PK", content[:2])
+        self.assertEqual(1, len(Presentation(BytesIO(content)).slides))
+
+    def test_save_does_not_overwrite(self):
+        with tempfile.TemporaryDirectory() as output_folder:
+            files = [
+                generator.save_presentation_to_pptx(
+                    output_folder, "cats", self.presentation
+                )
+                for _ in range(3)
+            ]
+            self.assertEqual(os.path.join(output_folder, "cats.pptx"), files[0])
+            self.assertEqual(3, len(set(files)))
+            self.assertEqual(3, len(os.listdir(output_folder)))
+
+    def test_save_permission_error_raised(self):
+        with tempfile.TemporaryDirectory() as output_folder:
+            with mock.patch.object(generator.os, "open", side_effect=PermissionError):
+                with self.assertRaises(PermissionError):
+                    generator.save_presentation_to_pptx(
+                        output_folder, "cats", self.presentation
+                    )
+
+
+class TestGeneratePresentations(unittest.TestCase):
+    def test_decks_generated_concurrently_and_failures_isolated(self):
+        lock = threading.Lock()
+        running = []
+        max_running = []
+
+        def fake_generate_presentation(schema, slides, topic, **kwargs):
+            with lock:
+                running.append(topic)
+                max_running.append(len(running))
+            try:
+                if topic == "bad":
+                    raise ValueError("No slides about " + topic)
+                return None, topic + " deck", topic + ".pptx"
+            finally:
+                with lock:
+                    running.remove(topic)
+
+        topics = ["cat", "bad", "dog", "horse"]
+        with mock.patch.object(
+            generator, "generate_presentation", side_effect=fake_generate_presentation
+        ):
+            results = list(
+                generator.generate_presentations(
+                    iter(topics), slides=3, max_concurrent_decks=2
+                )
+            )
+
+        self.assertEqual(sorted(topics), sorted(result.topic for result in results))
+        self.assertLessEqual(max(max_running), 2)
+        for result in results:
+            if result.topic == "bad":
+                self.assertIsInstance(result.error, ValueError)
+            else:
+                self.assertIsNone(result.error)
+                self.assertEqual(result.topic + ".pptx", result.presentation_file)
+
+    def test_topics_read_from_file(self):
+        opened_files = []
+
+        def recording_open(file, *args, **kwargs):
+            opened_file = open(file, *args, **kwargs)
+            opened_files.append(opened_file)
+            return opened_file
+
+        with tempfile.TemporaryDirectory() as directory:
+            topics_file = os.path.join(directory, "topics.txt")
+            with open(topics_file, "w", encoding="utf-8") as stream:
+                stream.write("cat\n\ndog\n")
+            args = generator.get_batch_argument_parser().parse_args(
+                ["--topics_file", topics_file, "--processes", "1"]
+            )
+            output = io.StringIO()
+            with mock.patch.object(
+                generator.runtime_checker, "check_runtime_environment"
+            ), mock.patch.object(
+                generator,
+                "generate_presentation",
+                side_effect=lambda schema, slides, topic, **kwargs: (
+                    None,
+                    None,
+                    topic + ".pptx",
+                ),
+            ), mock.patch.object(
+                generator, "open", side_effect=recording_open, create=True
+            ):
+                generator.generate_presentations_using_cli_arguments(args, output)
+
+        self.assertEqual(1, len(opened_files))
+        self.assertTrue(opened_files[0].closed)
+        self.assertEqual(
+            ["cat.pptx", "dog.pptx"],
+            sorted(json.loads(line)["file"] for line in output.getvalue().splitlines()),
+        )
+
+
+class TestProfileStartup(unittest.TestCase):
+    def test_grammars_loaded_while_generating_reported(self):
+        grammar = TraceryTextGenerator("data/text-templates/talk_subtitle.json")
+
+        def fake_generate_presentation(**kwargs):
+            grammar.generate()
+            return mock.Mock(), mock.Mock()
+
+        schema = mock.Mock()
+        schema.generate_presentation.side_effect = fake_generate_presentation
+        profiling_util.start_profiling(trace_memory=False)
+        self.addCleanup(profiling_util.stop_profiling)
+        with mock.patch(
+            "talkgenerator.schema.presentation_schema_types.get_schema",
+            return_value=schema,
+        ), mock.patch("sys.stderr", new_callable=io.StringIO) as stderr:
+            generator.generate_presentation(
+                "default", 3, topic="cat", presenter="A B", save_ppt=False
+            )
+
+        self.assertIn("tracery grammar", stderr.getvalue())
+        self.assertIn("talk_subtitle.json", stderr.getvalue())
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -17,6 +17,10 @@ class TestTalkGenerator(unittest.TestCase):
         self.default_args.configure_mock(schema="default")
         self.default_args.configure_mock(title=None)
         self.default_args.configure_mock(parallel=True)
+        self.default_args.configure_mock(engine=None)
+        self.default_args.configure_mock(speculative_fanout=1)
+        self.default_args.configure_mock(deadline=None)
+        self.default_args.configure_mock(slide_deadline=None)
         self.default_args.configure_mock(
             output_folder=os_util.to_actual_file("../output/test/")
         )
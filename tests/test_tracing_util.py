@@ -0,0 +1,84 @@
+import contextvars
+import io
+import json
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from talkgenerator.util import tracing_util
+
+
+class TracingUtilTest(unittest.TestCase):
+    def setUp(self):
+        self.tracer = tracing_util.start_tracing()
+        self.addCleanup(tracing_util.stop_tracing)
+
+    def test_nested_spans(self):
+        with tracing_util.span("deck", tracing_util.DECK) as deck:
+            with tracing_util.span("slide", tracing_util.SLIDE, seed=3) as slide:
+                slide.set_attribute("generator", "title")
+                tracing_util.event("rejected", tracing_util.GENERATOR_ATTEMPT)
+
+        (rejection,) = self.tracer.get_spans(tracing_util.GENERATOR_ATTEMPT)
+        self.assertEqual(deck.span_id, slide.parent_id)
+        self.assertEqual(slide.span_id, rejection.parent_id)
+        self.assertIsNone(deck.parent_id)
+        self.assertEqual({"seed": 3, "generator": "title"}, slide.attributes)
+
+    def test_spans_in_other_threads_keep_their_parent(self):
+        with tracing_util.span("deck", tracing_util.DECK) as deck:
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                futures = [
+                    executor.submit(
+                        contextvars.copy_context().run,
+                        self._traced_slide,
+                        i,
+                    )
+                    for i in range(2)
+                ]
+                for future in futures:
+                    future.result()
+
+        slides = self.tracer.get_spans(tracing_util.SLIDE)
+        self.assertEqual(2, len(slides))
+        self.assertTrue(all(slide.parent_id == deck.span_id for slide in slides))
+
+    def test_errors_recorded(self):
+        with self.assertRaises(ValueError):
+            with tracing_util.span("slide", tracing_util.SLIDE):
+                raise ValueError("no image")
+        (slide,) = self.tracer.get_spans()
+        self.assertIn("no image", slide.attributes["error"])
+
+    def test_nothing_recorded_when_not_tracing(self):
+        tracing_util.stop_tracing()
+        with tracing_util.span("slide", tracing_util.SLIDE) as slide:
+            slide.set_attribute("generator", "title")
+            tracing_util.get_current_span().set_attribute("seed", 1)
+        self.assertIs(tracing_util.NO_SPAN, slide)
+        self.assertEqual([], self.tracer.get_spans())
+
+    def test_export_formats(self):
+        with tracing_util.span("deck", tracing_util.DECK):
+            tracing_util.event("rejected", tracing_util.GENERATOR_ATTEMPT)
+
+        stream = io.StringIO()
+        self.tracer.write_json_lines(stream)
+        lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+        self.assertEqual(["deck", "rejected"], [line["name"] for line in lines])
+        self.assertEqual(lines[0]["id"], lines[1]["parent"])
+
+        stream = io.StringIO()
+        self.tracer.write_chrome_trace(stream)
+        events = json.loads(stream.getvalue())["traceEvents"]
+        self.assertEqual(
+            {"X", "i", "M"}, {trace_event["ph"] for trace_event in events}
+        )
+
+    @staticmethod
+    def _traced_slide(i):
+        with tracing_util.span("slide {}".format(i), tracing_util.SLIDE):
+            pass
+
+
+if __name__ == "__main__":
+    unittest.main()